@@ -1,11 +1,64 @@
 from __future__ import annotations
 
 import math
+import mmap
+import os
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Tuple
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..pool import MAX_WORKERS, pool_map
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; the pure-Python kernel is used instead
+    np = None
 
 EPS = 1e-12
 
+# bump when the basic tests change in a way that alters their results
+# (cached analyses are keyed on it)
+SUITE_VERSION = "basic/1"
+
+# Bit statistics come from one of two kernels with identical results:
+# "numpy" (unpackbits / diff / reshape-sum) or "python" (byte lookup tables). The
+# default is picked at import time: TSRNG_ANALYSIS=python|numpy|auto
+# (auto uses numpy when it is installed).
+ANALYSIS_BACKENDS = ("python", "numpy")
+
+
+def resolve_backend(name: str = "auto") -> str:
+    if name == "auto":
+        return "numpy" if np is not None else "python"
+    if name not in ANALYSIS_BACKENDS:
+        raise ValueError(f"Unknown analysis backend: {name}")
+    if name == "numpy" and np is None:
+        raise ImportError("numpy is not installed")
+    return name
+
+
+DEFAULT_BACKEND = resolve_backend(os.environ.get("TSRNG_ANALYSIS", "auto"))
+
+# Inputs of at least PARALLEL_THRESHOLD bits are split into one shard per
+# worker (at most MAX_WORKERS) and analysed on the shared process pool
+# (app.pool). Workers read their shard from shared memory (bytes) or an
+# mmap of the file, never from pickled data, and return a BitStatsAccumulator
+# that is merged in order. The threshold is the break-even measured by
+# benchmarks/bench_analysis.py: below it the inline kernel finishes before
+# the shared-memory copy and dispatch pay off.
+PARALLEL_THRESHOLD = 1 << 25
+READ_CHUNK = 1 << 20
+
+# Screening runs the basic tests on growing prefixes (SCREEN_FIRST_BITS, then
+# SCREEN_GROWTH times more at each step). It stops as soon as a p-value falls
+# below SCREEN_FAIL_P (decisive failure) or every p-value is at least
+# SCREEN_PASS_P (clear pass); anything in between is borderline and moves on
+# to the next prefix, and after the last prefix to the full run.
+SCREEN_FIRST_BITS = 1 << 16
+SCREEN_GROWTH = 16
+SCREEN_FAIL_P = 1e-4
+SCREEN_PASS_P = 0.05
+
 
 @dataclass
 class TestResult:
@@ -200,20 +253,102 @@ def compute_entropy_per_byte(byte_counts: List[int], total_bytes: int) -> Option
     return entropy
 
 
-def run_basic_tests(data: bytes, limit_bits: Optional[int] = None, block_size: int = 128) -> Dict[str, Any]:
-    trimmed, bit_length = trim_to_bits(data, limit_bits)
-    if bit_length == 0:
-        return {
-            "bit_length": 0,
-            "byte_length": 0,
-            "ones": 0,
-            "zeros": 0,
-            "proportion_ones": 0.0,
-            "entropy_per_byte": None,
-            "tests": [TestResult("monobit_frequency", False, note="empty sequence").to_dict()],
-            "all_passed": False,
-        }
+BitStats = Tuple[int, int, int, List[int], List[int]]
+
+
+def _byte_tables() -> Tuple[bytes, List[int], List[int], List[int], List[int]]:
+    # per byte value (MSB first): popcount, length of the leading and trailing
+    # runs, longest run inside the byte and number of bit transitions
+    pop, lead, trail, longest, trans = bytearray(), [], [], [], []
+    for b in range(256):
+        runs = [1]
+        for shift in range(6, -1, -1):
+            if (b >> shift) & 1 == (b >> (shift + 1)) & 1:
+                runs[-1] += 1
+            else:
+                runs.append(1)
+        pop.append(bin(b).count("1"))
+        lead.append(runs[0])
+        trail.append(runs[-1])
+        longest.append(max(runs))
+        trans.append(len(runs) - 1)
+    return bytes(pop), lead, trail, longest, trans
+
+
+_POPCOUNT, _LEAD_RUN, _TRAIL_RUN, _LONGEST_RUN, _TRANSITIONS = _byte_tables()
+
+
+def _bit_stats_python(trimmed: bytes, bit_length: int, block_size: int) -> BitStats:
+    """ones, runs, longest run, per-block ones and byte histogram.
+
+    Works a byte at a time through the lookup tables above; runs are stitched
+    across byte boundaries via the open run length and the previous byte's
+    last bit. Only a trailing partial byte is walked bit by bit.
+    """
+    full_bytes = bit_length // 8
+    body = trimmed[:full_bytes]
+    popcounts = body.translate(_POPCOUNT)
+    ones = sum(popcounts)
+
+    lead_run, trail_run, longest_in, transitions = _LEAD_RUN, _TRAIL_RUN, _LONGEST_RUN, _TRANSITIONS
+    byte_counts = [0] * 256
+    runs = 0
+    longest_run = 0
+    current_run = 0
+    prev_bit = -1
+    for b in body:
+        byte_counts[b] += 1
+        lead = lead_run[b]
+        if b >> 7 == prev_bit:
+            current_run += lead
+        else:
+            if current_run > longest_run:
+                longest_run = current_run
+            current_run = lead
+            runs += 1
+        if lead != 8:
+            # the open run ends inside this byte and a new one starts at its tail
+            if current_run > longest_run:
+                longest_run = current_run
+            if longest_in[b] > longest_run:
+                longest_run = longest_in[b]
+            runs += transitions[b]
+            current_run = trail_run[b]
+        prev_bit = b & 1
+
+    extra_bits = bit_length % 8
+    if extra_bits:
+        b = trimmed[full_bytes]
+        for shift in range(7, 7 - extra_bits, -1):
+            bit = (b >> shift) & 1
+            ones += bit
+            if bit == prev_bit:
+                current_run += 1
+            else:
+                if current_run > longest_run:
+                    longest_run = current_run
+                current_run = 1
+                runs += 1
+                prev_bit = bit
+    if current_run > longest_run:
+        longest_run = current_run
+
+    num_blocks = bit_length // block_size
+    if block_size % 8 == 0:
+        step = block_size // 8
+        block_counts = [sum(popcounts[i * step:(i + 1) * step]) for i in range(num_blocks)]
+    else:
+        block_counts = []
+        for i in range(num_blocks):
+            lo, hi = i * block_size, (i + 1) * block_size
+            first, last = lo // 8, (hi + 7) // 8
+            window = int.from_bytes(trimmed[first:last], "big") >> (last * 8 - hi)
+            block_counts.append((window & ((1 << block_size) - 1)).bit_count())
+    return ones, runs, longest_run, block_counts, byte_counts
 
+
+def _bit_stats_bitwise(trimmed: bytes, bit_length: int, block_size: int) -> BitStats:
+    # reference bit-at-a-time loop; the table kernel must match it exactly
     ones = 0
     runs = 0
     longest_run = 0
@@ -246,6 +381,51 @@ def run_basic_tests(data: bytes, limit_bits: Optional[int] = None, block_size: i
 
     longest_run = max(longest_run, current_run)
 
+    byte_counts = [0] * 256
+    for b in trimmed[:bit_length // 8]:
+        byte_counts[b] += 1
+    return ones, runs, longest_run, block_counts, byte_counts
+
+
+def _bit_stats_numpy(trimmed: bytes, bit_length: int, block_size: int) -> BitStats:
+    raw = np.frombuffer(trimmed, dtype=np.uint8)
+    bits = np.unpackbits(raw)[:bit_length]
+    ones = int(np.count_nonzero(bits))
+
+    # a run ends wherever the next bit differs
+    edges = np.flatnonzero(bits[1:] != bits[:-1])
+    runs = int(edges.size) + 1
+    bounds = np.concatenate(([-1], edges, [bit_length - 1]))
+    longest_run = int(np.diff(bounds).max())
+
+    num_blocks = bit_length // block_size
+    block_counts = (
+        bits[:num_blocks * block_size].reshape(num_blocks, block_size).sum(axis=1, dtype=np.int64).tolist()
+    )
+    byte_counts = np.bincount(raw[:bit_length // 8], minlength=256).tolist()
+    return ones, runs, longest_run, block_counts, byte_counts
+
+
+def _empty_report() -> Dict[str, Any]:
+    return {
+        "bit_length": 0,
+        "byte_length": 0,
+        "ones": 0,
+        "zeros": 0,
+        "proportion_ones": 0.0,
+        "entropy_per_byte": None,
+        "tests": [TestResult("monobit_frequency", False, note="empty sequence").to_dict()],
+        "all_passed": False,
+    }
+
+
+def _kernel(backend: Optional[str]):
+    backend = resolve_backend(backend) if backend else DEFAULT_BACKEND
+    return _bit_stats_numpy if backend == "numpy" else _bit_stats_python
+
+
+def _basic_tests(bit_length: int, stats: BitStats, block_size: int) -> Tuple[List[TestResult], Optional[float]]:
+    ones, runs, _, block_counts, byte_counts = stats
     zeros = bit_length - ones
     tests: List[TestResult] = [
         monobit_test(bit_length, ones, zeros),
@@ -254,23 +434,442 @@ def run_basic_tests(data: bytes, limit_bits: Optional[int] = None, block_size: i
     ]
 
     full_bytes = bit_length // 8
-    byte_counts = [0] * 256
-    for b in trimmed[:full_bytes]:
-        byte_counts[b] += 1
     tests.append(byte_distribution_test(byte_counts, full_bytes))
 
     entropy = compute_entropy_per_byte(byte_counts, full_bytes)
+    return tests, entropy
 
+
+def _report(bit_length: int, stats: BitStats, tests: List[TestResult], entropy: Optional[float]) -> Dict[str, Any]:
+    ones, _, longest_run, _, _ = stats
     all_passed = all(t.passed for t in tests if t.p_value is not None)
 
     return {
         "bit_length": bit_length,
-        "byte_length": full_bytes,
+        "byte_length": bit_length // 8,
         "ones": ones,
-        "zeros": zeros,
+        "zeros": bit_length - ones,
         "proportion_ones": ones / bit_length,
         "longest_run": longest_run,
         "entropy_per_byte": entropy,
         "tests": [t.to_dict() for t in tests],
         "all_passed": all_passed,
     }
+
+
+def run_basic_tests(
+    data: bytes,
+    limit_bits: Optional[int] = None,
+    block_size: int = 128,
+    backend: Optional[str] = None,
+    extra_tests: Optional[Sequence[str]] = None,
+    workers: Optional[int] = None,
+    screening: bool = False,
+) -> Dict[str, Any]:
+    """Basic tests over the first `limit_bits` bits of `data`.
+
+    `extra_tests` names SP 800-22 tests (see sp800_22.TESTS) to run on the
+    same bits; their results are appended to `tests` under an "sp800_22."
+    prefix and count towards `all_passed`. They need numpy (ImportError
+    otherwise).
+
+    With `screening` the basic tests first run on prefixes and may stop
+    early (see SCREEN_*). After an early pass the extra tests still run on
+    the whole sequence; after an early fail they are skipped and listed in
+    the "screening" entry, which also records the outcome.
+    """
+    trimmed, bit_length = trim_to_bits(data, limit_bits)
+    if bit_length == 0:
+        return _empty_report()
+    if screening:
+        if extra_tests:
+            from .sp800_22 import check_tests
+
+            check_tests(extra_tests)
+        return _screen(
+            lambda offset, size: trimmed[offset:offset + size], bit_length, block_size, backend,
+            lambda: run_basic_tests(trimmed, bit_length, block_size, backend, extra_tests, workers),
+            extra_tests, lambda: _extra_results(trimmed, extra_tests, bit_length),
+        )
+
+    workers = _resolve_workers(workers, bit_length)
+    if workers > 1:
+        stats = _sharded_shm(trimmed, bit_length, block_size, backend, workers).stats()
+    else:
+        stats = _kernel(backend)(trimmed, bit_length, block_size)
+    tests, entropy = _basic_tests(bit_length, stats, block_size)
+
+    if extra_tests:
+        tests.extend(_extra_results(trimmed, extra_tests, bit_length))
+
+    return _report(bit_length, stats, tests, entropy)
+
+
+def _extra_results(trimmed: bytes, extra_tests: Sequence[str], bit_length: int) -> List[TestResult]:
+    from .sp800_22 import run_tests
+
+    results = run_tests(trimmed, extra_tests, bit_length)
+    for result in results:
+        result.name = f"sp800_22.{result.name}"
+    return results
+
+
+def _edge_runs(trimmed: bytes, bit_length: int) -> Tuple[int, int, int, int]:
+    """First bit, length of the leading run, last bit, length of the trailing run."""
+    full_bytes = bit_length // 8
+    first_bit = last_bit = -1
+    lead = trail = 0
+    if full_bytes:
+        body = trimmed[:full_bytes]
+        first_bit = body[0] >> 7
+        same = full_bytes - len(body.lstrip(b"\xff" if first_bit else b"\x00"))
+        lead = 8 * same
+        if same < full_bytes and body[same] >> 7 == first_bit:
+            lead += _LEAD_RUN[body[same]]
+        last_bit = body[-1] & 1
+        same = full_bytes - len(body.rstrip(b"\xff" if last_bit else b"\x00"))
+        trail = 8 * same
+        if same < full_bytes and body[full_bytes - 1 - same] & 1 == last_bit:
+            trail += _TRAIL_RUN[body[full_bytes - 1 - same]]
+    extra_bits = bit_length % 8
+    if extra_bits:
+        b = trimmed[full_bytes]
+        seen = full_bytes * 8
+        for shift in range(7, 7 - extra_bits, -1):
+            bit = (b >> shift) & 1
+            if first_bit < 0:
+                first_bit = last_bit = bit
+            if bit == last_bit:
+                if lead == seen:
+                    lead += 1
+                trail += 1
+            else:
+                last_bit = bit
+                trail = 1
+            seen += 1
+    return first_bit, lead, last_bit, trail
+
+
+class BitStatsAccumulator:
+    """Incremental version of run_basic_tests for data that arrives in chunks.
+
+    update() takes the bytes in order, merge() appends the bits seen by
+    another accumulator, finalize() returns the same report run_basic_tests
+    gives for the concatenated input. Whole blocks are handed to the bit
+    statistics kernel as they become available; only the tail that does not
+    yet fill a block (and a byte) is buffered, and run lengths are stitched
+    across the joins, so memory stays bounded by the chunk size.
+    """
+
+    def __init__(self, limit_bits: Optional[int] = None, block_size: int = 128, backend: Optional[str] = None):
+        self.limit_bits = limit_bits
+        self.block_size = block_size
+        self._kernel = _kernel(backend)
+        # data is consumed in units that end on both a byte and a block boundary
+        self._unit_bits = block_size * 8 // math.gcd(block_size, 8)
+        self._pending = bytearray()
+        self._pending_bits = 0
+        self.bit_length = 0
+        self.ones = 0
+        self.runs = 0
+        self.longest_run = 0
+        self.first_bit = -1
+        self.lead_run = 0
+        self.last_bit = -1
+        self.trail_run = 0
+        self.block_counts: List[int] = []
+        self.byte_counts = [0] * 256
+
+    @property
+    def total_bits(self) -> int:
+        return self.bit_length + self._pending_bits
+
+    def update(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        nbits = len(chunk) * 8
+        if self.limit_bits is not None:
+            room = self.limit_bits - self.total_bits
+            if room <= 0:
+                return
+            if nbits > room:
+                chunk, nbits = trim_to_bits(chunk, room)
+        if self._pending_bits % 8:
+            raise ValueError("accumulator already holds a partial byte")
+        self._pending += chunk
+        self._pending_bits += nbits
+        usable = self._pending_bits // self._unit_bits * self._unit_bits
+        if usable:
+            size = usable // 8
+            self._absorb(bytes(self._pending[:size]), usable)
+            del self._pending[:size]
+            self._pending_bits -= usable
+
+    def merge(self, other: "BitStatsAccumulator") -> None:
+        """Append everything `other` has seen after the bits seen so far."""
+        if other.block_size != self.block_size:
+            raise ValueError("cannot merge accumulators with different block sizes")
+        if self._pending_bits:
+            raise ValueError("left side of a merge must end on a block and byte boundary")
+        if self.limit_bits is not None and self.total_bits + other.total_bits > self.limit_bits:
+            raise ValueError("merged input exceeds limit_bits")
+        self._join(
+            other.bit_length, other.ones, other.runs, other.longest_run,
+            other.first_bit, other.lead_run, other.last_bit, other.trail_run,
+        )
+        self.block_counts.extend(other.block_counts)
+        self.byte_counts = [a + b for a, b in zip(self.byte_counts, other.byte_counts)]
+        self._pending = bytearray(other._pending)
+        self._pending_bits = other._pending_bits
+
+    def finalize(self) -> Dict[str, Any]:
+        """Report for the input so far; the accumulator can keep taking data."""
+        acc = self._flushed()
+        if acc.bit_length == 0:
+            return _empty_report()
+        stats = acc.stats()
+        tests, entropy = _basic_tests(acc.bit_length, stats, self.block_size)
+        return _report(acc.bit_length, stats, tests, entropy)
+
+    def state(self) -> Dict[str, Any]:
+        """JSON-ready snapshot; from_state() rebuilds an accumulator that continues from it."""
+        return {
+            "limit_bits": self.limit_bits,
+            "block_size": self.block_size,
+            "pending_hex": bytes(self._pending).hex(),
+            "pending_bits": self._pending_bits,
+            "bit_length": self.bit_length,
+            "ones": self.ones,
+            "runs": self.runs,
+            "longest_run": self.longest_run,
+            "first_bit": self.first_bit,
+            "lead_run": self.lead_run,
+            "last_bit": self.last_bit,
+            "trail_run": self.trail_run,
+            "block_counts": list(self.block_counts),
+            "byte_counts": list(self.byte_counts),
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], backend: Optional[str] = None) -> "BitStatsAccumulator":
+        acc = cls(state["limit_bits"], state["block_size"], backend)
+        acc._pending = bytearray.fromhex(state["pending_hex"])
+        acc._pending_bits = state["pending_bits"]
+        for name in ("bit_length", "ones", "runs", "longest_run", "first_bit", "lead_run", "last_bit", "trail_run"):
+            setattr(acc, name, state[name])
+        acc.block_counts = list(state["block_counts"])
+        acc.byte_counts = list(state["byte_counts"])
+        return acc
+
+    def stats(self) -> BitStats:
+        """BitStats of the absorbed bits (buffered tail excluded)."""
+        return self.ones, self.runs, self.longest_run, self.block_counts, self.byte_counts
+
+    def _flushed(self) -> "BitStatsAccumulator":
+        # copy with the buffered tail absorbed
+        acc = self._copy()
+        if acc._pending_bits:
+            acc._absorb(bytes(acc._pending), acc._pending_bits)
+            acc._pending.clear()
+            acc._pending_bits = 0
+        return acc
+
+    def _copy(self) -> "BitStatsAccumulator":
+        acc = object.__new__(BitStatsAccumulator)
+        acc.__dict__.update(self.__dict__)
+        acc._pending = bytearray(self._pending)
+        acc.block_counts = list(self.block_counts)
+        acc.byte_counts = list(self.byte_counts)
+        return acc
+
+    def _absorb(self, data: bytes, bit_length: int) -> None:
+        ones, runs, longest_run, block_counts, byte_counts = self._kernel(data, bit_length, self.block_size)
+        self._join(bit_length, ones, runs, longest_run, *_edge_runs(data, bit_length))
+        self.block_counts.extend(block_counts)
+        self.byte_counts = [a + b for a, b in zip(self.byte_counts, byte_counts)]
+
+    def _join(self, bit_length: int, ones: int, runs: int, longest_run: int,
+              first_bit: int, lead_run: int, last_bit: int, trail_run: int) -> None:
+        if bit_length == 0:
+            return
+        if self.bit_length == 0:
+            self.first_bit, self.lead_run = first_bit, lead_run
+        else:
+            joined = self.last_bit == first_bit
+            if joined:
+                runs -= 1
+                longest_run = max(longest_run, self.trail_run + lead_run)
+                if self.lead_run == self.bit_length:
+                    self.lead_run += lead_run
+                if trail_run == bit_length:
+                    trail_run += self.trail_run
+        self.last_bit, self.trail_run = last_bit, trail_run
+        self.bit_length += bit_length
+        self.ones += ones
+        self.runs += runs
+        self.longest_run = max(self.longest_run, longest_run)
+
+
+# --- sharded analysis ------------------------------------------------------
+
+def _resolve_workers(workers: Optional[int], bit_length: int) -> int:
+    if bit_length < PARALLEL_THRESHOLD:
+        return 1
+    if workers is None:
+        workers = os.cpu_count() or 1
+    return max(1, min(workers, MAX_WORKERS))
+
+
+def _shard_bounds(bit_length: int, block_size: int, shards: int) -> List[Tuple[int, int]]:
+    """(byte offset, bit length) per shard; every shard but the last ends on a
+    block and byte boundary, so the accumulators merge without rework."""
+    unit = block_size * 8 // math.gcd(block_size, 8)
+    units = -(-bit_length // unit)
+    per_shard = -(-units // shards) * unit
+    return [(start // 8, min(per_shard, bit_length - start)) for start in range(0, bit_length, per_shard)]
+
+
+def _shard_stats(args: Tuple[str, str, int, int, int, str]) -> BitStatsAccumulator:
+    kind, source, offset, bit_length, block_size, backend = args
+    size = (bit_length + 7) // 8
+    if kind == "shm":
+        shm = shared_memory.SharedMemory(name=source)
+        try:
+            data = bytes(shm.buf[offset:offset + size])
+        finally:
+            shm.close()
+    else:
+        with open(source, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            data = m[offset:offset + size]
+    acc = BitStatsAccumulator(bit_length, block_size, backend)
+    acc.update(data)
+    return acc
+
+
+def _run_shards(kind: str, source: str, bit_length: int, block_size: int,
+                backend: Optional[str], workers: int) -> BitStatsAccumulator:
+    backend = resolve_backend(backend) if backend else DEFAULT_BACKEND
+    jobs = [
+        (kind, source, offset, bits, block_size, backend)
+        for offset, bits in _shard_bounds(bit_length, block_size, workers)
+    ]
+    parts = pool_map(_shard_stats, jobs)
+    acc = BitStatsAccumulator(bit_length, block_size, backend)
+    for part in parts:
+        acc.merge(part)
+    return acc._flushed()
+
+
+def _sharded_shm(trimmed: bytes, bit_length: int, block_size: int,
+                 backend: Optional[str], workers: int) -> BitStatsAccumulator:
+    shm = shared_memory.SharedMemory(create=True, size=len(trimmed))
+    try:
+        shm.buf[:len(trimmed)] = trimmed
+        return _run_shards("shm", shm.name, bit_length, block_size, backend, workers)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def analyze_file(
+    path: str,
+    limit_bits: Optional[int] = None,
+    block_size: int = 128,
+    backend: Optional[str] = None,
+    workers: Optional[int] = None,
+    screening: bool = False,
+) -> Dict[str, Any]:
+    """run_basic_tests over the first `limit_bits` bits of a file.
+
+    Small inputs are streamed through one accumulator; large ones are sharded
+    over a process pool, each worker mapping its part of the file. With
+    `screening` only the prefixes the screen needs are read.
+    """
+    bit_length = os.path.getsize(path) * 8
+    if limit_bits is not None:
+        bit_length = min(bit_length, limit_bits)
+    if screening and bit_length:
+        with open(path, "rb") as f:
+
+            def read(offset: int, size: int) -> bytes:
+                f.seek(offset)
+                return f.read(size)
+
+            return _screen(read, bit_length, block_size, backend,
+                           lambda: analyze_file(path, bit_length, block_size, backend, workers))
+    workers = _resolve_workers(workers, bit_length)
+    if workers > 1:
+        return _run_shards("file", path, bit_length, block_size, backend, workers).finalize()
+    acc = BitStatsAccumulator(bit_length, block_size, backend)
+    with open(path, "rb") as f:
+        while acc.total_bits < bit_length:
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
+                break
+            acc.update(chunk)
+    return acc.finalize()
+
+
+# --- screening ---------------------------------------------------------------
+
+def _screen_verdict(report: Dict[str, Any]) -> Optional[str]:
+    p_values = [t["p_value"] for t in report["tests"] if t.get("p_value") is not None]
+    if not p_values:
+        return None
+    if min(p_values) < SCREEN_FAIL_P:
+        return "early_fail"
+    if min(p_values) >= SCREEN_PASS_P:
+        return "early_pass"
+    return None
+
+
+def _screen(
+    read: Callable[[int, int], bytes],
+    bit_length: int,
+    block_size: int,
+    backend: Optional[str],
+    full: Callable[[], Dict[str, Any]],
+    extra_tests: Optional[Sequence[str]] = None,
+    run_extra: Optional[Callable[[], List[TestResult]]] = None,
+) -> Dict[str, Any]:
+    """Basic tests on growing prefixes read through read(offset, size).
+
+    Each prefix only adds its new bytes to one accumulator. `full()` gives
+    the report when no prefix is decisive. On an early pass `run_extra()`
+    adds the `extra_tests` results for the whole sequence; on an early fail
+    they are reported as skipped.
+    """
+    acc = BitStatsAccumulator(bit_length, block_size, backend)
+    stages: List[int] = []
+    stage = SCREEN_FIRST_BITS
+    while stage < bit_length:
+        # stages are whole bytes, so each read continues where the last ended
+        acc.update(read(acc.total_bits // 8, (stage - acc.total_bits) // 8))
+        stages.append(stage)
+        report = acc.finalize()
+        verdict = _screen_verdict(report)
+        if verdict:
+            report["screening"] = {
+                "outcome": verdict,
+                "bits_examined": stage,
+                "total_bits": bit_length,
+                "stages": stages,
+            }
+            if extra_tests and verdict == "early_pass":
+                report["tests"].extend(t.to_dict() for t in run_extra())
+                report["all_passed"] = all(t["passed"] for t in report["tests"] if t["p_value"] is not None)
+                report["screening"]["extra_tests"] = list(extra_tests)
+            elif extra_tests:
+                report["screening"]["skipped_tests"] = list(extra_tests)
+            return report
+        stage *= SCREEN_GROWTH
+    report = full()
+    report["screening"] = {
+        "outcome": "full",
+        "bits_examined": bit_length,
+        "total_bits": bit_length,
+        "stages": stages + [bit_length],
+    }
+    if extra_tests:
+        report["screening"]["extra_tests"] = list(extra_tests)
+    return report
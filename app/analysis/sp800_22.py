@@ -0,0 +1,519 @@
+"""NIST SP 800-22 rev. 1a statistical tests, vectorised with numpy.
+
+Each test takes the sequence as a numpy array of 0/1 values (uint8) and
+returns a TestResult. Tests that produce several p-values (serial,
+cumulative sums, random excursions) report the smallest one as `p_value`
+and list all of them in `details`; the test passes when every p-value is
+at least ALPHA. Sequences too short for a test give a result with a note
+and no p-value, so they do not count against `all_passed`.
+"""
+from __future__ import annotations
+
+import math
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .randomness import TestResult, regularized_gamma_q, trim_to_bits
+
+try:
+    import numpy as np
+except ImportError:  # the battery needs numpy; run_basic_tests does not
+    np = None
+
+ALPHA = 0.01
+SUITE_VERSION = "sp800_22/1"
+
+
+def _phi(x: float) -> float:
+    return 0.5 * math.erfc(-x / math.sqrt(2.0))
+
+
+def _too_short(name: str, n: int, needed: int) -> TestResult:
+    return TestResult(
+        name=name,
+        passed=False,
+        note=f"sequence too short: {n} bits, need at least {needed}",
+        details={"bit_length": n, "min_bits": needed},
+    )
+
+
+def _multi(name: str, p_values: Dict[str, float], statistic: Optional[float] = None,
+           details: Optional[dict] = None) -> TestResult:
+    payload = dict(details or {})
+    payload["p_values"] = p_values
+    p_min = min(p_values.values())
+    return TestResult(name=name, passed=p_min >= ALPHA, p_value=p_min, statistic=statistic, details=payload)
+
+
+def _window_values(bits, m: int, wrap: bool):
+    """Integer value of every m-bit window (MSB first), optionally wrapping."""
+    if wrap and m > 1:
+        bits = np.concatenate((bits, bits[:m - 1]))
+    n = bits.size - m + 1
+    values = np.zeros(n, dtype=np.int64)
+    for k in range(m):
+        values = (values << 1) | bits[k:k + n]
+    return values
+
+
+# -- 2.1 / 2.2 / 2.3: frequency tests and runs --------------------------------
+
+def frequency(bits) -> TestResult:
+    n = bits.size
+    s_obs = abs(2 * int(np.count_nonzero(bits)) - n) / math.sqrt(n)
+    p = math.erfc(s_obs / math.sqrt(2.0))
+    return TestResult("frequency", p >= ALPHA, p, s_obs, {"bit_length": n})
+
+
+def block_frequency(bits, block_size: int = 128) -> TestResult:
+    n = bits.size
+    num_blocks = n // block_size
+    if num_blocks == 0:
+        return _too_short("block_frequency", n, block_size)
+    pi = bits[:num_blocks * block_size].reshape(num_blocks, block_size).mean(axis=1)
+    chi_sq = 4.0 * block_size * float(np.sum((pi - 0.5) ** 2))
+    p = regularized_gamma_q(num_blocks / 2.0, chi_sq / 2.0)
+    return TestResult("block_frequency", p >= ALPHA, p, chi_sq, {"blocks": num_blocks, "block_size": block_size})
+
+
+def runs(bits) -> TestResult:
+    n = bits.size
+    pi = float(np.count_nonzero(bits)) / n
+    # below 16 bits tau exceeds 0.5, so a constant sequence needs its own guard
+    if pi in (0.0, 1.0) or abs(pi - 0.5) >= 2.0 / math.sqrt(n):
+        return TestResult("runs", False, 0.0, pi, {"pi": pi}, note="frequency prerequisite failed")
+    v_obs = int(np.count_nonzero(bits[1:] != bits[:-1])) + 1
+    p = math.erfc(abs(v_obs - 2 * n * pi * (1 - pi)) / (2 * math.sqrt(2 * n) * pi * (1 - pi)))
+    return TestResult("runs", p >= ALPHA, p, v_obs, {"pi": pi, "runs": v_obs})
+
+
+# -- 2.4: longest run of ones in a block ---------------------------------------
+
+_LONGEST_RUN_PARAMS = (
+    # (min n, M, class lower bounds, probabilities)
+    (750_000, 10_000, (10, 11, 12, 13, 14, 15, 16),
+     (0.0882, 0.2092, 0.2483, 0.1933, 0.1208, 0.0675, 0.0727)),
+    (6_272, 128, (4, 5, 6, 7, 8, 9),
+     (0.1174035788, 0.242955959, 0.249363483, 0.17517706, 0.102701071, 0.112398847)),
+    (128, 8, (1, 2, 3, 4), (0.21484375, 0.3671875, 0.23046875, 0.1875)),
+)
+
+
+def _longest_ones_per_row(rows):
+    n_rows, width = rows.shape
+    # separate rows with a zero column so runs never cross them
+    padded = np.zeros((n_rows, width + 1), dtype=np.int8)
+    padded[:, :width] = rows
+    flat = np.concatenate(([0], padded.ravel(), [0]))
+    edges = np.diff(flat)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    longest = np.zeros(n_rows, dtype=np.int64)
+    np.maximum.at(longest, starts // (width + 1), ends - starts)
+    return longest
+
+
+def longest_run(bits) -> TestResult:
+    n = bits.size
+    for min_n, m, bounds, probs in _LONGEST_RUN_PARAMS:
+        if n >= min_n:
+            break
+    else:
+        return _too_short("longest_run", n, 128)
+    num_blocks = n // m
+    longest = _longest_ones_per_row(bits[:num_blocks * m].reshape(num_blocks, m))
+    classes = np.clip(longest, bounds[0], bounds[-1]) - bounds[0]
+    counts = np.bincount(classes, minlength=len(bounds))
+    expected = num_blocks * np.asarray(probs)
+    chi_sq = float(np.sum((counts - expected) ** 2 / expected))
+    p = regularized_gamma_q((len(bounds) - 1) / 2.0, chi_sq / 2.0)
+    return TestResult("longest_run", p >= ALPHA, p, chi_sq,
+                      {"block_size": m, "blocks": num_blocks, "counts": counts.tolist()})
+
+
+# -- 2.5: binary matrix rank ---------------------------------------------------
+
+def _gf2_ranks(rows):
+    """Ranks over GF(2) of a stack of square matrices given as row bitmasks."""
+    rows = rows.copy()
+    count, size = rows.shape
+    rank = np.zeros(count, dtype=np.int64)
+    index = np.arange(size)
+    all_m = np.arange(count)
+    for bit in range(size - 1, -1, -1):
+        has_bit = ((rows >> np.uint64(bit)) & np.uint64(1)).astype(bool)
+        candidates = has_bit & (index[None, :] >= rank[:, None])
+        found = candidates.any(axis=1)
+        if not found.any():
+            continue
+        m_idx = all_m[found]
+        pivot = candidates[found].argmax(axis=1)
+        target = rank[found]
+        pivot_rows = rows[m_idx, pivot]
+        # move the pivot row to position `rank`
+        rows[m_idx, pivot] = rows[m_idx, target]
+        rows[m_idx, target] = pivot_rows
+        # clear the bit from every other row that has it
+        has_bit = ((rows[m_idx] >> np.uint64(bit)) & np.uint64(1)).astype(bool)
+        has_bit[np.arange(m_idx.size), target] = False
+        rows[m_idx] ^= np.where(has_bit, pivot_rows[:, None], np.uint64(0))
+        rank[found] += 1
+    return rank
+
+
+def matrix_rank(bits, size: int = 32) -> TestResult:
+    n = bits.size
+    per_matrix = size * size
+    count = n // per_matrix
+    if count < 38:
+        return _too_short("matrix_rank", n, 38 * per_matrix)
+    block = bits[:count * per_matrix].reshape(count, size, size).astype(np.uint64)
+    weights = np.uint64(1) << np.arange(size - 1, -1, -1, dtype=np.uint64)
+    rows = (block * weights).sum(axis=2, dtype=np.uint64)
+    ranks = _gf2_ranks(rows)
+    full = int(np.count_nonzero(ranks == size))
+    minus_one = int(np.count_nonzero(ranks == size - 1))
+    rest = count - full - minus_one
+    probs = (0.2888, 0.5776, 0.1336)
+    chi_sq = sum((obs - p * count) ** 2 / (p * count) for obs, p in zip((full, minus_one, rest), probs))
+    p_value = math.exp(-chi_sq / 2.0)
+    return TestResult("matrix_rank", p_value >= ALPHA, p_value, chi_sq,
+                      {"matrices": count, "full_rank": full, "rank_minus_one": minus_one, "lower": rest})
+
+
+# -- 2.6: discrete Fourier transform (spectral) --------------------------------
+
+def dft_spectral(bits) -> TestResult:
+    n = bits.size
+    if n < 1000:
+        return _too_short("dft_spectral", n, 1000)
+    x = 2.0 * bits - 1.0
+    modulus = np.abs(np.fft.rfft(x))[: n // 2]
+    threshold = math.sqrt(math.log(1 / 0.05) * n)
+    n0 = 0.95 * n / 2.0
+    n1 = int(np.count_nonzero(modulus < threshold))
+    d = (n1 - n0) / math.sqrt(n * 0.95 * 0.05 / 4.0)
+    p = math.erfc(abs(d) / math.sqrt(2.0))
+    return TestResult("dft_spectral", p >= ALPHA, p, d, {"peaks_below_threshold": n1, "expected": n0})
+
+
+# -- 2.7 / 2.8: template matching ----------------------------------------------
+
+def _template_value(template: str) -> int:
+    if not template or set(template) - {"0", "1"}:
+        raise ValueError("template must be a non-empty string of 0/1")
+    return int(template, 2)
+
+
+def non_overlapping_template(bits, template: str = "000000001", num_blocks: int = 8) -> TestResult:
+    n = bits.size
+    m = len(template)
+    target = _template_value(template)
+    block_len = n // num_blocks
+    if block_len < 2 * m:
+        return _too_short("non_overlapping_template", n, 2 * m * num_blocks)
+    counts = []
+    for j in range(num_blocks):
+        block = bits[j * block_len:(j + 1) * block_len]
+        hits = np.flatnonzero(_window_values(block, m, wrap=False) == target)
+        # matches are counted without overlap: skip m bits after each one
+        count, next_free = 0, 0
+        for pos in hits.tolist():
+            if pos >= next_free:
+                count += 1
+                next_free = pos + m
+        counts.append(count)
+    mu = (block_len - m + 1) / 2 ** m
+    var = block_len * (1 / 2 ** m - (2 * m - 1) / 2 ** (2 * m))
+    chi_sq = sum((w - mu) ** 2 / var for w in counts)
+    p = regularized_gamma_q(num_blocks / 2.0, chi_sq / 2.0)
+    return TestResult("non_overlapping_template", p >= ALPHA, p, chi_sq,
+                      {"template": template, "block_size": block_len, "counts": counts})
+
+
+_OVERLAPPING_PI = (0.364091, 0.185659, 0.139381, 0.100571, 0.070432, 0.139865)
+
+
+def overlapping_template(bits, template: str = "111111111", block_size: int = 1032) -> TestResult:
+    n = bits.size
+    m = len(template)
+    target = _template_value(template)
+    num_blocks = n // block_size
+    # the tabulated probabilities need every class expected at least 5 times
+    min_blocks = math.ceil(5 / min(_OVERLAPPING_PI))
+    if num_blocks < min_blocks:
+        return _too_short("overlapping_template", n, min_blocks * block_size)
+    blocks = bits[:num_blocks * block_size].reshape(num_blocks, block_size)
+    values = np.zeros((num_blocks, block_size - m + 1), dtype=np.int64)
+    for k in range(m):
+        values = (values << 1) | blocks[:, k:k + block_size - m + 1]
+    hits = np.count_nonzero(values == target, axis=1)
+    counts = np.bincount(np.minimum(hits, 5), minlength=6)
+    expected = num_blocks * np.asarray(_OVERLAPPING_PI)
+    chi_sq = float(np.sum((counts - expected) ** 2 / expected))
+    p = regularized_gamma_q(5 / 2.0, chi_sq / 2.0)
+    return TestResult("overlapping_template", p >= ALPHA, p, chi_sq,
+                      {"template": template, "blocks": num_blocks, "counts": counts.tolist()})
+
+
+# -- 2.9: Maurer's universal statistical test ----------------------------------
+
+_UNIVERSAL_MIN_N = (
+    (16, 1_059_061_760), (15, 496_435_200), (14, 231_669_760), (13, 107_560_960),
+    (12, 49_643_520), (11, 22_753_280), (10, 10_342_400), (9, 4_654_080),
+    (8, 2_068_480), (7, 904_960), (6, 387_840),
+)
+_UNIVERSAL_EXPECTED = {
+    6: (5.2177052, 2.954), 7: (6.1962507, 3.125), 8: (7.1836656, 3.238),
+    9: (8.1764248, 3.311), 10: (9.1723243, 3.356), 11: (10.170032, 3.384),
+    12: (11.168765, 3.401), 13: (12.168070, 3.410), 14: (13.167693, 3.416),
+    15: (14.167488, 3.419), 16: (15.167379, 3.421),
+}
+
+
+def universal(bits) -> TestResult:
+    n = bits.size
+    for L, min_n in _UNIVERSAL_MIN_N:
+        if n >= min_n:
+            break
+    else:
+        return _too_short("universal", n, _UNIVERSAL_MIN_N[-1][1])
+    Q = 10 * 2 ** L
+    total = n // L
+    K = total - Q
+    blocks = bits[:total * L].reshape(total, L)
+    values = np.zeros(total, dtype=np.int64)
+    for k in range(L):
+        values = (values << 1) | blocks[:, k]
+    # 1-based position of the previous block with the same value (0 if none)
+    order = np.argsort(values, kind="stable")
+    same = values[order[1:]] == values[order[:-1]]
+    previous = np.zeros(total, dtype=np.int64)
+    previous[order[1:]] = np.where(same, order[:-1] + 1, 0)
+    positions = np.arange(Q, total) + 1
+    fn = float(np.sum(np.log2(positions - previous[Q:]))) / K
+    expected, variance = _UNIVERSAL_EXPECTED[L]
+    c = 0.7 - 0.8 / L + (4 + 32 / L) * K ** (-3 / L) / 15
+    sigma = c * math.sqrt(variance / K)
+    p = math.erfc(abs(fn - expected) / (math.sqrt(2.0) * sigma))
+    return TestResult("universal", p >= ALPHA, p, fn, {"L": L, "Q": Q, "K": K, "expected": expected})
+
+
+# -- 2.10: linear complexity ---------------------------------------------------
+
+def _linear_complexities(blocks):
+    """Berlekamp-Massey over GF(2), run on all rows of `blocks` at once."""
+    count, M = blocks.shape
+    s = blocks.astype(np.int64)
+    C = np.zeros((count, M + 1), dtype=np.uint8)
+    B = np.zeros((count, M + 1), dtype=np.uint8)
+    C[:, 0] = 1
+    B[:, 0] = 1
+    L = np.zeros(count, dtype=np.int64)
+    last = np.full(count, -1, dtype=np.int64)
+    cols = np.arange(M + 1)
+    for n in range(M):
+        # discrepancy d = s_n + sum_{i=1..n} C_i s_{n-i}  (C_i = 0 beyond L)
+        d = s[:, n].copy()
+        if n:
+            d += (C[:, 1:n + 1] * s[:, n - 1::-1]).sum(axis=1)
+        hit = np.flatnonzero(d & 1)
+        if hit.size == 0:
+            continue
+        # C ^= B shifted right by (n - last)
+        src = cols[None, :] - (n - last[hit])[:, None]
+        shifted = np.where(src >= 0, B[hit[:, None], np.maximum(src, 0)], 0).astype(np.uint8)
+        old_c = C[hit]
+        C[hit] = old_c ^ shifted
+        grow = 2 * L[hit] <= n
+        upd = hit[grow]
+        L[upd] = n + 1 - L[upd]
+        last[upd] = n
+        B[upd] = old_c[grow]
+    return L
+
+
+_LINEAR_PI = (0.010417, 0.03125, 0.125, 0.5, 0.25, 0.0625, 0.020833)
+
+
+def linear_complexity(bits, block_size: int = 500) -> TestResult:
+    n = bits.size
+    count = n // block_size
+    if count < 200:
+        return _too_short("linear_complexity", n, 200 * block_size)
+    M = block_size
+    L = _linear_complexities(bits[:count * M].reshape(count, M))
+    mu = M / 2.0 + (9.0 + (-1) ** (M + 1)) / 36.0 - (M / 3.0 + 2.0 / 9.0) / 2 ** M
+    T = (-1) ** M * (L - mu) + 2.0 / 9.0
+    edges = np.array([-2.5, -1.5, -0.5, 0.5, 1.5, 2.5])
+    classes = np.searchsorted(edges, T, side="left")
+    counts = np.bincount(classes, minlength=7)
+    expected = count * np.asarray(_LINEAR_PI)
+    chi_sq = float(np.sum((counts - expected) ** 2 / expected))
+    p = regularized_gamma_q(3.0, chi_sq / 2.0)
+    return TestResult("linear_complexity", p >= ALPHA, p, chi_sq,
+                      {"block_size": M, "blocks": count, "counts": counts.tolist()})
+
+
+# -- 2.11 / 2.12: serial and approximate entropy -------------------------------
+
+def _pattern_counts(bits, m: int):
+    if m == 0:
+        return np.array([bits.size])
+    return np.bincount(_window_values(bits, m, wrap=True), minlength=2 ** m)
+
+
+def _psi_sq(bits, m: int) -> float:
+    if m <= 0:
+        return 0.0
+    n = bits.size
+    counts = _pattern_counts(bits, m).astype(np.float64)
+    return float(np.sum(counts ** 2)) * 2 ** m / n - n
+
+
+def serial(bits, m: Optional[int] = None) -> TestResult:
+    n = bits.size
+    if m is None:
+        m = max(2, min(16, int(math.log2(n)) - 3)) if n >= 16 else 2
+    if n < 2 ** (m + 2):
+        return _too_short("serial", n, 2 ** (m + 2))
+    psi_m, psi_m1, psi_m2 = _psi_sq(bits, m), _psi_sq(bits, m - 1), _psi_sq(bits, m - 2)
+    del1 = psi_m - psi_m1
+    del2 = psi_m - 2 * psi_m1 + psi_m2
+    p1 = regularized_gamma_q(2 ** (m - 2), del1 / 2.0)
+    p2 = regularized_gamma_q(2 ** (m - 3), del2 / 2.0)
+    return _multi("serial", {"p1": p1, "p2": p2}, del1, {"m": m, "del1": del1, "del2": del2})
+
+
+def _phi_m(bits, m: int) -> float:
+    counts = _pattern_counts(bits, m).astype(np.float64)
+    probs = counts[counts > 0] / bits.size
+    return float(np.sum(probs * np.log(probs)))
+
+
+def approximate_entropy(bits, m: Optional[int] = None) -> TestResult:
+    n = bits.size
+    if m is None:
+        m = max(2, min(10, int(math.log2(n)) - 6)) if n >= 16 else 2
+    if n < 2 ** (m + 5):
+        return _too_short("approximate_entropy", n, 2 ** (m + 5))
+    ap_en = _phi_m(bits, m) - _phi_m(bits, m + 1)
+    chi_sq = 2.0 * n * (math.log(2) - ap_en)
+    p = regularized_gamma_q(2 ** (m - 1), chi_sq / 2.0)
+    return TestResult("approximate_entropy", p >= ALPHA, p, chi_sq, {"m": m, "ap_en": ap_en})
+
+
+# -- 2.13: cumulative sums -----------------------------------------------------
+
+def _cusum_p(n: int, z: int) -> float:
+    sqrt_n = math.sqrt(n)
+    total1 = 0.0
+    for k in range(int((-n / z + 1) / 4), int((n / z - 1) / 4) + 1):
+        total1 += _phi((4 * k + 1) * z / sqrt_n) - _phi((4 * k - 1) * z / sqrt_n)
+    total2 = 0.0
+    for k in range(int((-n / z - 3) / 4), int((n / z - 1) / 4) + 1):
+        total2 += _phi((4 * k + 3) * z / sqrt_n) - _phi((4 * k + 1) * z / sqrt_n)
+    return 1.0 - total1 + total2
+
+
+def cumulative_sums(bits) -> TestResult:
+    n = bits.size
+    if n < 100:
+        return _too_short("cumulative_sums", n, 100)
+    x = 2 * bits.astype(np.int64) - 1
+    z_fwd = int(np.abs(np.cumsum(x)).max())
+    z_bwd = int(np.abs(np.cumsum(x[::-1])).max())
+    p_values = {"forward": _cusum_p(n, z_fwd), "backward": _cusum_p(n, z_bwd)}
+    return _multi("cumulative_sums", p_values, z_fwd, {"z_forward": z_fwd, "z_backward": z_bwd})
+
+
+# -- 2.14 / 2.15: random excursions --------------------------------------------
+
+MIN_EXCURSION_CYCLES = 500
+
+
+def _excursion_walk(bits):
+    walk = np.cumsum(2 * bits.astype(np.int64) - 1)
+    # the walk is closed with a final 0; cycle ids count the zeros passed
+    padded = np.concatenate((walk, [0]))
+    cycle = np.cumsum(np.concatenate(([0], (padded[:-1] == 0).astype(np.int64))))
+    cycles = int(np.count_nonzero(walk == 0)) + 1
+    return padded, cycle, cycles
+
+
+def random_excursions(bits) -> TestResult:
+    n = bits.size
+    walk, cycle, J = _excursion_walk(bits)
+    if J < MIN_EXCURSION_CYCLES:
+        return TestResult("random_excursions", False, note=f"only {J} cycles, need {MIN_EXCURSION_CYCLES}",
+                          details={"cycles": J, "bit_length": n})
+    p_values = {}
+    for x in (-4, -3, -2, -1, 1, 2, 3, 4):
+        visits = np.bincount(cycle[walk == x], minlength=J)[:J]
+        nu = np.bincount(np.minimum(visits, 5), minlength=6)
+        ax = abs(x)
+        q = 1 - 1 / (2 * ax)
+        pi = [q] + [q ** (k - 1) / (4 * ax * ax) for k in range(1, 5)] + [q ** 4 / (2 * ax)]
+        chi_sq = sum((nu[k] - J * pi[k]) ** 2 / (J * pi[k]) for k in range(6))
+        p_values[str(x)] = regularized_gamma_q(2.5, float(chi_sq) / 2.0)
+    return _multi("random_excursions", p_values, None, {"cycles": J})
+
+
+def random_excursions_variant(bits) -> TestResult:
+    n = bits.size
+    walk, _, J = _excursion_walk(bits)
+    if J < MIN_EXCURSION_CYCLES:
+        return TestResult("random_excursions_variant", False, note=f"only {J} cycles, need {MIN_EXCURSION_CYCLES}",
+                          details={"cycles": J, "bit_length": n})
+    states = np.bincount(walk[(walk >= -9) & (walk <= 9)] + 9, minlength=19)
+    p_values = {}
+    for x in range(-9, 10):
+        if x == 0:
+            continue
+        xi = int(states[x + 9])
+        p_values[str(x)] = math.erfc(abs(xi - J) / math.sqrt(2.0 * J * (4.0 * abs(x) - 2.0)))
+    return _multi("random_excursions_variant", p_values, None, {"cycles": J})
+
+
+TESTS: Dict[str, Callable[..., TestResult]] = {
+    "frequency": frequency,
+    "block_frequency": block_frequency,
+    "runs": runs,
+    "longest_run": longest_run,
+    "matrix_rank": matrix_rank,
+    "dft_spectral": dft_spectral,
+    "non_overlapping_template": non_overlapping_template,
+    "overlapping_template": overlapping_template,
+    "universal": universal,
+    "linear_complexity": linear_complexity,
+    "serial": serial,
+    "approximate_entropy": approximate_entropy,
+    "cumulative_sums": cumulative_sums,
+    "random_excursions": random_excursions,
+    "random_excursions_variant": random_excursions_variant,
+}
+
+
+def to_bits(data: bytes, limit_bits: Optional[int] = None):
+    trimmed, bit_length = trim_to_bits(data, limit_bits)
+    return np.unpackbits(np.frombuffer(trimmed, dtype=np.uint8))[:bit_length]
+
+
+def check_tests(names: Optional[Sequence[str]] = None) -> List[str]:
+    """The tests run_tests would run; ImportError/ValueError as it would raise."""
+    if np is None:
+        raise ImportError("numpy is required for the SP 800-22 tests")
+    selected = list(TESTS) if names is None else list(names)
+    unknown = [name for name in selected if name not in TESTS]
+    if unknown:
+        raise ValueError(f"Unknown test(s): {', '.join(unknown)}")
+    return selected
+
+
+def run_tests(data: bytes, names: Optional[Sequence[str]] = None,
+              limit_bits: Optional[int] = None) -> List[TestResult]:
+    """Run the named tests (all of them when `names` is None)."""
+    selected = check_tests(names)
+    bits = to_bits(data, limit_bits)
+    if bits.size == 0:
+        return [TestResult(name, False, note="empty sequence") for name in selected]
+    return [TESTS[name](bits) for name in selected]
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import bisect
+import hashlib
+import hmac
+import os
+from typing import Dict, Iterator, Optional, Union
+
+from .pool import pool_map
+
+# HKDF-Expand style stream over HMAC-SHA3-256 (as in utils.hkdf_sha3):
+#   T(0) = b"",  T(c) = HMAC(PRK, T(c-1) || c as 4 big-endian bytes)
+# Block i of the output (0-based) is T(i + 1). Blocks are chained, so to
+# start at block i the extractor needs T(i); it keeps those values every
+# CHECKPOINT_INTERVAL blocks while generating, and replays from the nearest
+# checkpoint on a seek.
+
+BLOCK_SIZE = 32
+CHECKPOINT_INTERVAL = 1024
+MAX_BLOCKS = 0xFFFFFFFE
+OUTPUT_CHUNK = 1 << 16
+
+# Extractor modes, recorded in the manifest as "extractor_mode"; rounds
+# without the field used HKDF. In counter mode block i is
+#   SHA3-256(CTR_DOMAIN || PRK || i as 8 big-endian bytes)
+# so blocks are independent and can be produced out of order or in parallel.
+EXTRACTOR_HKDF = "hkdf_sha3"
+EXTRACTOR_CTR = "sha3_ctr"
+EXTRACTOR_MODES = (EXTRACTOR_HKDF, EXTRACTOR_CTR)
+CTR_DOMAIN = b"TSRNG/extract/ctr/v1|"
+CTR_MAX_BLOCKS = 1 << 64
+
+# Counter-mode outputs of at least PARALLEL_THRESHOLD blocks are split into
+# spans of PARALLEL_SPAN blocks and hashed on a process pool.
+PARALLEL_THRESHOLD = 1 << 15
+PARALLEL_SPAN = 1 << 13
+
+
+class HKDFExtractor:
+    def __init__(
+        self,
+        prk: bytes,
+        checkpoints: Optional[Dict[int, bytes]] = None,
+        checkpoint_interval: int = CHECKPOINT_INTERVAL,
+    ):
+        self.prk = prk
+        self.checkpoint_interval = checkpoint_interval
+        # block index -> T(index), i.e. the chaining value block `index` starts from
+        self.checkpoints: Dict[int, bytes] = {0: b""}
+        if checkpoints:
+            self.checkpoints.update(checkpoints)
+        self._hmac = hmac.new(prk, digestmod=hashlib.sha3_256)
+
+    @classmethod
+    def from_ikm(cls, ikm: bytes, salt: bytes, **kwargs) -> "HKDFExtractor":
+        return cls(hmac.new(salt, ikm, hashlib.sha3_256).digest(), **kwargs)
+
+    def _nearest_checkpoint(self, block: int) -> int:
+        keys = sorted(self.checkpoints)
+        return keys[bisect.bisect_right(keys, block) - 1]
+
+    def blocks(self, start: int = 0, stop: Optional[int] = None) -> Iterator[bytes]:
+        """Yield output blocks start, start+1, ... (up to stop, exclusive)."""
+        if start < 0:
+            raise ValueError("start must be non-negative")
+        unbounded = stop is None
+        if unbounded:
+            stop = MAX_BLOCKS
+        elif stop > MAX_BLOCKS:
+            raise ValueError("hkdf_sha3 length exceeds counter capacity")
+        base = self._hmac
+        interval = self.checkpoint_interval
+        checkpoints = self.checkpoints
+        i = self._nearest_checkpoint(start)
+        t = checkpoints[i]
+        while i < stop:
+            if i % interval == 0 and i not in checkpoints:
+                checkpoints[i] = t
+            h = base.copy()
+            h.update(t + (i + 1).to_bytes(4, "big"))
+            t = h.digest()
+            if i >= start:
+                yield t
+            i += 1
+        if unbounded:
+            raise ValueError("hkdf_sha3 length exceeds counter capacity")
+
+    def iter_bytes(self, length: int, offset: int = 0, chunk_size: int = OUTPUT_CHUNK) -> Iterator[bytes]:
+        """Output bytes [offset, offset + length) in chunks of about chunk_size."""
+        if length <= 0:
+            return
+        end = offset + length
+        first = offset // BLOCK_SIZE
+        last = (end + BLOCK_SIZE - 1) // BLOCK_SIZE
+        if last > MAX_BLOCKS:
+            raise ValueError("hkdf_sha3 length exceeds counter capacity")
+        skip = offset - first * BLOCK_SIZE
+        per_chunk = max(1, chunk_size // BLOCK_SIZE)
+        buf: list[bytes] = []
+        pos = first * BLOCK_SIZE
+        for blk in self.blocks(first, last):
+            buf.append(blk)
+            if len(buf) >= per_chunk:
+                chunk = b"".join(buf)
+                buf.clear()
+                yield chunk[skip:min(len(chunk), end - pos)]
+                pos += len(chunk)
+                skip = 0
+        if buf:
+            chunk = b"".join(buf)
+            yield chunk[skip:end - pos]
+
+    def read(self, offset: int, length: int) -> bytes:
+        return b"".join(self.iter_bytes(length, offset))
+
+    def expand(self, length: int, workers: Optional[int] = None) -> bytes:
+        # chained blocks cannot be split across workers
+        return self.read(0, length)
+
+    def chain_value(self, block: int) -> bytes:
+        """T(block): the chaining value output block `block` starts from."""
+        if block == 0:
+            return b""
+        return next(self.blocks(block - 1, block))
+
+    def state(self, length: int) -> Dict[str, object]:
+        # checkpoint at the block the output stopped in, so extending replays nothing
+        block = length // BLOCK_SIZE
+        return {
+            "mode": EXTRACTOR_HKDF,
+            "prk_hex": self.prk.hex(),
+            "checkpoint_block": block,
+            "checkpoint_hex": self.chain_value(block).hex(),
+        }
+
+
+def _ctr_span(args: tuple[bytes, int, int]) -> bytes:
+    prk, start, stop = args
+    base = hashlib.sha3_256(CTR_DOMAIN + prk)
+    out = []
+    for i in range(start, stop):
+        h = base.copy()
+        h.update(i.to_bytes(8, "big"))
+        out.append(h.digest())
+    return b"".join(out)
+
+
+class CounterExtractor:
+    def __init__(self, prk: bytes):
+        self.prk = prk
+
+    @classmethod
+    def from_ikm(cls, ikm: bytes, salt: bytes) -> "CounterExtractor":
+        return cls(hmac.new(salt, ikm, hashlib.sha3_256).digest())
+
+    def blocks(self, start: int = 0, stop: Optional[int] = None) -> Iterator[bytes]:
+        if start < 0:
+            raise ValueError("start must be non-negative")
+        if stop is None or stop > CTR_MAX_BLOCKS:
+            stop = CTR_MAX_BLOCKS
+        base = hashlib.sha3_256(CTR_DOMAIN + self.prk)
+        for i in range(start, stop):
+            h = base.copy()
+            h.update(i.to_bytes(8, "big"))
+            yield h.digest()
+
+    def iter_bytes(self, length: int, offset: int = 0, chunk_size: int = OUTPUT_CHUNK) -> Iterator[bytes]:
+        if length <= 0:
+            return
+        end = offset + length
+        per_chunk = max(1, chunk_size // BLOCK_SIZE)
+        first = offset // BLOCK_SIZE
+        last = (end + BLOCK_SIZE - 1) // BLOCK_SIZE
+        for a in range(first, last, per_chunk):
+            b = min(last, a + per_chunk)
+            chunk = _ctr_span((self.prk, a, b))
+            lo = max(offset, a * BLOCK_SIZE) - a * BLOCK_SIZE
+            hi = min(end, b * BLOCK_SIZE) - a * BLOCK_SIZE
+            yield chunk[lo:hi]
+
+    def read(self, offset: int, length: int) -> bytes:
+        return b"".join(self.iter_bytes(length, offset))
+
+    @staticmethod
+    def uses_pool(length: int, workers: Optional[int] = None) -> bool:
+        if workers is None:
+            workers = os.cpu_count() or 1
+        return (length + BLOCK_SIZE - 1) // BLOCK_SIZE >= PARALLEL_THRESHOLD and workers > 1
+
+    def expand(self, length: int, workers: Optional[int] = None) -> bytes:
+        """Output bytes [0, length), hashed on a process pool when large."""
+        n_blocks = (length + BLOCK_SIZE - 1) // BLOCK_SIZE
+        if not self.uses_pool(length, workers):
+            return self.read(0, length)
+        buf = bytearray(n_blocks * BLOCK_SIZE)
+        spans = [(self.prk, a, min(n_blocks, a + PARALLEL_SPAN)) for a in range(0, n_blocks, PARALLEL_SPAN)]
+        for (_, a, b), data in zip(spans, pool_map(_ctr_span, spans)):
+            buf[a * BLOCK_SIZE:b * BLOCK_SIZE] = data
+        del buf[length:]
+        return bytes(buf)
+
+    def state(self, length: int) -> Dict[str, object]:
+        return {"mode": EXTRACTOR_CTR, "prk_hex": self.prk.hex()}
+
+
+Extractor = Union[HKDFExtractor, CounterExtractor]
+
+
+def output_chunks(extractor: Extractor, length: int) -> Iterator[bytes]:
+    """Output bytes [0, length) in chunks of about OUTPUT_CHUNK.
+
+    Counter-mode outputs large enough for the process pool come as one
+    buffer from expand(); everything else is generated chunk by chunk.
+    """
+    if isinstance(extractor, CounterExtractor) and extractor.uses_pool(length):
+        yield extractor.expand(length)
+    else:
+        yield from extractor.iter_bytes(length)
+
+
+def make_extractor(mode: str, ikm: bytes, salt: bytes) -> Extractor:
+    if mode == EXTRACTOR_HKDF:
+        return HKDFExtractor.from_ikm(ikm, salt)
+    if mode == EXTRACTOR_CTR:
+        return CounterExtractor.from_ikm(ikm, salt)
+    raise ValueError(f"Unsupported extractor mode: {mode}")
+
+
+def extractor_from_state(state: Dict[str, object]) -> Extractor:
+    """Rebuild an extractor from state(); no leaves or HMAC extract needed."""
+    prk = bytes.fromhex(str(state["prk_hex"]))
+    mode = state.get("mode", EXTRACTOR_HKDF)
+    if mode == EXTRACTOR_CTR:
+        return CounterExtractor(prk)
+    if mode == EXTRACTOR_HKDF:
+        checkpoints = {}
+        if "checkpoint_block" in state:
+            checkpoints[int(state["checkpoint_block"])] = bytes.fromhex(str(state["checkpoint_hex"]))
+        return HKDFExtractor(prk, checkpoints=checkpoints)
+    raise ValueError(f"Unsupported extractor mode: {mode}")
@@ -1,19 +1,93 @@
 from __future__ import annotations
 
 import hashlib
-from typing import List
+import sys
+from array import array
+from itertools import chain
+from typing import Iterator, List
 
+# Sampler versions. Version 1 is rejection sampling against a `seen` set;
+# version 2 is a partial Fisher-Yates shuffle that draws exactly one bounded
+# number per output; version 3 takes the first `count` outputs of a keyed
+# pseudorandom permutation, so the k-th value is computable on its own.
+# Draws record the version they used so old ones can be re-derived.
+#
+# Fisher-Yates is the default: it costs one hash per four outputs, while the
+# permutation hashes FEISTEL_ROUNDS times per output (plus cycle-walking),
+# about 18x slower on a full draw. choose_sampler() picks the permutation
+# only when random access is needed.
+SAMPLER_REJECTION = 1
+SAMPLER_FISHER_YATES = 2
+SAMPLER_PRP = 3
+DEFAULT_SAMPLER = SAMPLER_FISHER_YATES
+SAMPLER_VERSIONS = (SAMPLER_REJECTION, SAMPLER_FISHER_YATES, SAMPLER_PRP)
 
-def prng_blocks(domain: bytes, S: bytes, root: bytes):
+FEISTEL_ROUNDS = 8
+
+# Fisher-Yates keeps its virtual array in a dict while count is small
+# relative to the range, and in a flat array once at least 1/DENSE_RATIO of
+# the range is drawn. The flat array is capped at DENSE_MAX_RANGE slots
+# (64 MiB of 32-bit slots) so a request cannot allocate gigabytes; larger
+# ranges stay in the dict. Both branches produce the same sequence.
+DENSE_RATIO = 8
+DENSE_MAX_RANGE = 1 << 24
+
+
+def choose_sampler(count: int, range_size: int, offset: int = 0, limit: int | None = None) -> int:
+    """Sampler for a draw when the caller does not pin a version.
+
+    The permutation is used for pages that do not start at the beginning of
+    the draw or stop short of its end (its k-th value needs no prefix), and
+    for draws too large for Fisher-Yates state: more than DENSE_MAX_RANGE
+    outputs from a range too big for the flat array. Everything else uses
+    DEFAULT_SAMPLER.
+    """
+    paged = offset > 0 or (limit is not None and offset + limit < count)
+    huge = count > DENSE_MAX_RANGE and range_size > DENSE_MAX_RANGE
+    return SAMPLER_PRP if paged or huge else DEFAULT_SAMPLER
+
+
+if array("Q").itemsize != 8:
+    raise ImportError("array('Q') must hold 64-bit words")
+# digests are split into big-endian words
+_SWAP_WORDS = sys.byteorder == "little"
+
+
+# prng_blocks hashes counters in batches: the first batch is small so short
+# draws stay cheap, later ones double up to PRNG_MAX_BATCH hashes.
+PRNG_FIRST_BATCH = 8
+PRNG_MAX_BATCH = 1024
+
+
+def prng_word_batches(domain: bytes, S: bytes, root: bytes) -> Iterator[array]:
+    """Counter-mode SHA3-256 stream as arrays of 64-bit words.
+
+    Block `c` is sha3_256(domain + S + root + c as 8 big-endian bytes), split
+    into four big-endian words. The prefix is absorbed once and the state is
+    copied per counter.
+    """
+    base = hashlib.sha3_256(domain + S + root)
     counter = 0
+    batch = PRNG_FIRST_BATCH
     while True:
-        blk = hashlib.sha3_256(domain + S + root + counter.to_bytes(8, "big")).digest()
-        for i in range(0, 32, 8):
-            yield int.from_bytes(blk[i:i+8], "big")
-        counter += 1
+        digests = []
+        for c in range(counter, counter + batch):
+            h = base.copy()
+            h.update(c.to_bytes(8, "big"))
+            digests.append(h.digest())
+        words = array("Q", b"".join(digests))
+        if _SWAP_WORDS:
+            words.byteswap()
+        yield words
+        counter += batch
+        batch = min(batch * 2, PRNG_MAX_BATCH)
 
 
-def _uniform_numbers(count: int, range_size: int, domain: bytes, S: bytes, root: bytes) -> List[int]:
+def prng_blocks(domain: bytes, S: bytes, root: bytes) -> Iterator[int]:
+    return chain.from_iterable(prng_word_batches(domain, S, root))
+
+
+def _check_args(count: int, range_size: int) -> None:
     if range_size <= 0:
         raise ValueError("range_size must be positive")
     if count < 0:
@@ -21,33 +95,220 @@ def _uniform_numbers(count: int, range_size: int, domain: bytes, S: bytes, root:
     if count > range_size:
         raise ValueError("count cannot exceed range size")
 
+
+def _iter_rejection(count: int, range_size: int, domain: bytes, S: bytes, root: bytes) -> Iterator[int]:
+    _check_args(count, range_size)
+    if count == 0:
+        return
     seen = set()
-    out: List[int] = []
+    emitted = 0
     modulus = 1 << 64
     if range_size >= modulus:
         threshold = None
     else:
         threshold = (modulus // range_size) * range_size
 
-    for rnd in prng_blocks(domain, S, root):
-        if threshold is not None and rnd >= threshold:
-            continue
-        value = rnd % range_size
-        if value not in seen:
-            seen.add(value)
-            out.append(value)
-            if len(out) >= count:
-                break
-    return out
+    for words in prng_word_batches(domain, S, root):
+        for rnd in words:
+            if threshold is not None and rnd >= threshold:
+                continue
+            value = rnd % range_size
+            if value not in seen:
+                seen.add(value)
+                yield value
+                emitted += 1
+                if emitted >= count:
+                    return
+
+
+def _uniform_numbers(count: int, range_size: int, domain: bytes, S: bytes, root: bytes) -> List[int]:
+    return list(_iter_rejection(count, range_size, domain, S, root))
+
+
+def _uniform_below(m: int, words: Iterator[int]) -> int:
+    # unbiased value in [0, m) from 64-bit words, with rejection
+    if m <= 1 << 64:
+        threshold = ((1 << 64) // m) * m
+        while True:
+            w = next(words)
+            if w < threshold:
+                return w % m
+    n_words = (m.bit_length() + 63) // 64
+    limit = 1 << (64 * n_words)
+    threshold = (limit // m) * m
+    while True:
+        w = 0
+        for _ in range(n_words):
+            w = (w << 64) | next(words)
+        if w < threshold:
+            return w % m
+
+
+def _iter_fisher_yates(count: int, range_size: int, domain: bytes, S: bytes, root: bytes) -> Iterator[int]:
+    _check_args(count, range_size)
+    if count == 0:
+        return
+    words = prng_blocks(domain, S, root)
+
+    if count * DENSE_RATIO >= range_size and range_size <= DENSE_MAX_RANGE:
+        typecode = "I" if array("I").itemsize >= 4 else "L"
+        pool = array(typecode, range(range_size))
+        for i in range(count):
+            j = i + _uniform_below(range_size - i, words)
+            pool[i], pool[j] = pool[j], pool[i]
+            yield pool[i]
+        return
+
+    # sparse: only displaced slots are stored; slot i is final after step i
+    displaced: dict[int, int] = {}
+    for i in range(count):
+        j = i + _uniform_below(range_size - i, words)
+        yield displaced.get(j, j)
+        if j != i:
+            displaced[j] = displaced.get(i, i)
+        displaced.pop(i, None)
 
 
-def unique_indices(count: int, universe: int, domain: bytes, S: bytes, root: bytes) -> list[int]:
-    return _uniform_numbers(count, universe, domain, S, root)
+def _fisher_yates_numbers(count: int, range_size: int, domain: bytes, S: bytes, root: bytes) -> List[int]:
+    return list(_iter_fisher_yates(count, range_size, domain, S, root))
 
 
-def unique_range(count: int, start: int, end: int, domain: bytes, S: bytes, root: bytes) -> list[int]:
+class FeistelPermutation:
+    """Keyed permutation of [0, n): a balanced Feistel network over the
+    smallest even bit width covering n, with cycle-walking back into range.
+    """
+
+    def __init__(self, key: bytes, n: int, rounds: int = FEISTEL_ROUNDS):
+        if n <= 0:
+            raise ValueError("range_size must be positive")
+        self.n = n
+        self.rounds = rounds
+        self.half_bits = max(1, ((n - 1).bit_length() + 1) // 2)
+        self._mask = (1 << self.half_bits) - 1
+        self._half_bytes = (self.half_bits + 7) // 8
+        base = hashlib.sha3_256(b"TSRNG/prp|" + key + n.to_bytes((n.bit_length() + 7) // 8 or 1, "big"))
+        self._round_states = []
+        for i in range(rounds):
+            h = base.copy()
+            h.update(bytes((i,)))
+            self._round_states.append(h)
+
+    def _round(self, i: int, r: int) -> int:
+        h = self._round_states[i].copy()
+        h.update(r.to_bytes(self._half_bytes, "big"))
+        return int.from_bytes(h.digest(), "big") & self._mask
+
+    def _encrypt(self, x: int) -> int:
+        left, right = x >> self.half_bits, x & self._mask
+        for i in range(self.rounds):
+            left, right = right, left ^ self._round(i, right)
+        return (left << self.half_bits) | right
+
+    def _decrypt(self, y: int) -> int:
+        left, right = y >> self.half_bits, y & self._mask
+        for i in reversed(range(self.rounds)):
+            left, right = right ^ self._round(i, left), left
+        return (left << self.half_bits) | right
+
+    def __call__(self, index: int) -> int:
+        if not 0 <= index < self.n:
+            raise IndexError("index out of range")
+        x = self._encrypt(index)
+        while x >= self.n:
+            x = self._encrypt(x)
+        return x
+
+    def inverse(self, value: int) -> int:
+        if not 0 <= value < self.n:
+            raise IndexError("value out of range")
+        x = self._decrypt(value)
+        while x >= self.n:
+            x = self._decrypt(x)
+        return x
+
+
+def prp_key(domain: bytes, S: bytes, root: bytes) -> bytes:
+    return hashlib.sha3_256(domain + S + root).digest()
+
+
+def _prp_numbers(count: int, range_size: int, domain: bytes, S: bytes, root: bytes, offset: int = 0) -> List[int]:
+    _check_args(count, range_size)
+    perm = FeistelPermutation(prp_key(domain, S, root), range_size)
+    return [perm(k) for k in range(offset, count)]
+
+
+def sample_unique(
+    count: int, range_size: int, domain: bytes, S: bytes, root: bytes, version: int = DEFAULT_SAMPLER
+) -> List[int]:
+    if version == SAMPLER_PRP:
+        return _prp_numbers(count, range_size, domain, S, root)
+    if version == SAMPLER_FISHER_YATES:
+        return _fisher_yates_numbers(count, range_size, domain, S, root)
+    if version == SAMPLER_REJECTION:
+        return _uniform_numbers(count, range_size, domain, S, root)
+    raise ValueError(f"Unsupported sampler version: {version}")
+
+
+def unique_indices(
+    count: int, universe: int, domain: bytes, S: bytes, root: bytes, version: int = DEFAULT_SAMPLER
+) -> list[int]:
+    return sample_unique(count, universe, domain, S, root, version)
+
+
+def unique_range(
+    count: int, start: int, end: int, domain: bytes, S: bytes, root: bytes, version: int = DEFAULT_SAMPLER
+) -> list[int]:
     if end < start:
         raise ValueError("end must be >= start")
     range_size = end - start + 1
-    offsets = _uniform_numbers(count, range_size, domain, S, root)
+    offsets = sample_unique(count, range_size, domain, S, root, version)
     return [start + off for off in offsets]
+
+
+def iter_unique_range(
+    count: int,
+    start: int,
+    end: int,
+    offset: int,
+    limit: int,
+    domain: bytes,
+    S: bytes,
+    root: bytes,
+    version: int = DEFAULT_SAMPLER,
+) -> Iterator[int]:
+    """Items [offset, offset + limit) of the `count`-element draw from [start, end].
+
+    Every sampler is prefix-consistent, so a page equals the same slice of the
+    full draw. Version 3 computes the page directly; older versions have to
+    generate the prefix up to offset + limit. Values are yielded one at a
+    time, so a long draw can be streamed without holding it in memory
+    (sampler state aside). Arguments are checked before the first value.
+    """
+    if end < start:
+        raise ValueError("end must be >= start")
+    if offset < 0 or limit < 0:
+        raise ValueError("offset and limit must be non-negative")
+    range_size = end - start + 1
+    _check_args(count, range_size)
+    if version not in SAMPLER_VERSIONS:
+        raise ValueError(f"Unsupported sampler version: {version}")
+    stop = min(count, offset + limit)
+    return _iter_range(stop, start, range_size, offset, domain, S, root, version)
+
+
+def _iter_range(stop: int, start: int, range_size: int, offset: int,
+                domain: bytes, S: bytes, root: bytes, version: int) -> Iterator[int]:
+    if offset >= stop:
+        return
+    if version == SAMPLER_PRP:
+        perm = FeistelPermutation(prp_key(domain, S, root), range_size)
+        for k in range(offset, stop):
+            yield start + perm(k)
+        return
+    if version == SAMPLER_FISHER_YATES:
+        it = _iter_fisher_yates(stop, range_size, domain, S, root)
+    else:
+        it = _iter_rejection(stop, range_size, domain, S, root)
+    for k, off in enumerate(it):
+        if k >= offset:
+            yield start + off
@@ -2,19 +2,42 @@ from __future__ import annotations
 from .routers.sources import router as sources_router
 from .routers.analysis import router as analysis_router
 from .routers.transparency import router as transparency_router
-from .services.rounds import commit_round
+from .services.rounds import (
+    build_round_tree,
+    commit_round,
+    extend_round_output,
+    load_round_tree,
+    round_context,
+    save_extractor_state,
+    save_output_analysis,
+)
+from .services.random_ranges import (
+    HISTORY_INLINE as RANGE_HISTORY_INLINE,
+    append_history as append_range_history,
+    draw_batch,
+    draw_page,
+    ndjson_chunk,
+    u64le_chunk,
+)
+from .services import analysis_cache
+from .services.analysis_cache import cache_key
 from .services.analysis_store import store_round_analysis
-from .analysis.randomness import run_basic_tests
+from .services.vdf_jobs import VDFJobError, cancel_job, get_job, resume_job, start_job
+from .analysis.randomness import BitStatsAccumulator
 import os
 import base64
+import hashlib
 import json
-from fastapi import FastAPI, HTTPException, UploadFile, BackgroundTasks
-from fastapi.responses import FileResponse
+from itertools import islice
+from typing import Literal
+from fastapi import FastAPI, HTTPException, UploadFile, BackgroundTasks, Query
+from fastapi.responses import FileResponse, StreamingResponse
 from .models import *
-from .utils import now_iso, b64d, sha3_256, sha3_512, hkdf_sha3, ensure_dir, parse_seed
-from .merkle import build_merkle, merkle_proof
-from .vdf import derive_prime, vdf_encode_sloth
-from .indexing import unique_indices, unique_range
+from .utils import now_iso, b64d, bytes_to_bits, sha3_256, sha3_512, ensure_dir, parse_seed
+from .extractor import make_extractor, output_chunks
+from .merkle import MULTIPROOF_FILE, MULTIPROOF_VERSION, merkle_multiproof
+from .vdf import T_for_delay, derive_prime_with_counter, vdf_calibration
+from .indexing import DEFAULT_SAMPLER, choose_sampler, iter_unique_range, unique_indices
 from .storage import new_round_dir, round_dir, write_json, write_bytes, read_json, read_bytes, zip_dir
 from .verify import verify_package
 
@@ -67,27 +90,116 @@ def beacon(round_id: str, req: BeaconRequest, background_tasks: BackgroundTasks)
 
     t1 = now_iso()
 
-    p = derive_prime(b"TSRNG/modulus/" + S, bits=req.modulus_bits)
+    p, p_counter = derive_prime_with_counter(b"TSRNG/modulus/" + S, bits=req.modulus_bits)
     x = int.from_bytes(sha3_256(S), "big") % p
-    y = vdf_encode_sloth(x, req.vdf_T, p)
 
-    vdf_info = {"S_hex": req.S_hex, "T": req.vdf_T, "p_hex": format(
-        p, "x"), "y_hex": format(y, "x"), "t1_iso": t1}
-    ensure_dir(os.path.join(rdir, "vdf"))
-    write_json(os.path.join(rdir, "vdf", "proof.json"), vdf_info)
+    T = req.vdf_T
+    calibration = None
+    if req.target_delay_ms is not None:
+        # T подбирается по откалиброванной скорости шагов VDF на этой машине
+        T, entry = T_for_delay(req.vdf_scheme, req.modulus_bits, req.target_delay_ms)
+        calibration = {
+            "target_delay_ms": req.target_delay_ms,
+            "steps_per_second": entry["steps_per_second"],
+            "host": entry["host"],
+            "backend": entry.get("backend"),
+            "measured_iso": entry["measured_iso"],
+            "T": T,
+        }
+
+    # VDF считается в отдельном процессе; ответ возвращается сразу со ссылкой на задачу
+    try:
+        job = start_job(round_id, req.S_hex, req.vdf_scheme, T, p, p_counter, x, t1, calibration)
+    except VDFJobError as e:
+        raise HTTPException(409, str(e)) from e
 
     manifest = read_json(os.path.join(rdir, "manifest.json"))
     manifest.update({
         "S_hex": req.S_hex,                      # как прислали (для аудита)
         "S_canonical_hex": S.hex(),              # канонический hex
         "t1_iso": t1,
-        "vdf_T": req.vdf_T,
-        "modulus_bits": req.modulus_bits
+        "vdf_T": T,
+        "vdf_scheme": req.vdf_scheme,
+        "vdf_target_delay_ms": req.target_delay_ms,
+        "modulus_bits": req.modulus_bits,
+        "vdf_job": {"job_id": job["job_id"], "path": "vdf/job.json"},
     })
     write_json(os.path.join(rdir, "manifest.json"), manifest)
 
-    return BeaconResponse(round_id=round_id, S_hex=req.S_hex, vdf_T=req.vdf_T, modulus_bits=req.modulus_bits,
-                          p_hex=vdf_info["p_hex"], y_hex=vdf_info["y_hex"], t1_iso=t1)
+    return BeaconResponse(round_id=round_id, S_hex=req.S_hex, vdf_T=T, modulus_bits=req.modulus_bits,
+                          vdf_scheme=req.vdf_scheme, p_hex=job["p_hex"], y_hex=None, t1_iso=t1,
+                          vdf_job_id=job["job_id"], vdf_status=job["status"], calibration=calibration)
+
+
+@app.get("/vdf/calibration", response_model=VDFCalibrationResponse)
+def vdf_calibration_info(
+    scheme: Literal["sloth_sqrt", "iterated_squaring"] = "sloth_sqrt",
+    modulus_bits: int = Query(512, ge=64, le=8192),
+    refresh: bool = False,
+):
+    return VDFCalibrationResponse(**vdf_calibration(scheme, modulus_bits, refresh=refresh))
+
+
+@app.get("/rounds/{round_id}/vdf/job", response_model=VDFJobResponse)
+def vdf_job_status(round_id: str):
+    if not os.path.isdir(round_dir(round_id)):
+        raise HTTPException(404, "Round not found")
+    job = get_job(round_id)
+    if job is None:
+        raise HTTPException(404, "No VDF job for this round")
+    return _vdf_job_response(job)
+
+
+@app.post("/rounds/{round_id}/vdf/job/cancel", response_model=VDFJobResponse)
+def vdf_job_cancel(round_id: str):
+    if not os.path.isdir(round_dir(round_id)):
+        raise HTTPException(404, "Round not found")
+    try:
+        return _vdf_job_response(cancel_job(round_id))
+    except VDFJobError as e:
+        raise HTTPException(409, str(e)) from e
+
+
+@app.post("/rounds/{round_id}/vdf/job/resume", response_model=VDFJobResponse)
+def vdf_job_resume(round_id: str):
+    if not os.path.isdir(round_dir(round_id)):
+        raise HTTPException(404, "Round not found")
+    try:
+        return _vdf_job_response(resume_job(round_id))
+    except VDFJobError as e:
+        raise HTTPException(409, str(e)) from e
+
+
+def _vdf_job_response(job: dict) -> VDFJobResponse:
+    return VDFJobResponse(
+        round_id=job["round_id"],
+        job_id=job["job_id"],
+        status=job["status"],
+        scheme=job["scheme"],
+        T=int(job["T"]),
+        iteration=int(job["iteration"]),
+        progress=int(job["iteration"]) / max(1, int(job["T"])),
+        checkpoint_y_hex=job.get("y_hex"),
+        elapsed_s=job.get("elapsed_s"),
+        error=job.get("error"),
+        updated_iso=job.get("updated_iso"),
+    )
+
+
+def _analysis_model(raw: dict, source: dict) -> AnalysisResult:
+    return AnalysisResult(
+        bit_length=raw["bit_length"],
+        byte_length=raw["byte_length"],
+        ones=raw["ones"],
+        zeros=raw["zeros"],
+        proportion_ones=raw["proportion_ones"],
+        longest_run=raw["longest_run"],
+        entropy_per_byte=raw.get("entropy_per_byte"),
+        tests=[RandomnessTestResult(**item) for item in raw.get("tests", [])],
+        all_passed=raw["all_passed"],
+        screening=raw.get("screening"),
+        source=source,
+    )
 
 
 @app.post("/rounds/{round_id}/finalize", response_model=FinalizeResponse)
@@ -99,26 +211,21 @@ def finalize(round_id: str, req: FinalizeRequest):
     manifest = read_json(os.path.join(rdir, "manifest.json"))
     if "S_hex" not in manifest:
         raise HTTPException(400, "Beacon not set")
+    if not os.path.isfile(os.path.join(rdir, "vdf", "proof.json")):
+        job = get_job(round_id)
+        status_label = job["status"] if job else "missing"
+        raise HTTPException(409, f"VDF evaluation not finished (status: {status_label})")
 
     index_map = read_json(os.path.join(rdir, "index_map.json"))
     all_streams = list(index_map.keys())
 
-    leaves_linear: list[bytes] = []
     stream_offsets: dict[str, int] = {}
     off = 0
     for s in all_streams:
         stream_offsets[s] = off
-        sdir = os.path.join(rdir, "leaves", s)
-        count = len(os.listdir(sdir))
-        for i in range(count):
-            leaves_linear.append(read_bytes(os.path.join(sdir, f"{i}.leaf")))
-        off += count
+        off += len(os.listdir(os.path.join(rdir, "leaves", s)))
 
-    root_hash, levels = build_merkle(leaves_linear)
     stored_root = bytes.fromhex(manifest["merkle_root_hex"])
-    if root_hash != stored_root:
-        raise HTTPException(500, "Merkle root mismatch")
-
     S = parse_seed(manifest.get("S_canonical_hex") or manifest.get("S_hex") or "")
 
     root = stored_root
@@ -137,37 +244,79 @@ def finalize(round_id: str, req: FinalizeRequest):
         if cnt > M:
             cnt = M
         idxs = unique_indices(
-            cnt, M, domain=b"TSRNG/idx/" + s.encode(), S=S, root=root)
+            cnt, M, domain=b"TSRNG/idx/" + s.encode(), S=S, root=root, version=DEFAULT_SAMPLER)
         selected[s] = idxs
 
     proofs_dir = os.path.join(rdir, "proofs")
     ensure_dir(proofs_dir)
 
     selected_chunks: list[bytes] = []
+    global_indices: list[int] = []
     for s, idxs in selected.items():
         sdir = os.path.join(rdir, "leaves", s)
-        pdir = os.path.join(proofs_dir, s)
-        ensure_dir(pdir)
         for i in idxs:
-            leaf_b = read_bytes(os.path.join(sdir, f"{i}.leaf"))
-            from .merkle import merkle_proof
-            global_index = stream_offsets[s] + i
-            proof = merkle_proof(levels, global_index)
-            proof_json = [(h.hex(), d) for (h, d) in proof]
-            from .storage import write_json
-            write_json(os.path.join(pdir, f"{i}.proof"), proof_json)
-            selected_chunks.append(leaf_b)
+            selected_chunks.append(read_bytes(os.path.join(sdir, f"{i}.leaf")))
+            global_indices.append(stream_offsets[s] + i)
+
+    try:
+        levels = load_round_tree(round_id)
+    except ValueError as e:
+        raise HTTPException(500, f"Merkle tree file corrupted: {e}") from e
+    if levels is None:
+        # раунды без сохранённого дерева: достраиваем его потоково из листьев
+        try:
+            levels = build_round_tree(round_id)
+        except ValueError as e:
+            raise HTTPException(500, str(e)) from e
+    # дерево отображено в память — закрываем его и при ошибках
+    with levels:
+        if levels.root != stored_root or levels.leaf_count != off:
+            raise HTTPException(500, "Merkle root mismatch")
+        siblings = merkle_multiproof(levels, global_indices)
+    write_json(os.path.join(proofs_dir, MULTIPROOF_FILE), {
+        "version": MULTIPROOF_VERSION,
+        "leaf_count": off,
+        "stream_offsets": stream_offsets,
+        "siblings": [h.hex() for h in siblings],
+    })
 
     r_raw = sha3_512(b"".join(selected_chunks))
-    out_bytes = hkdf_sha3(r_raw, salt=S, length=(req.output_bits + 7)//8)
-    write_bytes(os.path.join(rdir, "output.bin"), out_bytes)
+    extractor = make_extractor(req.extractor_mode, r_raw, S)
+    out_len = (req.output_bits + 7) // 8
+    # output.bin, the analysis and the hash are fed chunk by chunk; the saved
+    # accumulator covers whole bytes only, so extend can continue from it
+    whole_len = req.output_bits // 8
+    analysis_acc = BitStatsAccumulator()
+    out_hash = hashlib.sha3_256()
+    out_hex: list[str] = []
+    written = 0
+    with open(os.path.join(rdir, "output.bin"), "wb") as f:
+        for chunk in output_chunks(extractor, out_len):
+            f.write(chunk)
+            analysis_acc.update(chunk[:max(0, whole_len - written)])
+            out_hash.update(chunk)
+            out_hex.append(chunk.hex())
+            written += len(chunk)
+            last_byte = chunk[-1:]
+    save_extractor_state(round_id, extractor, out_len)
+    save_output_analysis(round_id, analysis_acc)
+    if whole_len < out_len:
+        analysis_acc.limit_bits = req.output_bits
+        analysis_acc.update(last_byte)
+    # режим экстрактора и длина выхода нужны проверяющему, поэтому попадают в манифест артефакта
+    manifest["extractor_mode"] = req.extractor_mode
+    manifest["output_bits"] = req.output_bits
+    manifest["output_bytes"] = out_len
+    write_json(os.path.join(rdir, "manifest.json"), manifest)
 
     leaves_meta = {s: len(os.listdir(os.path.join(rdir, "leaves", s)))
                    for s in all_streams}
     write_json(os.path.join(rdir, "leaves_meta.json"), leaves_meta)
-    write_json(os.path.join(rdir, "selected.json"), {"indices": selected})
+    write_json(os.path.join(rdir, "selected.json"),
+               {"indices": selected, "proof_format": "multiproof", "index_sampler": DEFAULT_SAMPLER})
 
-    analysis_raw = run_basic_tests(out_bytes, limit_bits=req.output_bits)
+    analysis_raw = analysis_acc.finalize()
+    analysis_cache.store(cache_key(out_hash.hexdigest(), req.output_bits), analysis_raw)
     analysis_source = {
         "type": "finalize",
         "round_id": round_id,
@@ -175,18 +324,7 @@ def finalize(round_id: str, req: FinalizeRequest):
         "selected_counts": {s: len(idxs) for s, idxs in selected.items()},
     }
     store_round_analysis(round_id, analysis_raw, analysis_source)
-    analysis_model = AnalysisResult(
-        bit_length=analysis_raw["bit_length"],
-        byte_length=analysis_raw["byte_length"],
-        ones=analysis_raw["ones"],
-        zeros=analysis_raw["zeros"],
-        proportion_ones=analysis_raw["proportion_ones"],
-        longest_run=analysis_raw["longest_run"],
-        entropy_per_byte=analysis_raw.get("entropy_per_byte"),
-        tests=[RandomnessTestResult(**item) for item in analysis_raw.get("tests", [])],
-        all_passed=analysis_raw["all_passed"],
-        source=analysis_source,
-    )
+    analysis_model = _analysis_model(analysis_raw, analysis_source)
 
     dist = os.path.join(rdir, "artifact")
     ensure_dir(dist)
@@ -196,16 +334,15 @@ def finalize(round_id: str, req: FinalizeRequest):
     ensure_dir(os.path.join(dist, "vdf"))
     shutil.copy(os.path.join(rdir, "vdf", "proof.json"),
                 os.path.join(dist, "vdf", "proof.json"))
+    ensure_dir(os.path.join(dist, "proofs"))
+    shutil.copy(os.path.join(proofs_dir, MULTIPROOF_FILE),
+                os.path.join(dist, "proofs", MULTIPROOF_FILE))
     for s, idxs in selected.items():
         s_leaves_out = os.path.join(dist, "leaves", s)
-        s_proofs_out = os.path.join(dist, "proofs", s)
         ensure_dir(s_leaves_out)
-        ensure_dir(s_proofs_out)
         for i in idxs:
             shutil.copy(os.path.join(rdir, "leaves", s, f"{i}.leaf"), os.path.join(
                 s_leaves_out, f"{i}.leaf"))
-            shutil.copy(os.path.join(rdir, "proofs", s, f"{i}.proof"), os.path.join(
-                s_proofs_out, f"{i}.proof"))
     raw_src = os.path.join(rdir, "raw")
     if os.path.isdir(raw_src):
         raw_dist = os.path.join(dist, "raw")
@@ -238,54 +375,49 @@ def finalize(round_id: str, req: FinalizeRequest):
     manifest["t2_iso"] = t2
     manifest["selected_indices"] = selected
     manifest["output_bits"] = req.output_bits
-    manifest["output_bytes"] = len(out_bytes)
+    manifest["output_bytes"] = out_len
     manifest["artifact"] = {
         "dir": dist,
         "zip_path": zip_path,
         "raw_exported": os.path.isdir(os.path.join(dist, "raw")),
     }
     write_json(os.path.join(rdir, "manifest.json"), manifest)
-    ensure_output_text(round_id, manifest, out_bytes)
+    ensure_output_text(round_id, manifest)
 
     return FinalizeResponse(
         round_id=round_id,
-        output_hex=out_bytes.hex(),
+        output_hex="".join(out_hex),
         selected_indices=selected,
         t2_iso=t2,
         analysis=analysis_model,
     )
 
 
-@app.post("/rounds/{round_id}/random-range", response_model=RandomRangeResponse)
-def random_range(round_id: str, req: RandomRangeRequest):
-    rdir = round_dir(round_id)
-    if not os.path.isdir(rdir):
+RANGE_STREAM_BATCH = 4096
+
+
+def _range_context(round_id: str) -> dict:
+    try:
+        ctx = round_context(round_id)
+    except ValueError as exc:
+        raise HTTPException(500, f"Failed to parse round manifest: {exc}") from exc
+    if ctx is None:
         raise HTTPException(404, "Round not found")
+    if ctx["S"] is None:
+        raise HTTPException(400, "Beacon not set for this round")
+    if ctx["root"] is None:
+        raise HTTPException(500, "Manifest missing merkle_root_hex")
+    return ctx
 
+
+def _range_params(round_id: str, req: RandomRangeRequest) -> dict:
     if req.end < req.start:
         raise HTTPException(400, "end must be >= start")
 
-    manifest = read_json(os.path.join(rdir, "manifest.json"))
-    seed_hex = manifest.get("S_canonical_hex") or manifest.get("S_hex")
-    if not seed_hex:
-        raise HTTPException(400, "Beacon not set for this round")
-
     range_size = req.end - req.start + 1
     if req.count > range_size:
         raise HTTPException(400, "count cannot exceed range size")
 
-    try:
-        S = parse_seed(seed_hex)
-    except ValueError as exc:
-        raise HTTPException(500, f"Failed to parse seed: {exc}") from exc
-
-    try:
-        root = bytes.fromhex(manifest["merkle_root_hex"])
-    except KeyError:
-        raise HTTPException(500, "Manifest missing merkle_root_hex")
-    except ValueError as exc:
-        raise HTTPException(500, f"Invalid merkle root hex: {exc}") from exc
-
     domain_parts = [b"TSRNG/range", round_id.encode()]
     domain_label = (req.domain or "default").encode()
     domain_parts.append(domain_label)
@@ -299,48 +431,69 @@ def random_range(round_id: str, req: RandomRangeRequest):
         domain_parts.append(salt_bytes)
     domain_bytes = b"|".join(domain_parts)
 
-    try:
-        numbers = unique_range(req.count, req.start, req.end, domain_bytes, S, root)
-    except ValueError as exc:
-        raise HTTPException(400, str(exc)) from exc
+    if req.offset >= req.count:
+        raise HTTPException(400, "offset must be < count")
+    limit = req.limit if req.limit is not None else req.count - req.offset
+    return {
+        "domain_bytes": domain_bytes,
+        "range_size": range_size,
+        "sampler_version": req.sampler_version or choose_sampler(req.count, range_size, req.offset, req.limit),
+        "limit": limit,
+    }
+
+
+def _range_spec(ctx: dict, req: RandomRangeRequest, params: dict) -> tuple:
+    return (req.count, req.start, req.end, req.offset, params["limit"],
+            params["domain_bytes"], ctx["S"], ctx["root"], params["sampler_version"])
+
 
+def _range_info(ctx: dict, req: RandomRangeRequest, params: dict) -> dict:
     info = {
-        "seed_hex": seed_hex,
-        "merkle_root_hex": manifest["merkle_root_hex"],
-        "domain_hex": domain_bytes.hex(),
-        "range_size": range_size,
+        "seed_hex": ctx["seed_hex"],
+        "merkle_root_hex": ctx["merkle_root_hex"],
+        "domain_hex": params["domain_bytes"].hex(),
+        "range_size": params["range_size"],
+        "sampler_version": params["sampler_version"],
+        "offset": req.offset,
+        "limit": params["limit"],
     }
     if req.salt_hex:
         info["salt_hex"] = req.salt_hex.lower()
+    return info
+
 
-    history_path = os.path.join(rdir, "random_ranges.jsonl")
-    entry = {
+def _range_history_entry(round_id: str, req: RandomRangeRequest, params: dict,
+                         requested_at: str | None = None) -> dict:
+    return {
         "round_id": round_id,
-        "requested_at": now_iso(),
+        "requested_at": requested_at or now_iso(),
         "start": req.start,
         "end": req.end,
         "count": req.count,
-        "numbers": numbers,
-        "domain_hex": domain_bytes.hex(),
+        "offset": req.offset,
+        "limit": params["limit"],
+        "domain_hex": params["domain_bytes"].hex(),
         "domain": req.domain or "default",
         "context": req.context,
         "salt_hex": req.salt_hex.lower() if req.salt_hex else None,
+        "sampler_version": params["sampler_version"],
     }
-    try:
-        with open(history_path, "a", encoding="utf-8") as f:
-            json.dump(entry, f, ensure_ascii=False)
-            f.write("\n")
-    except Exception:
-        # не прерываем выдачу результата, но сохраняем информацию в ответе
-        info["history_write_failed"] = True
-    else:
-        info["history_path"] = history_path
 
+
+def _record_numbers(entry: dict, numbers: list[int]) -> None:
+    entry["emitted"] = len(numbers)
+    entry["stream_digest_hex"] = sha3_256(ndjson_chunk(numbers)).hex()
+    if len(numbers) <= RANGE_HISTORY_INLINE:
+        entry["numbers"] = numbers
+
+
+def _range_response(round_id: str, req: RandomRangeRequest, numbers: list[int], info: dict) -> RandomRangeResponse:
     return RandomRangeResponse(
         round_id=round_id,
         start=req.start,
         end=req.end,
         count=req.count,
+        offset=req.offset,
         numbers=numbers,
         domain=req.domain or "default",
         context=req.context,
@@ -348,17 +501,145 @@ def random_range(round_id: str, req: RandomRangeRequest):
     )
 
 
-def ensure_output_text(round_id: str, manifest: dict | None = None, out_bytes: bytes | None = None) -> str:
+@app.post("/rounds/{round_id}/random-range", response_model=RandomRangeResponse)
+def random_range(round_id: str, req: RandomRangeRequest):
+    ctx = _range_context(round_id)
+    params = _range_params(round_id, req)
+    try:
+        numbers = draw_page(_range_spec(ctx, req, params))
+    except ValueError as exc:
+        raise HTTPException(400, str(exc)) from exc
+
+    info = _range_info(ctx, req, params)
+    entry = _range_history_entry(round_id, req, params)
+    _record_numbers(entry, numbers)
+    history_path = append_range_history(ctx["rdir"], [entry])
+    if history_path is None:
+        # не прерываем выдачу результата, но сохраняем информацию в ответе
+        info["history_write_failed"] = True
+    else:
+        info["history_path"] = history_path
+    info["stream_digest_hex"] = entry["stream_digest_hex"]
+    return _range_response(round_id, req, numbers, info)
+
+
+@app.post("/rounds/{round_id}/random-range/batch", response_model=RandomRangeBatchResponse)
+def random_range_batch(round_id: str, req: RandomRangeBatchRequest):
+    """Много выборок за один запрос: контекст раунда берётся из кэша,
+    выборки считаются параллельно, журнал дописывается одной записью на диск.
+    """
+    ctx = _range_context(round_id)
+    all_params = []
+    for i, item in enumerate(req.requests):
+        try:
+            all_params.append(_range_params(round_id, item))
+        except HTTPException as exc:
+            raise HTTPException(exc.status_code, f"requests[{i}]: {exc.detail}") from exc
+    specs = [_range_spec(ctx, item, params) for item, params in zip(req.requests, all_params)]
+    try:
+        results = draw_batch(specs)
+    except ValueError as exc:
+        raise HTTPException(400, str(exc)) from exc
+
+    requested_at = now_iso()
+    entries = []
+    responses = []
+    for i, (item, params, numbers) in enumerate(zip(req.requests, all_params, results)):
+        entry = _range_history_entry(round_id, item, params, requested_at)
+        entry["batch_index"] = i
+        _record_numbers(entry, numbers)
+        entries.append(entry)
+        info = _range_info(ctx, item, params)
+        info["stream_digest_hex"] = entry["stream_digest_hex"]
+        responses.append(_range_response(round_id, item, numbers, info))
+
+    history_path = append_range_history(ctx["rdir"], entries)
+    info = {"stage": ctx["stage"], "requests": len(responses)}
+    if history_path is None:
+        info["history_write_failed"] = True
+    else:
+        info["history_path"] = history_path
+    return RandomRangeBatchResponse(round_id=round_id, results=responses, info=info)
+
+
+@app.post("/rounds/{round_id}/random-range/stream")
+def random_range_stream(
+    round_id: str,
+    req: RandomRangeRequest,
+    format: Literal["ndjson", "u64le"] = Query("ndjson"),
+):
+    """Потоковая выдача выборки: NDJSON (по числу в строке) или упакованные uint64 little-endian.
+
+    Дайджест считается по NDJSON-представлению независимо от формата передачи,
+    поэтому поток можно перевыпустить с теми же параметрами и сверить с историей.
+    """
+    ctx = _range_context(round_id)
+    params = _range_params(round_id, req)
+    if format == "u64le" and (req.start < 0 or req.end >= 1 << 64):
+        raise HTTPException(400, "u64le format requires 0 <= start <= end < 2^64")
+    try:
+        numbers = iter_unique_range(*_range_spec(ctx, req, params))
+    except ValueError as exc:
+        raise HTTPException(400, str(exc)) from exc
+    entry = _range_history_entry(round_id, req, params)
+    entry["format"] = format
+
+    def body():
+        digest = hashlib.sha3_256()
+        emitted = 0
+        completed = False
+        try:
+            while True:
+                batch = list(islice(numbers, RANGE_STREAM_BATCH))
+                if not batch:
+                    break
+                text = ndjson_chunk(batch)
+                digest.update(text)
+                emitted += len(batch)
+                yield u64le_chunk(batch) if format == "u64le" else text
+            completed = True
+        finally:
+            # клиент мог оборвать соединение — фиксируем, сколько успели выдать
+            entry["emitted"] = emitted
+            entry["completed"] = completed
+            entry["stream_digest_hex"] = digest.hexdigest()
+            append_range_history(ctx["rdir"], [entry])
+
+    media_type = "application/octet-stream" if format == "u64le" else "application/x-ndjson"
+    headers = {
+        "X-TSRNG-Sampler-Version": str(params["sampler_version"]),
+        "X-TSRNG-Domain-Hex": params["domain_bytes"].hex(),
+        "X-TSRNG-Emit-Count": str(max(0, min(req.count, req.offset + params["limit"]) - req.offset)),
+    }
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
+
+
+OUTPUT_READ_CHUNK = 1 << 16
+
+
+def _iter_file_chunks(path: str, offset: int = 0, length: int | None = None):
+    with open(path, "rb") as f:
+        f.seek(offset)
+        remaining = length
+        while remaining is None or remaining > 0:
+            size = OUTPUT_READ_CHUNK if remaining is None else min(OUTPUT_READ_CHUNK, remaining)
+            chunk = f.read(size)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+def ensure_output_text(round_id: str, manifest: dict | None = None) -> str:
     rdir = round_dir(round_id)
     txt_path = os.path.join(rdir, "output_bits.txt")
     if manifest is None:
         manifest = read_json(os.path.join(rdir, "manifest.json"))
     output_bits = int(manifest.get("output_bits") or 0)
     bin_path = os.path.join(rdir, "output.bin")
-    if out_bytes is None:
-        out_bytes = read_bytes(bin_path)
     if output_bits <= 0:
-        output_bits = len(out_bytes) * 8
+        output_bits = os.path.getsize(bin_path) * 8
 
     if os.path.isfile(txt_path):
         try:
@@ -367,23 +648,13 @@ def ensure_output_text(round_id: str, manifest: dict | None = None, out_bytes: b
         except OSError:
             pass
 
-    bits_written = 0
-    buffer: list[str] = []
-    flush_threshold = 8192
+    # output.bin читается кусками, текст пишется по мере чтения
+    bits_left = output_bits
     with open(txt_path, "w", encoding="utf-8") as f:
-        for byte in out_bytes:
-            for bit in range(7, -1, -1):
-                if bits_written >= output_bits:
-                    break
-                buffer.append("1" if (byte >> bit) & 1 else "0")
-                bits_written += 1
-                if len(buffer) >= flush_threshold:
-                    f.write("".join(buffer))
-                    buffer.clear()
-            if bits_written >= output_bits:
-                break
-        if buffer:
-            f.write("".join(buffer))
+        for chunk in _iter_file_chunks(bin_path, 0, (output_bits + 7) // 8):
+            text = bytes_to_bits(chunk)
+            f.write(text[:bits_left])
+            bits_left -= min(bits_left, len(text))
     return txt_path
 
 
@@ -399,12 +670,77 @@ def get_output_text(round_id: str):
     return FileResponse(txt_path, media_type="text/plain", filename=f"tsrng_round_{round_id}_bits.txt")
 
 
+@app.get("/rounds/{round_id}/output.bin")
+def get_output_bin(
+    round_id: str,
+    offset: int = Query(0, ge=0),
+    length: int | None = Query(None, ge=1),
+):
+    rdir = round_dir(round_id)
+    bin_path = os.path.join(rdir, "output.bin")
+    if not os.path.isfile(bin_path):
+        raise HTTPException(404, "Round output not found; finalize the round first")
+    size = os.path.getsize(bin_path)
+    if offset > size:
+        raise HTTPException(400, "offset is beyond the end of the output")
+    if length is None:
+        length = size - offset
+    length = min(length, size - offset)
+    headers = {
+        "Content-Length": str(length),
+        "Content-Disposition": f'attachment; filename="tsrng_round_{round_id}.bin"',
+    }
+    return StreamingResponse(_iter_file_chunks(bin_path, offset, length),
+                             media_type="application/octet-stream", headers=headers)
+
+
+# the response echoes at most this many appended bytes; the rest is read
+# through /rounds/{round_id}/output.bin?offset=...
+EXTEND_HEX_MAX_BYTES = 4096
+
+
+@app.post("/rounds/{round_id}/output/extend", response_model=ExtendOutputResponse)
+def extend_output(round_id: str, req: ExtendOutputRequest):
+    if not os.path.isdir(round_dir(round_id)):
+        raise HTTPException(404, "Round not found")
+    try:
+        ext = extend_round_output(round_id, req.additional_bits)
+    except ValueError as e:
+        raise HTTPException(400, str(e)) from e
+
+    analysis_raw = ext["analysis"]
+    analysis_source = {
+        "type": "extend",
+        "round_id": round_id,
+        "limit_bits": ext["output_bits"],
+        "from_bits": ext["from_bits"],
+    }
+    store_round_analysis(round_id, analysis_raw, analysis_source)
+    return ExtendOutputResponse(
+        round_id=round_id,
+        from_bits=ext["from_bits"],
+        output_bits=ext["output_bits"],
+        appended_bytes=len(ext["appended"]),
+        appended_hex=ext["appended"][:EXTEND_HEX_MAX_BYTES].hex(),
+        appended_hex_truncated=len(ext["appended"]) > EXTEND_HEX_MAX_BYTES,
+        analysis=_analysis_model(analysis_raw, analysis_source),
+    )
+
+
 @app.get("/rounds/{round_id}/package.zip")
 def get_package(round_id: str):
     rdir = round_dir(round_id)
     zip_path = os.path.join(rdir, "artifact.zip")
     if not os.path.isfile(zip_path):
         raise HTTPException(404, "Package not found; finalize the round first")
+    manifest_path = os.path.join(rdir, "manifest.json")
+    manifest = read_json(manifest_path)
+    artifact = manifest.get("artifact") or {}
+    if artifact.get("zip_outdated"):
+        # выход был дополнен после финализации — пересобираем архив один раз
+        zip_dir(os.path.join(rdir, "artifact"), zip_path)
+        artifact["zip_outdated"] = False
+        write_json(manifest_path, manifest)
     return FileResponse(zip_path, media_type="application/zip", filename=f"tsrng_round_{round_id}.zip")
 
 
@@ -420,6 +756,9 @@ def status(round_id: str):
         stage = "beaconed"
     else:
         stage = "committed"
+    job = get_job(round_id)
+    if job is not None:
+        manifest["vdf_job"] = _vdf_job_response(job).model_dump()
     return StatusResponse(round_id=round_id, stage=stage, info=manifest)
 
 
@@ -1,33 +1,86 @@
-
 from __future__ import annotations
-from typing import List, Tuple
+import hashlib
+import mmap
+import os
+import struct
+from typing import BinaryIO, Iterable, List, Optional, Sequence, Tuple
+from .pool import pool_map
 from .utils import sha3_256
 
 LEAF_PREFIX = b'\x00'
 NODE_PREFIX = b'\x01'
 
+MULTIPROOF_FILE = "multiproof.json"
+MULTIPROOF_VERSION = 1
+
+NODE_SIZE = 32
+TREE_MAGIC = b"TSRNGMT1"
+_TREE_HEADER = struct.Struct("<8sII")
+_TREE_LEVEL = struct.Struct("<QQ")
+
 def _hash_leaf(data: bytes) -> bytes:
     return sha3_256(LEAF_PREFIX + data)
 
 def _hash_node(left: bytes, right: bytes) -> bytes:
     return sha3_256(NODE_PREFIX + left + right)
 
-def build_merkle(leaves_data: List[bytes]) -> tuple[bytes, list[list[bytes]]]:
+
+# --- batched hashing -------------------------------------------------------
+# Below PARALLEL_THRESHOLD items a level is hashed inline; above it, chunks
+# of HASH_CHUNK items are spread over a process pool. Workers return one
+# contiguous buffer of digests per chunk to keep pickling cheap.
+
+PARALLEL_THRESHOLD = 1 << 16
+HASH_CHUNK = 1 << 14
+
+def _hash_leaf_chunk(chunk: Sequence[bytes]) -> bytes:
+    sha = hashlib.sha3_256
+    prefix = LEAF_PREFIX
+    return b"".join([sha(prefix + d).digest() for d in chunk])
+
+def _hash_node_chunk(buf: bytes) -> bytes:
+    # buf holds an even number of child digests, already padded
+    sha = hashlib.sha3_256
+    prefix = NODE_PREFIX
+    step = 2 * NODE_SIZE
+    return b"".join([sha(prefix + buf[i:i + step]).digest() for i in range(0, len(buf), step)])
+
+def _resolve_workers(workers: Optional[int], size: int) -> int:
+    if size < PARALLEL_THRESHOLD:
+        return 1
+    if workers is None:
+        workers = os.cpu_count() or 1
+    return max(1, min(workers, (size + HASH_CHUNK - 1) // HASH_CHUNK))
+
+def _run_chunks(fn, chunks: list, parallel: bool) -> bytes:
+    if not parallel:
+        return b"".join(fn(c) for c in chunks)
+    return b"".join(pool_map(fn, chunks))
+
+def hash_leaves(leaves_data: Sequence[bytes], parallel: bool = False) -> bytes:
+    chunks = [leaves_data[i:i + HASH_CHUNK] for i in range(0, len(leaves_data), HASH_CHUNK)]
+    return _run_chunks(_hash_leaf_chunk, chunks, parallel)
+
+def hash_level(level: bytes, parallel: bool = False) -> bytes:
+    if (len(level) // NODE_SIZE) % 2:
+        level = level + level[-NODE_SIZE:]
+    span = HASH_CHUNK * 2 * NODE_SIZE
+    chunks = [level[i:i + span] for i in range(0, len(level), span)]
+    return _run_chunks(_hash_node_chunk, chunks, parallel)
+
+def build_merkle(leaves_data: List[bytes], workers: Optional[int] = None) -> tuple[bytes, list[TreeLevel]]:
+    """In-memory builder; only the benchmarks use it, rounds go through MerkleAccumulator."""
     if not leaves_data:
         raise ValueError("No leaves")
-    level = [_hash_leaf(d) for d in leaves_data]
-    levels = [level]
-    while len(level) > 1:
-        nxt = []
-        for i in range(0, len(level), 2):
-            a = level[i]
-            b = level[i+1] if i+1 < len(level) else level[i]
-            nxt.append(_hash_node(a, b))
-        levels.append(nxt)
-        level = nxt
-    return level[0], levels
-
-def merkle_proof(levels: list[list[bytes]], index: int) -> list[tuple[bytes, str]]:
+    parallel = _resolve_workers(workers, len(leaves_data)) > 1
+    buf = hash_leaves(leaves_data, parallel)
+    levels = [TreeLevel(buf, 0, len(buf) // NODE_SIZE)]
+    while len(buf) > NODE_SIZE:
+        buf = hash_level(buf, parallel and len(buf) // NODE_SIZE >= PARALLEL_THRESHOLD)
+        levels.append(TreeLevel(buf, 0, len(buf) // NODE_SIZE))
+    return bytes(buf), levels
+
+def merkle_proof(levels: Sequence[Sequence[bytes]], index: int) -> list[tuple[bytes, str]]:
     proof: list[tuple[bytes, str]] = []
     idx = index
     for lvl in range(len(levels)-1):
@@ -49,3 +102,375 @@ def verify_proof(leaf_data: bytes, proof: list[tuple[bytes, str]], root: bytes)
         else:
             h = _hash_node(sib, h)
     return h == root
+
+def merkle_multiproof(levels: Sequence[Sequence[bytes]], indices: Sequence[int]) -> list[bytes]:
+    # Siblings are emitted level by level, left to right, skipping any node
+    # that the verifier can already compute from the selected leaves.
+    known = sorted(set(indices))
+    if known and not 0 <= known[0] <= known[-1] < len(levels[0]):
+        raise IndexError("leaf index out of range")
+    siblings: list[bytes] = []
+    for lvl in range(len(levels)-1):
+        level = levels[lvl]
+        nxt: list[int] = []
+        i = 0
+        while i < len(known):
+            idx = known[i]
+            if idx % 2 == 0:
+                if i+1 < len(known) and known[i+1] == idx+1:
+                    i += 1
+                elif idx+1 < len(level):
+                    siblings.append(level[idx+1])
+            else:
+                siblings.append(level[idx-1])
+            nxt.append(idx // 2)
+            i += 1
+        known = nxt
+    return siblings
+
+def verify_multiproof(leaves: Sequence[tuple[int, bytes]], siblings: Sequence[bytes],
+                      leaf_count: int, root: bytes) -> bool:
+    by_index: dict[int, bytes] = {}
+    for idx, data in leaves:
+        if not 0 <= idx < leaf_count:
+            return False
+        if by_index.setdefault(idx, data) != data:
+            return False
+    if not by_index:
+        return False
+    nodes = [(idx, _hash_leaf(by_index[idx])) for idx in sorted(by_index)]
+    sib_iter = iter(siblings)
+    width = leaf_count
+    try:
+        while width > 1:
+            nxt: list[tuple[int, bytes]] = []
+            i = 0
+            while i < len(nodes):
+                idx, h = nodes[i]
+                if idx % 2 == 0:
+                    if i+1 < len(nodes) and nodes[i+1][0] == idx+1:
+                        parent = _hash_node(h, nodes[i+1][1])
+                        i += 1
+                    elif idx+1 < width:
+                        parent = _hash_node(h, next(sib_iter))
+                    else:
+                        parent = _hash_node(h, h)
+                else:
+                    parent = _hash_node(next(sib_iter), h)
+                nxt.append((idx // 2, parent))
+                i += 1
+            nodes = nxt
+            width = (width + 1) // 2
+    except StopIteration:
+        return False
+    if next(sib_iter, None) is not None:
+        return False
+    return nodes[0][1] == root
+
+
+# --- streaming builder -----------------------------------------------------
+# Keeps at most one pending node per level (a binary-counter frontier), so
+# memory is O(log n) in the number of leaves. finish() applies the same
+# "duplicate the last odd node" rule as build_merkle, so the roots match.
+# add_many() hashes whole levels of a batch through the chunked (and, when
+# large, parallel) path; only a level's odd leftover waits in the frontier.
+
+class MerkleAccumulator:
+    def __init__(self, sink: Optional["TreeFileWriter"] = None):
+        self._frontier: list[Optional[bytes]] = []
+        self._count = 0
+        self._sink = sink
+        self._root: Optional[bytes] = None
+
+    @property
+    def leaf_count(self) -> int:
+        return self._count
+
+    def _emit(self, level: int, node: bytes) -> None:
+        if self._sink is not None:
+            self._sink.emit(level, node)
+
+    def add(self, leaf_data: bytes) -> None:
+        self.add_leaf_hash(_hash_leaf(leaf_data))
+
+    def add_many(self, leaves_data: Sequence[bytes], workers: Optional[int] = None) -> None:
+        if self._root is not None:
+            raise ValueError("Accumulator already finished")
+        if not leaves_data:
+            return
+        parallel = _resolve_workers(workers, len(leaves_data)) > 1
+        self._push_level(0, hash_leaves(leaves_data, parallel), parallel)
+        self._count += len(leaves_data)
+
+    def _push_level(self, lvl: int, buf: bytes, parallel: bool) -> None:
+        """Append a run of level-`lvl` nodes and hash every completed pair above it."""
+        frontier = self._frontier
+        while buf:
+            self._emit(lvl, buf)
+            if lvl == len(frontier):
+                frontier.append(None)
+            pending = frontier[lvl]
+            if pending is not None:
+                buf = pending + buf
+            if (len(buf) // NODE_SIZE) % 2:
+                frontier[lvl] = buf[-NODE_SIZE:]
+                buf = buf[:-NODE_SIZE]
+            else:
+                frontier[lvl] = None
+            if not buf:
+                return
+            span = HASH_CHUNK * 2 * NODE_SIZE
+            chunks = [buf[i:i + span] for i in range(0, len(buf), span)]
+            buf = _run_chunks(_hash_node_chunk, chunks, parallel and len(buf) // NODE_SIZE >= PARALLEL_THRESHOLD)
+            lvl += 1
+
+    def update(self, leaves: Iterable[bytes]) -> None:
+        for leaf_data in leaves:
+            self.add(leaf_data)
+
+    def update_from_file(self, f: BinaryIO, leaf_size: int) -> None:
+        while True:
+            leaf_data = f.read(leaf_size)
+            if not leaf_data:
+                return
+            if len(leaf_data) != leaf_size:
+                raise ValueError("Trailing partial leaf in input")
+            self.add(leaf_data)
+
+    def add_leaf_hash(self, h: bytes) -> None:
+        if self._root is not None:
+            raise ValueError("Accumulator already finished")
+        frontier = self._frontier
+        self._emit(0, h)
+        lvl = 0
+        while lvl < len(frontier) and frontier[lvl] is not None:
+            h = _hash_node(frontier[lvl], h)
+            frontier[lvl] = None
+            lvl += 1
+            self._emit(lvl, h)
+        if lvl == len(frontier):
+            frontier.append(h)
+        else:
+            frontier[lvl] = h
+        self._count += 1
+
+    def finish(self) -> bytes:
+        if self._root is not None:
+            return self._root
+        if self._count == 0:
+            raise ValueError("No leaves")
+        frontier = self._frontier
+        carry: Optional[bytes] = None
+        lvl = 0
+        while True:
+            pending = frontier[lvl] if lvl < len(frontier) else None
+            is_top = not any(node is not None for node in frontier[lvl + 1:])
+            if pending is not None and carry is not None:
+                carry = _hash_node(pending, carry)
+            elif is_top:
+                self._root = pending if pending is not None else carry
+                return self._root
+            elif pending is not None:
+                carry = _hash_node(pending, pending)
+            elif carry is not None:
+                carry = _hash_node(carry, carry)
+            else:
+                lvl += 1
+                continue
+            lvl += 1
+            self._emit(lvl, carry)
+
+
+# --- persisted tree -------------------------------------------------------
+# Layout: header (magic, level count, node size), then one (offset, count)
+# record per level, then every level's nodes as fixed 32-byte records,
+# leaves first and the root last.
+
+def level_sizes(leaf_count: int) -> list[int]:
+    if leaf_count <= 0:
+        raise ValueError("No leaves")
+    sizes = [leaf_count]
+    while sizes[-1] > 1:
+        sizes.append((sizes[-1] + 1) // 2)
+    return sizes
+
+def _tree_header(sizes: Sequence[int]) -> tuple[bytes, list[int]]:
+    offset = _TREE_HEADER.size + _TREE_LEVEL.size * len(sizes)
+    header = [_TREE_HEADER.pack(TREE_MAGIC, len(sizes), NODE_SIZE)]
+    offsets: list[int] = []
+    for count in sizes:
+        header.append(_TREE_LEVEL.pack(offset, count))
+        offsets.append(offset)
+        offset += count * NODE_SIZE
+    return b"".join(header), offsets
+
+def write_tree_file(path: str, levels: Sequence[Sequence[bytes]]) -> None:
+    header, _ = _tree_header([len(level) for level in levels])
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        for level in levels:
+            f.write(level.tobytes() if isinstance(level, TreeLevel) else b"".join(level))
+    os.replace(tmp_path, path)
+
+
+class TreeFileWriter:
+    """Writes a tree file node by node, in the order a streaming builder emits them.
+
+    Level sizes are fixed by the leaf count, so every node has a known slot;
+    each level keeps a small write buffer and memory stays O(levels).
+    """
+
+    FLUSH_BYTES = 1 << 16
+
+    def __init__(self, path: str, leaf_count: int):
+        self.path = path
+        self._sizes = level_sizes(leaf_count)
+        header, self._offsets = _tree_header(self._sizes)
+        self._written = [0] * len(self._sizes)
+        self._buffers = [bytearray() for _ in self._sizes]
+        self._tmp_path = path + ".tmp"
+        self._f = open(self._tmp_path, "wb")
+        self._f.write(header)
+
+    @property
+    def level_count(self) -> int:
+        return len(self._sizes)
+
+    def emit(self, level: int, nodes: bytes) -> None:
+        # one node or a contiguous run of nodes of the same level
+        buf = self._buffers[level]
+        buf += nodes
+        if len(buf) >= self.FLUSH_BYTES:
+            self._flush(level)
+
+    def _flush(self, level: int) -> None:
+        buf = self._buffers[level]
+        if not buf:
+            return
+        pos = self._offsets[level] + self._written[level] * NODE_SIZE
+        if self._written[level] + len(buf) // NODE_SIZE > self._sizes[level]:
+            raise ValueError(f"Too many nodes emitted for level {level}")
+        self._f.seek(pos)
+        self._f.write(buf)
+        self._written[level] += len(buf) // NODE_SIZE
+        buf.clear()
+
+    def close(self) -> None:
+        try:
+            for level in range(len(self._sizes)):
+                self._flush(level)
+            if self._written != self._sizes:
+                raise ValueError("Merkle tree file is incomplete")
+        except Exception:
+            self.abort()
+            raise
+        self._f.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self) -> None:
+        self._f.close()
+        try:
+            os.unlink(self._tmp_path)
+        except OSError:
+            pass
+
+
+class TreeLevel:
+    """Read-only view of one level: a run of 32-byte nodes inside a persisted
+    tree file, or the level buffer build_merkle hashed.
+
+    Nodes are returned as copied bytes rather than memoryviews: a view would
+    pin the mmap, and MerkleTreeFile.close() fails while any is alive.
+    """
+
+    def __init__(self, buf, offset: int, count: int):
+        self._buf = buf
+        self._offset = offset
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> bytes:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("node index out of range")
+        start = self._offset + index * NODE_SIZE
+        return self._buf[start:start + NODE_SIZE]
+
+    def tobytes(self) -> bytes:
+        return bytes(self._buf[self._offset:self._offset + self._count * NODE_SIZE])
+
+
+class MerkleTreeFile:
+    """Memory-mapped Merkle tree written by `write_tree_file`.
+
+    Behaves like the `levels` list returned by `build_merkle`, so it can be
+    passed straight to `merkle_proof`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._levels = self._parse_header()
+        except ValueError:
+            self._mm.close()
+            raise
+
+    def _parse_header(self) -> list[TreeLevel]:
+        size = len(self._mm)
+        if size < _TREE_HEADER.size:
+            raise ValueError("Merkle tree file truncated")
+        magic, n_levels, node_size = _TREE_HEADER.unpack_from(self._mm, 0)
+        if magic != TREE_MAGIC:
+            raise ValueError("Not a Merkle tree file")
+        if node_size != NODE_SIZE or n_levels == 0:
+            raise ValueError("Unsupported Merkle tree layout")
+        levels: list[TreeLevel] = []
+        prev_count = None
+        for lvl in range(n_levels):
+            off, count = _TREE_LEVEL.unpack_from(self._mm, _TREE_HEADER.size + lvl * _TREE_LEVEL.size)
+            if off + count * NODE_SIZE > size:
+                raise ValueError("Merkle tree file truncated")
+            if prev_count is not None and count != (prev_count + 1) // 2:
+                raise ValueError("Inconsistent Merkle tree level sizes")
+            levels.append(TreeLevel(self._mm, off, count))
+            prev_count = count
+        if len(levels[-1]) != 1:
+            raise ValueError("Merkle tree file has no single root")
+        return levels
+
+    def __len__(self) -> int:
+        return len(self._levels)
+
+    def __getitem__(self, index: int) -> TreeLevel:
+        return self._levels[index]
+
+    @property
+    def root(self) -> bytes:
+        return self._levels[-1][0]
+
+    @property
+    def leaf_count(self) -> int:
+        return len(self._levels[0])
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def __enter__(self) -> "MerkleTreeFile":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def open_tree_file(path: str, expected_root: bytes) -> MerkleTreeFile:
+    tree = MerkleTreeFile(path)
+    if tree.root != expected_root:
+        tree.close()
+        raise ValueError("Merkle tree file does not match stored root")
+    return tree
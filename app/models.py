@@ -24,19 +24,49 @@ class BeaconRequest(BaseModel):
     S_hex: str
     vdf_T: int = 50
     modulus_bits: int = 512
+    vdf_scheme: Literal["sloth_sqrt", "iterated_squaring"] = "sloth_sqrt"
+    # if set, vdf_T is ignored and chosen from the calibrated rate
+    target_delay_ms: Optional[int] = Field(default=None, ge=1)
 
 class BeaconResponse(BaseModel):
     round_id: str
     S_hex: str
     vdf_T: int
     modulus_bits: int
+    vdf_scheme: str
     p_hex: str
-    y_hex: str
+    y_hex: Optional[str] = None
     t1_iso: str
+    vdf_job_id: Optional[str] = None
+    vdf_status: Optional[str] = None
+    calibration: Optional[Dict[str, Any]] = None
+
+class VDFCalibrationResponse(BaseModel):
+    scheme: str
+    modulus_bits: int
+    host: str
+    backend: Optional[str] = None
+    steps_per_second: float
+    measured_iso: str
+
+class VDFJobResponse(BaseModel):
+    round_id: str
+    job_id: str
+    status: Literal["queued", "running", "completed", "failed", "cancelled", "interrupted"]
+    scheme: str
+    T: int
+    iteration: int
+    progress: float
+    checkpoint_y_hex: Optional[str] = None
+    elapsed_s: Optional[float] = None
+    error: Optional[str] = None
+    updated_iso: Optional[str] = None
 
 class FinalizeRequest(BaseModel):
     output_bits: int = 512
     quotas: Optional[Dict[str, float]] = None
+    # "sha3_ctr" expands independent blocks and is parallelised for large outputs
+    extractor_mode: Literal["hkdf_sha3", "sha3_ctr"] = "hkdf_sha3"
 
 class FinalizeResponse(BaseModel):
     round_id: str
@@ -53,6 +83,8 @@ class StatusResponse(BaseModel):
 
 class AnalysisOptions(BaseModel):
     limit_bits: Optional[int] = Field(default=None, ge=8)
+    tests: Optional[List[str]] = None
+    screening: bool = False
 
 
 class SequenceAnalysisRequest(BaseModel):
@@ -61,6 +93,8 @@ class SequenceAnalysisRequest(BaseModel):
     data_bits: Optional[str] = None
     data_numbers: Optional[List[int]] = None
     limit_bits: Optional[int] = Field(default=None, ge=8)
+    tests: Optional[List[str]] = None
+    screening: bool = False
 
 
 class RandomnessTestResult(BaseModel):
@@ -82,9 +116,25 @@ class AnalysisResult(BaseModel):
     entropy_per_byte: Optional[float] = None
     tests: List[RandomnessTestResult]
     all_passed: bool
+    screening: Optional[Dict[str, Any]] = None
     source: Dict[str, Any] = Field(default_factory=dict)
 
 
+class ExtendOutputRequest(BaseModel):
+    additional_bits: int = Field(ge=1, le=64_000_000)
+
+
+class ExtendOutputResponse(BaseModel):
+    round_id: str
+    from_bits: int
+    output_bits: int
+    appended_bytes: int
+    # first EXTEND_HEX_MAX_BYTES bytes of the appended output
+    appended_hex: str
+    appended_hex_truncated: bool = False
+    analysis: AnalysisResult
+
+
 class BitstringExportRequest(BaseModel):
     bits: int = Field(default=1_000_000, ge=1, le=8_000_000)
     refresh_artifact: bool = True
@@ -104,6 +154,11 @@ class RandomRangeRequest(BaseModel):
     domain: Optional[str] = "default"
     context: Optional[str] = None
     salt_hex: Optional[str] = None
+    # None = chosen per draw (2, or 3 for pages and huge draws); 1 re-derives old draws
+    sampler_version: Optional[Literal[1, 2, 3]] = None
+    # page of the draw to return: items [offset, offset + limit)
+    offset: int = Field(default=0, ge=0)
+    limit: Optional[int] = Field(default=None, ge=1)
 
 
 class RandomRangeResponse(BaseModel):
@@ -111,12 +166,23 @@ class RandomRangeResponse(BaseModel):
     start: int
     end: int
     count: int
+    offset: int = 0
     numbers: List[int]
     domain: str
     context: Optional[str] = None
     info: Dict[str, Any]
 
 
+class RandomRangeBatchRequest(BaseModel):
+    requests: List[RandomRangeRequest] = Field(min_length=1, max_length=10000)
+
+
+class RandomRangeBatchResponse(BaseModel):
+    round_id: str
+    results: List[RandomRangeResponse]
+    info: Dict[str, Any]
+
+
 class HeavyTestRequest(BaseModel):
     test: Literal["dieharder"] = "dieharder"
     dieharder_args: Optional[List[str]] = None
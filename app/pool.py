@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker
+from typing import Any, Callable, Iterable, List, Optional
+
+# One process pool serves every CPU-bound path (Merkle hashing, counter-mode
+# extraction, batched range draws, sharded analysis). It is created on first
+# use and kept, so process start-up is paid once per server instead of once
+# per request. Callers still decide when a job is big enough to ship to it.
+MAX_WORKERS = 8
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def pool_size() -> int:
+    return min(os.cpu_count() or 1, MAX_WORKERS)
+
+
+def shared_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # workers must share our tracker, or each one reports the shared
+            # memory segments it attached to as leaked when it exits
+            resource_tracker.ensure_running()
+            _pool = ProcessPoolExecutor(max_workers=pool_size())
+        return _pool
+
+
+def _drop(broken: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False)
+
+
+def pool_map(fn: Callable[[Any], Any], items: Iterable[Any], chunksize: int = 1) -> List[Any]:
+    """list(map(fn, items)) on the shared pool, in order.
+
+    A pool broken by a dying worker is dropped, so the next call starts a
+    fresh one; the error still reaches the caller.
+    """
+    pool = shared_pool()
+    try:
+        return list(pool.map(fn, items, chunksize=chunksize))
+    except BrokenProcessPool:
+        _drop(pool)
+        raise
@@ -3,11 +3,13 @@ from __future__ import annotations
 import base64
 import hashlib
 import os
-from typing import Optional, Tuple
+import tempfile
+from typing import List, Optional, Sequence, Tuple
 
 from fastapi import APIRouter, HTTPException, UploadFile, File, Query
 
-from ..analysis.randomness import run_basic_tests
+from ..analysis import sp800_22
+from ..analysis.randomness import BitStatsAccumulator, analyze_file, run_basic_tests
 from ..analysis.heavy import (
     HeavyTestError,
     load_round_output,
@@ -22,12 +24,16 @@ from ..models import (
     HeavyTestRequest,
     HeavyTestResponse,
 )
+from ..services.analysis_cache import cached_analysis, file_sha3
 from ..services.analysis_store import store_round_analysis
-from ..storage import DATA_ROOT, read_bytes, round_dir, write_bytes
+from ..services.rounds import output_analysis_report, round_context
+from ..storage import DATA_ROOT, round_dir
 from ..utils import ensure_dir
 
 router = APIRouter(prefix="/analysis", tags=["analysis"])
 
+UPLOAD_CHUNK = 1 << 20
+
 
 def _bits_to_bytes(bit_string: str) -> Tuple[bytes, int]:
     cleaned = "".join(ch for ch in bit_string.strip() if ch in "01")
@@ -41,6 +47,20 @@ def _bits_to_bytes(bit_string: str) -> Tuple[bytes, int]:
     return bytes(out), len(cleaned)
 
 
+def _run_tests(data: bytes, limit_bits: Optional[int], tests: Optional[Sequence[str]],
+               screening: bool = False) -> dict:
+    try:
+        return run_basic_tests(data, limit_bits=limit_bits, extra_tests=tests, screening=screening)
+    except ValueError as exc:
+        raise HTTPException(400, str(exc)) from exc
+    except ImportError as exc:
+        raise HTTPException(501, str(exc)) from exc
+
+
+def _analysed_bits(total_bits: int, limit_bits: Optional[int]) -> int:
+    return total_bits if limit_bits is None else min(total_bits, limit_bits)
+
+
 def _build_analysis_result(raw: dict, source: dict) -> AnalysisResult:
     tests = [RandomnessTestResult(**item) for item in raw.get("tests", [])]
     return AnalysisResult(
@@ -53,10 +73,16 @@ def _build_analysis_result(raw: dict, source: dict) -> AnalysisResult:
         entropy_per_byte=raw.get("entropy_per_byte"),
         tests=tests,
         all_passed=raw["all_passed"],
+        screening=raw.get("screening"),
         source=source,
     )
 
 
+@router.get("/tests")
+async def list_tests():
+    return {"tests": list(sp800_22.TESTS), "available": sp800_22.np is not None}
+
+
 @router.post("/round/{round_id}", response_model=AnalysisResult)
 async def analyze_round(round_id: str, opts: AnalysisOptions):
     rdir = round_dir(round_id)
@@ -65,14 +91,40 @@ async def analyze_round(round_id: str, opts: AnalysisOptions):
     output_path = os.path.join(rdir, "output.bin")
     if not os.path.isfile(output_path):
         raise HTTPException(400, "Round has not been finalized yet")
-    data = read_bytes(output_path)
-    result_raw = run_basic_tests(data, limit_bits=opts.limit_bits)
+
+    # default to the manifest's output_bits, the length finalize and extend
+    # analysed and cached, rather than the whole bytes of output.bin
+    ctx = round_context(round_id)
+    total_bits = int((ctx or {}).get("manifest", {}).get("output_bits") or os.path.getsize(output_path) * 8)
+    bit_length = _analysed_bits(total_bits, opts.limit_bits)
+
+    def compute() -> dict:
+        if not opts.tests and not opts.screening and bit_length == total_bits:
+            # the accumulator saved by finalize/extend already covers the output
+            saved = output_analysis_report(round_id, bit_length)
+            if saved is not None:
+                return saved
+        if opts.tests:
+            with open(output_path, "rb") as f:
+                # only the analysed prefix is read
+                data = f.read((bit_length + 7) // 8)
+            return _run_tests(data, bit_length, opts.tests, opts.screening)
+        return analyze_file(output_path, bit_length, screening=opts.screening)
+
+    sha = file_sha3(output_path)
+    result_raw, hit = cached_analysis(sha, bit_length, compute, tests=opts.tests, screening=opts.screening)
     source = {
         "type": "round_output",
         "round_id": round_id,
         "output_path": output_path,
         "limit_bits": opts.limit_bits,
+        "sha3_256": sha,
+        "cache": "hit" if hit else "miss",
     }
+    if opts.tests:
+        source["tests"] = opts.tests
+    if opts.screening:
+        source["screening"] = True
     store_round_analysis(round_id, result_raw, source)
     return _build_analysis_result(result_raw, source)
 
@@ -115,8 +167,23 @@ async def analyze_sequence(req: SequenceAnalysisRequest):
         raise HTTPException(400, "Provide data_hex, data_base64, data_bits, or data_numbers")
 
     limit = req.limit_bits or default_bits
-    result_raw = run_basic_tests(data, limit_bits=limit)
-    source = {"type": "inline_sequence", "length_bits": default_bits, "limit_bits": limit}
+    result_raw, hit = cached_analysis(
+        hashlib.sha3_256(data).hexdigest(),
+        _analysed_bits(len(data) * 8, limit),
+        lambda: _run_tests(data, limit, req.tests, req.screening),
+        tests=req.tests,
+        screening=req.screening,
+    )
+    source = {
+        "type": "inline_sequence",
+        "length_bits": default_bits,
+        "limit_bits": limit,
+        "cache": "hit" if hit else "miss",
+    }
+    if req.tests:
+        source["tests"] = req.tests
+    if req.screening:
+        source["screening"] = True
     return _build_analysis_result(result_raw, source)
 
 
@@ -146,24 +213,71 @@ async def analyze_heavy(round_id: str, req: HeavyTestRequest):
 
 
 @router.post("/upload", response_model=AnalysisResult)
-async def analyze_upload(file: UploadFile = File(...), limit_bits: Optional[int] = Query(default=None, ge=8)):
-    data = await file.read()
-    if not data:
-        raise HTTPException(400, "Uploaded file is empty")
-    total_bits = len(data) * 8
-    limit = limit_bits or total_bits
-    result_raw = run_basic_tests(data, limit_bits=limit)
-    sha = hashlib.sha3_256(data).hexdigest()
+async def analyze_upload(
+    file: UploadFile = File(...),
+    limit_bits: Optional[int] = Query(default=None, ge=8),
+    tests: Optional[List[str]] = Query(default=None),
+    screening: bool = Query(default=False),
+):
+    unknown = [name for name in tests or () if name not in sp800_22.TESTS]
+    if unknown:
+        raise HTTPException(400, f"Unknown test(s): {', '.join(unknown)}")
     uploads_dir = os.path.join(DATA_ROOT, "uploads")
     ensure_dir(uploads_dir)
-    stored_path = os.path.join(uploads_dir, f"{sha}.bin")
-    if not os.path.isfile(stored_path):
-        write_bytes(stored_path, data)
+    # hash, store and analyse in one pass; screening reads only the prefixes
+    # it needs and the SP 800-22 battery needs the whole sequence in memory,
+    # so those run afterwards from the stored file (skipped on a cache hit)
+    hasher = hashlib.sha3_256()
+    acc = BitStatsAccumulator(limit_bits) if not tests and not screening else None
+    total_bytes = 0
+    fd, tmp_path = tempfile.mkstemp(dir=uploads_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK)
+                if not chunk:
+                    break
+                total_bytes += len(chunk)
+                hasher.update(chunk)
+                out.write(chunk)
+                if acc is not None:
+                    acc.update(chunk)
+        if not total_bytes:
+            raise HTTPException(400, "Uploaded file is empty")
+        sha = hasher.hexdigest()
+        stored_path = os.path.join(uploads_dir, f"{sha}.bin")
+        if os.path.isfile(stored_path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, stored_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    limit = limit_bits or total_bytes * 8
+
+    def compute() -> dict:
+        if acc is not None:
+            return acc.finalize()
+        if not tests:
+            return analyze_file(stored_path, limit, screening=screening)
+        with open(stored_path, "rb") as f:
+            data = f.read((limit + 7) // 8)
+        return _run_tests(data, limit, tests, screening)
+
+    result_raw, hit = cached_analysis(
+        sha, _analysed_bits(total_bytes * 8, limit), compute, tests=tests, screening=screening
+    )
     source = {
         "type": "upload",
         "filename": file.filename,
         "sha3_256": sha,
         "stored_path": stored_path,
         "limit_bits": limit,
+        "cache": "hit" if hit else "miss",
     }
+    if tests:
+        source["tests"] = tests
+    if screening:
+        source["screening"] = True
     return _build_analysis_result(result_raw, source)
@@ -7,6 +7,8 @@ from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, HTTPException, Query
 
+from ..merkle import merkle_proof
+from ..services.rounds import load_round_tree, round_stage
 from ..storage import DATA_ROOT, read_bytes, read_json, round_dir
 
 router = APIRouter(prefix="/rounds", tags=["transparency"])
@@ -22,14 +24,6 @@ def _round_manifest(round_id: str) -> Dict[str, Any]:
     return read_json(manifest_path)
 
 
-def _resolve_stage(manifest: Dict[str, Any]) -> str:
-    if manifest.get("t2_iso"):
-        return "finalized"
-    if manifest.get("S_hex") or manifest.get("S_canonical_hex"):
-        return "beaconed"
-    return "committed"
-
-
 @router.get("", summary="List existing rounds")
 def list_rounds(limit: int = Query(100, ge=1, le=500)) -> List[Dict[str, Any]]:
     root = os.path.join(DATA_ROOT, "rounds")
@@ -50,7 +44,7 @@ def list_rounds(limit: int = Query(100, ge=1, le=500)) -> List[Dict[str, Any]]:
         entry = {
             "round_id": rid,
             "round_label": manifest.get("round_label"),
-            "stage": _resolve_stage(manifest),
+            "stage": round_stage(manifest),
             "t0_iso": manifest.get("t0_iso"),
             "t1_iso": manifest.get("t1_iso"),
             "t2_iso": manifest.get("t2_iso"),
@@ -120,6 +114,34 @@ def get_analysis_history_entry(round_id: str, entry: str) -> Dict[str, Any]:
     return read_json(path)
 
 
+@router.get("/{round_id}/proof/{stream}/{index}", summary="Merkle inclusion proof for a leaf")
+def get_leaf_proof(round_id: str, stream: str, index: int) -> Dict[str, Any]:
+    manifest = _round_manifest(round_id)
+    rdir = round_dir(round_id)
+    index_map = read_json(os.path.join(rdir, "index_map.json"))
+    positions = index_map.get(stream)
+    if positions is None:
+        raise HTTPException(404, "Stream not found")
+    if not 0 <= index < len(positions):
+        raise HTTPException(404, "Leaf index out of range")
+    try:
+        tree = load_round_tree(round_id)
+    except ValueError as exc:
+        raise HTTPException(500, f"Merkle tree file corrupted: {exc}") from exc
+    if tree is None:
+        raise HTTPException(404, "Merkle tree file not available for this round")
+    with tree:
+        proof = merkle_proof(tree, positions[index])
+    return {
+        "round_id": round_id,
+        "stream": stream,
+        "index": index,
+        "global_index": positions[index],
+        "merkle_root_hex": manifest.get("merkle_root_hex"),
+        "proof": [(h.hex(), d) for h, d in proof],
+    }
+
+
 @router.get("/{round_id}/vdf", summary="VDF proof information")
 def get_vdf(round_id: str) -> Dict[str, Any]:
     rdir = round_dir(round_id)
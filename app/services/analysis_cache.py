@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from ..analysis.randomness import SUITE_VERSION
+from ..storage import DATA_ROOT, read_json
+from ..utils import ensure_dir
+
+# Analysis results keyed by (sha3-256 of the data, analysed bits, block size,
+# suite version, extra tests) and stored as JSON under DATA_ROOT. Reads touch
+# the entry's mtime; once the directory grows past CACHE_MAX_BYTES the least
+# recently used entries are removed. The cache is an optimisation only: I/O
+# errors are treated as misses and never reach the request.
+CACHE_DIR = os.path.join(DATA_ROOT, "analysis_cache")
+CACHE_MAX_BYTES = int(os.environ.get("TSRNG_ANALYSIS_CACHE_BYTES", str(64 << 20)))
+HASH_CHUNK = 1 << 20
+
+_file_hashes: Dict[str, Tuple[Tuple[int, int], str]] = {}
+_file_hashes_lock = threading.Lock()
+
+# approximate size of CACHE_DIR: counted by the first evict(), then kept up to
+# date by store() so that a store does not have to list the directory
+_cache_bytes: Optional[int] = None
+_cache_bytes_lock = threading.Lock()
+
+
+def file_sha3(path: str) -> str:
+    """sha3-256 of a file, remembered while its mtime and size are unchanged."""
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _file_hashes_lock:
+        cached = _file_hashes.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    digest = hashlib.sha3_256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK):
+            digest.update(chunk)
+    sha = digest.hexdigest()
+    with _file_hashes_lock:
+        _file_hashes[path] = (stamp, sha)
+    return sha
+
+
+def cache_key(
+    sha3_hex: str,
+    bit_length: int,
+    block_size: int = 128,
+    tests: Optional[Sequence[str]] = None,
+    screening: bool = False,
+) -> str:
+    parts = [sha3_hex, str(bit_length), str(block_size), SUITE_VERSION]
+    if screening:
+        parts.append("screening")
+    if tests:
+        from ..analysis.sp800_22 import SUITE_VERSION as SP800_22_VERSION
+
+        parts.append(f"{SP800_22_VERSION}:{','.join(tests)}")
+    return hashlib.sha3_256("|".join(parts).encode()).hexdigest()
+
+
+def _entry_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+
+def lookup(key: str) -> Optional[Dict[str, Any]]:
+    """Stored result for `key`, or None; an unreadable entry counts as a miss."""
+    path = _entry_path(key)
+    try:
+        result = read_json(path)
+        os.utime(path)
+    except (OSError, ValueError):
+        return None
+    return result
+
+
+def store(key: str, result: Dict[str, Any]) -> None:
+    """Best effort: a full disk or unwritable cache dir only loses the entry."""
+    global _cache_bytes
+    path = _entry_path(key)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        ensure_dir(CACHE_DIR)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        size = os.path.getsize(tmp)
+        os.replace(tmp, path)
+    except (OSError, TypeError, ValueError):
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return
+    # the directory is only rescanned when the running total says it is full
+    with _cache_bytes_lock:
+        if _cache_bytes is not None:
+            _cache_bytes += size
+        over = _cache_bytes is None or _cache_bytes > CACHE_MAX_BYTES
+    if over:
+        evict()
+
+
+def evict(max_bytes: Optional[int] = None) -> int:
+    """Drop least recently used entries until the cache fits; returns the count removed."""
+    global _cache_bytes
+    limit = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    try:
+        entries = [e for e in os.scandir(CACHE_DIR) if e.name.endswith(".json")]
+    except OSError:
+        return 0
+    stats = []
+    for e in entries:
+        try:
+            st = e.stat()
+        except OSError:
+            continue
+        stats.append((st.st_mtime_ns, st.st_size, e.path))
+    total = sum(size for _, size, _ in stats)
+    removed = 0
+    for _, size, path in sorted(stats):
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    with _cache_bytes_lock:
+        _cache_bytes = total
+    return removed
+
+
+def cached_analysis(
+    sha3_hex: str,
+    bit_length: int,
+    compute: Callable[[], Dict[str, Any]],
+    block_size: int = 128,
+    tests: Optional[Sequence[str]] = None,
+    screening: bool = False,
+) -> Tuple[Dict[str, Any], bool]:
+    """Return (result, hit); on a miss `compute()` runs and its result is stored."""
+    key = cache_key(sha3_hex, bit_length, block_size, tests, screening)
+    result = lookup(key)
+    if result is not None:
+        return result, True
+    result = compute()
+    store(key, result)
+    return result, False
@@ -0,0 +1,69 @@
+# app/services/random_ranges.py
+from __future__ import annotations
+import json
+import os
+import sys
+from array import array
+from typing import Any, Dict, List, Optional, Sequence
+
+from ..indexing import SAMPLER_PRP, iter_unique_range
+from ..pool import pool_map
+
+HISTORY_FILE = "random_ranges.jsonl"
+# numbers are inlined into the history only for small draws; larger ones keep the digest
+HISTORY_INLINE = 1024
+# batches yielding fewer numbers than this are drawn inline, larger ones on a process pool
+PARALLEL_THRESHOLD = 1 << 16
+
+# (count, start, end, offset, limit, domain, S, root, version)
+RangeSpec = tuple
+
+
+def draw_page(spec: RangeSpec) -> List[int]:
+    count, start, end, offset, limit, domain, S, root, version = spec
+    return list(iter_unique_range(count, start, end, offset, limit, domain, S, root, version))
+
+
+def _spec_cost(spec: RangeSpec) -> int:
+    count, _, _, offset, limit, _, _, _, version = spec
+    stop = min(count, offset + limit)
+    # the permutation sampler jumps straight to offset, older ones replay the prefix
+    return max(0, stop - offset) if version == SAMPLER_PRP else stop
+
+
+def draw_batch(specs: Sequence[RangeSpec], workers: Optional[int] = None) -> List[List[int]]:
+    """Draw every spec; results are in spec order and identical to draw_page."""
+    total = sum(_spec_cost(s) for s in specs)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(specs))
+    if total < PARALLEL_THRESHOLD or workers <= 1:
+        return [draw_page(s) for s in specs]
+    chunksize = max(1, len(specs) // (workers * 4))
+    return pool_map(draw_page, specs, chunksize=chunksize)
+
+
+def ndjson_chunk(numbers: Sequence[int]) -> bytes:
+    return "".join(f"{n}\n" for n in numbers).encode()
+
+
+def u64le_chunk(numbers: Sequence[int]) -> bytes:
+    arr = array("Q", numbers)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def append_history(rdir: str, entries: Sequence[Dict[str, Any]]) -> str | None:
+    """Append entries to the round's range history in a single write.
+
+    Returns the history path, or None if the write failed.
+    """
+    history_path = os.path.join(rdir, HISTORY_FILE)
+    payload = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries)
+    try:
+        with open(history_path, "a", encoding="utf-8") as f:
+            f.write(payload)
+    except Exception:
+        return None
+    return history_path
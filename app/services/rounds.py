@@ -1,12 +1,30 @@
 # app/services/rounds.py
 from __future__ import annotations
 import os
-from typing import Dict, List
+import threading
+from array import array
+from typing import Any, Dict, List, Optional
 from ..models import CommitRequest, CommitResponse
-from ..utils import now_iso, b64d, ensure_dir, parse_seed, sha3_512, hkdf_sha3
-from ..merkle import build_merkle
+from ..utils import now_iso, b64d, bytes_to_bits, ensure_dir, parse_seed, sha3_512
+from ..analysis.randomness import READ_CHUNK, BitStatsAccumulator
+from ..extractor import EXTRACTOR_HKDF, Extractor, extractor_from_state, make_extractor
+from ..merkle import MerkleAccumulator, MerkleTreeFile, TreeFileWriter, open_tree_file
 from ..storage import new_round_dir, write_json, write_bytes, round_dir, read_json, read_bytes
 
+TREE_FILE = "merkle_tree.bin"
+# PRK and last chaining value of the round extractor, saved at finalize
+EXTRACTOR_STATE_FILE = "extractor_state.json"
+# basic-test accumulator over the whole bytes of output.bin, so an extension
+# only feeds the appended bytes; its per-block counts go to an append-only
+# sidecar so saving the state does not rewrite them
+OUTPUT_ANALYSIS_FILE = "output_analysis.json"
+OUTPUT_BLOCKS_FILE = "output_analysis_blocks.bin"
+
+# round_id -> ((mtime_ns, size) of manifest.json, parsed context)
+_context_cache: Dict[str, tuple[tuple[int, int], Dict[str, Any]]] = {}
+_context_lock = threading.Lock()
+_output_locks: Dict[str, threading.Lock] = {}
+
 
 def commit_round(req: CommitRequest) -> CommitResponse:
     rid, rdir = new_round_dir()
@@ -28,7 +46,12 @@ def commit_round(req: CommitRequest) -> CommitResponse:
             range(len(leaves_data), len(leaves_data) + len(arr)))
         leaves_data.extend(arr)
 
-    root_hash, levels = build_merkle(leaves_data)
+    # stream leaves into the tree file without keeping whole levels in memory
+    tree_writer = TreeFileWriter(os.path.join(rdir, TREE_FILE), len(leaves_data))
+    accumulator = MerkleAccumulator(sink=tree_writer)
+    accumulator.add_many(leaves_data)
+    root_hash = accumulator.finish()
+    tree_writer.close()
 
     # persist leaves per stream
     for s, arr in streams.items():
@@ -41,7 +64,7 @@ def commit_round(req: CommitRequest) -> CommitResponse:
     write_bytes(os.path.join(rdir, "merkle_root.bin"), root_hash)
     write_json(os.path.join(rdir, "index_map.json"), index_map)
     write_json(os.path.join(rdir, "levels_meta.json"), {
-               "levels": len(levels), "leaf_count": len(levels[0])})
+               "levels": tree_writer.level_count, "leaf_count": len(leaves_data), "tree_file": TREE_FILE})
 
     manifest = {
         "round_id": rid,
@@ -62,8 +85,80 @@ def commit_round(req: CommitRequest) -> CommitResponse:
     )
 
 
-def derive_round_output(round_id: str, output_bits: int) -> bytes:
+def save_extractor_state(round_id: str, extractor: Extractor, output_bytes: int) -> None:
+    state = extractor.state(output_bytes)
+    state["output_bytes"] = output_bytes
+    write_json(os.path.join(round_dir(round_id), EXTRACTOR_STATE_FILE), state)
+
+
+def save_output_analysis(round_id: str, acc: BitStatsAccumulator, saved_blocks: int = 0) -> None:
+    """Persist `acc`; the first `saved_blocks` block counts are already in the sidecar."""
+    rdir = round_dir(round_id)
+    state = acc.state()
+    counts = array("I", state.pop("block_counts"))
+    blocks_path = os.path.join(rdir, OUTPUT_BLOCKS_FILE)
+    with open(blocks_path, "r+b" if saved_blocks and os.path.isfile(blocks_path) else "wb") as f:
+        # drop counts appended by a save that never got to write its state
+        f.truncate(saved_blocks * counts.itemsize)
+        f.seek(0, os.SEEK_END)
+        counts[saved_blocks:].tofile(f)
+    state["block_count"] = len(counts)
+    write_json(os.path.join(rdir, OUTPUT_ANALYSIS_FILE), state)
+
+
+def load_output_analysis(round_id: str) -> Optional[BitStatsAccumulator]:
+    """Accumulator saved by save_output_analysis, or None for older rounds."""
+    rdir = round_dir(round_id)
+    state_path = os.path.join(rdir, OUTPUT_ANALYSIS_FILE)
+    blocks_path = os.path.join(rdir, OUTPUT_BLOCKS_FILE)
+    if not os.path.isfile(state_path) or not os.path.isfile(blocks_path):
+        return None
+    state = read_json(state_path)
+    counts = array("I")
+    try:
+        with open(blocks_path, "rb") as f:
+            counts.fromfile(f, state.pop("block_count"))
+    except EOFError:
+        return None
+    state["block_counts"] = counts
+    return BitStatsAccumulator.from_state(state)
+
+
+def _whole_bytes_accumulator(bin_path: str, n_bytes: int) -> BitStatsAccumulator:
+    acc = BitStatsAccumulator()
+    with open(bin_path, "rb") as f:
+        while acc.total_bits < n_bytes * 8:
+            chunk = f.read(min(READ_CHUNK, n_bytes - acc.total_bits // 8))
+            if not chunk:
+                raise ValueError("output.bin is shorter than the recorded output")
+            acc.update(chunk)
+    return acc
+
+
+def output_analysis_report(round_id: str, output_bits: int) -> Optional[Dict[str, Any]]:
+    """Basic tests over the first `output_bits` bits of the round output, from
+    the saved accumulator; None if the state does not cover exactly that length."""
+    acc = load_output_analysis(round_id)
+    if acc is None or acc.total_bits != output_bits // 8 * 8:
+        return None
+    if output_bits % 8:
+        with open(os.path.join(round_dir(round_id), "output.bin"), "rb") as f:
+            f.seek(output_bits // 8)
+            acc.limit_bits = output_bits
+            acc.update(f.read(1))
+    return acc.finalize()
+
+
+def round_extractor(round_id: str) -> Extractor:
+    """Extractor over the selected leaves of a finalized round.
+
+    Uses the state cached at finalize when present; older rounds fall back
+    to hashing the selected leaves again.
+    """
     rdir = round_dir(round_id)
+    state_path = os.path.join(rdir, EXTRACTOR_STATE_FILE)
+    if os.path.isfile(state_path):
+        return extractor_from_state(read_json(state_path))
     manifest_path = os.path.join(rdir, "manifest.json")
     selected_path = os.path.join(rdir, "selected.json")
     if not os.path.isfile(manifest_path) or not os.path.isfile(selected_path):
@@ -83,4 +178,187 @@ def derive_round_output(round_id: str, output_bits: int) -> bytes:
         raise ValueError("No selected leaves available")
     r_raw = sha3_512(b"".join(leaves))
     S = parse_seed(manifest.get("S_canonical_hex") or manifest.get("S_hex") or "")
-    return hkdf_sha3(r_raw, S, length=(output_bits + 7) // 8)
+    return make_extractor(manifest.get("extractor_mode", EXTRACTOR_HKDF), r_raw, S)
+
+
+def derive_round_output(round_id: str, output_bits: int) -> bytes:
+    """First `output_bits` bits of a round's output, in the round's extractor mode."""
+    return round_extractor(round_id).read(0, (output_bits + 7) // 8)
+
+
+def _output_lock(round_id: str) -> threading.Lock:
+    with _context_lock:
+        return _output_locks.setdefault(round_id, threading.Lock())
+
+
+def extend_round_output(round_id: str, additional_bits: int) -> Dict[str, Any]:
+    """Append `additional_bits` to a finalized round's output.
+
+    Only the new extractor blocks are computed; output.bin, its artifact copy
+    and output_bits.txt are appended to, and the extractor state moves to the
+    new end. The saved analysis accumulator is fed the new bytes only and
+    gives the report for the whole output. The artifact manifest records the
+    new length; the artifact zip is marked outdated and rebuilt on download.
+    """
+    if additional_bits <= 0:
+        raise ValueError("additional_bits must be positive")
+    rdir = round_dir(round_id)
+    manifest_path = os.path.join(rdir, "manifest.json")
+    with _output_lock(round_id):
+        if not os.path.isfile(manifest_path):
+            raise ValueError("Round not found")
+        manifest = read_json(manifest_path)
+        if "t2_iso" not in manifest:
+            raise ValueError("Round is not finalized")
+        bin_path = os.path.join(rdir, "output.bin")
+        old_bits = int(manifest.get("output_bits") or os.path.getsize(bin_path) * 8)
+        new_bits = old_bits + additional_bits
+        old_len = os.path.getsize(bin_path)
+        new_len = (new_bits + 7) // 8
+
+        extractor = round_extractor(round_id)
+        appended = extractor.read(old_len, new_len - old_len)
+        with open(bin_path, "ab") as f:
+            f.write(appended)
+        artifact_bin = os.path.join(rdir, "artifact", "output.bin")
+        if os.path.isfile(artifact_bin):
+            with open(artifact_bin, "ab") as f:
+                f.write(appended)
+
+        txt_path = os.path.join(rdir, "output_bits.txt")
+        if os.path.isfile(txt_path) and os.path.getsize(txt_path) == old_bits:
+            # the bits continue inside the last byte when old_bits is not byte-aligned
+            with open(bin_path, "rb") as f:
+                f.seek(old_bits // 8)
+                tail = f.read()
+            skip = old_bits % 8
+            with open(txt_path, "a", encoding="utf-8") as f:
+                f.write(bytes_to_bits(tail)[skip:skip + additional_bits])
+        elif os.path.isfile(txt_path):
+            os.remove(txt_path)
+
+        save_extractor_state(round_id, extractor, new_len)
+
+        # the accumulator covers whole bytes; a partial last byte is re-read
+        acc = load_output_analysis(round_id)
+        if acc is None or acc.total_bits != old_bits // 8 * 8:
+            acc = _whole_bytes_accumulator(bin_path, old_bits // 8)
+            saved_blocks = 0
+        else:
+            saved_blocks = len(acc.block_counts)
+        with open(bin_path, "rb") as f:
+            f.seek(old_bits // 8)
+            fresh = f.read(old_len - old_bits // 8) + appended
+        whole = new_bits // 8 - old_bits // 8
+        acc.update(fresh[:whole])
+        save_output_analysis(round_id, acc, saved_blocks)
+        acc.limit_bits = new_bits
+        acc.update(fresh[whole:])
+        analysis = acc.finalize()
+
+        extended_iso = now_iso()
+        extension = {"extended_iso": extended_iso, "from_bits": old_bits, "to_bits": new_bits}
+        manifest["output_bits"] = new_bits
+        manifest["output_bytes"] = new_len
+        manifest.setdefault("output_extensions", []).append(extension)
+        if isinstance(manifest.get("artifact"), dict):
+            manifest["artifact"]["zip_outdated"] = True
+        write_json(manifest_path, manifest)
+        artifact_manifest = os.path.join(rdir, "artifact", "manifest.json")
+        if os.path.isfile(artifact_manifest):
+            shipped = read_json(artifact_manifest)
+            shipped["output_bits"] = new_bits
+            shipped["output_bytes"] = new_len
+            shipped.setdefault("output_extensions", []).append(extension)
+            write_json(artifact_manifest, shipped)
+
+    return {
+        "round_id": round_id,
+        "from_bits": old_bits,
+        "output_bits": new_bits,
+        "appended": appended,
+        "extended_iso": extended_iso,
+        "analysis": analysis,
+    }
+
+
+def load_round_tree(round_id: str) -> MerkleTreeFile | None:
+    """Open the persisted Merkle tree of a round, checked against merkle_root.bin.
+
+    Returns None for rounds committed before the tree file existed.
+    """
+    rdir = round_dir(round_id)
+    tree_path = os.path.join(rdir, TREE_FILE)
+    if not os.path.isfile(tree_path):
+        return None
+    root = read_bytes(os.path.join(rdir, "merkle_root.bin"))
+    return open_tree_file(tree_path, root)
+
+
+def build_round_tree(round_id: str) -> MerkleTreeFile:
+    """Stream a round's leaf files into a fresh tree file and open it.
+
+    Used for rounds committed before the tree file existed; leaves are read
+    one at a time, so memory does not grow with the round size.
+    """
+    rdir = round_dir(round_id)
+    index_map = read_json(os.path.join(rdir, "index_map.json"))
+    counts = {s: len(os.listdir(os.path.join(rdir, "leaves", s))) for s in index_map}
+    root = read_bytes(os.path.join(rdir, "merkle_root.bin"))
+    tree_path = os.path.join(rdir, TREE_FILE)
+    tree_writer = TreeFileWriter(tree_path, sum(counts.values()))
+    accumulator = MerkleAccumulator(sink=tree_writer)
+    try:
+        for s, count in counts.items():
+            sdir = os.path.join(rdir, "leaves", s)
+            accumulator.update(read_bytes(os.path.join(sdir, f"{i}.leaf")) for i in range(count))
+        if accumulator.finish() != root:
+            raise ValueError("Merkle root mismatch")
+    except Exception:
+        tree_writer.abort()
+        raise
+    tree_writer.close()
+    return open_tree_file(tree_path, root)
+
+
+def round_stage(manifest: Dict[str, Any]) -> str:
+    if manifest.get("t2_iso"):
+        return "finalized"
+    if manifest.get("S_hex") or manifest.get("S_canonical_hex"):
+        return "beaconed"
+    return "committed"
+
+
+def round_context(round_id: str) -> Dict[str, Any] | None:
+    """Manifest of a round with the seed and Merkle root already decoded.
+
+    Cached per round and re-read whenever manifest.json changes on disk.
+    Returns None if the round does not exist; S/root are None until set.
+    """
+    path = os.path.join(round_dir(round_id), "manifest.json")
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _context_lock:
+        cached = _context_cache.get(round_id)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    manifest = read_json(path)
+    seed_hex = manifest.get("S_canonical_hex") or manifest.get("S_hex")
+    root_hex = manifest.get("merkle_root_hex")
+    ctx = {
+        "round_id": round_id,
+        "rdir": round_dir(round_id),
+        "manifest": manifest,
+        "stage": round_stage(manifest),
+        "seed_hex": seed_hex,
+        "S": parse_seed(seed_hex) if seed_hex else None,
+        "merkle_root_hex": root_hex,
+        "root": bytes.fromhex(root_hex) if root_hex else None,
+    }
+    with _context_lock:
+        _context_cache[round_id] = (stamp, ctx)
+    return ctx
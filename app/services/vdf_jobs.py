@@ -0,0 +1,264 @@
+# app/services/vdf_jobs.py
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from ..storage import read_json, round_dir, write_json
+from ..utils import ensure_dir, now_iso
+from ..vdf import vdf_advance
+
+# A job evaluates the VDF in a separate process and checkpoints
+# (iteration, y) to vdf/job.json roughly every CHECKPOINT_SECONDS, so an
+# interrupted job can be resumed instead of restarted. On success the worker
+# writes vdf/proof.json in the same shape the beacon handler used to.
+
+JOB_FILE = "job.json"
+# pid and start time of the worker, written by the server right after spawning
+# it, so a restarted server can tell a live worker from a recycled pid
+WORKER_FILE = "worker.json"
+CHECKPOINT_SECONDS = 1.0
+ACTIVE_STATUSES = ("queued", "running")
+
+_mp = multiprocessing.get_context("spawn")
+_processes: Dict[str, Any] = {}
+# held while a job is saved and its worker spawned, so get_job never sees a
+# queued job whose worker is about to start as interrupted
+_jobs_lock = threading.RLock()
+
+
+class VDFJobError(RuntimeError):
+    """Raised when a VDF job cannot be started, resumed or cancelled."""
+
+
+def _job_path(round_id: str) -> str:
+    return os.path.join(round_dir(round_id), "vdf", JOB_FILE)
+
+
+def _save(path: str, job: Dict[str, Any]) -> None:
+    job["updated_iso"] = now_iso()
+    tmp = path + ".tmp"
+    write_json(tmp, job)
+    os.replace(tmp, path)
+
+
+def _worker_path(round_id: str) -> str:
+    return os.path.join(round_dir(round_id), "vdf", WORKER_FILE)
+
+
+def _process_start(pid: int) -> Optional[int]:
+    """Start time of a process in clock ticks since boot, or None where /proc is unavailable."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # the command name may contain spaces; fields resume after its ')'
+    return int(stat.rsplit(b")", 1)[1].split()[19])
+
+
+def _pid_alive(pid: Optional[int], started: Optional[int] = None) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    # a recycled pid belongs to a process that started at another time
+    return started is None or _process_start(pid) in (None, started)
+
+
+def _live_worker_pid(round_id: str, job: Dict[str, Any]) -> Optional[int]:
+    """Pid of the job's worker if that process is still running."""
+    worker_path = _worker_path(round_id)
+    if os.path.isfile(worker_path):
+        worker = read_json(worker_path)
+        pid, started = worker.get("pid"), worker.get("started")
+    else:
+        # jobs started before worker.json existed only have the bare pid
+        pid, started = job.get("pid"), None
+    return pid if _pid_alive(pid, started) else None
+
+
+def _worker(job_path: str, proof_path: str) -> None:
+    job = read_json(job_path)
+    p = int(job["p_hex"], 16)
+    T = int(job["T"])
+    scheme = job["scheme"]
+    y = int(job["y_hex"], 16)
+    done = int(job["iteration"])
+    job.update({"status": "running", "pid": os.getpid()})
+    job.setdefault("started_iso", now_iso())
+    _save(job_path, job)
+
+    try:
+        chunk = 1
+        elapsed = float(job.get("elapsed_s") or 0.0)
+        last_checkpoint = time.monotonic()
+        while done < T:
+            step = min(chunk, T - done)
+            t0 = time.monotonic()
+            y = vdf_advance(scheme, y, step, p)
+            spent = time.monotonic() - t0
+            elapsed += spent
+            done += step
+            if spent < CHECKPOINT_SECONDS / 4:
+                chunk *= 2
+            if time.monotonic() - last_checkpoint >= CHECKPOINT_SECONDS or done == T:
+                job.update({"iteration": done, "y_hex": format(y, "x"), "elapsed_s": elapsed})
+                _save(job_path, job)
+                last_checkpoint = time.monotonic()
+
+        proof = {
+            "S_hex": job["S_hex"],
+            "T": T,
+            "scheme": scheme,
+            "p_hex": job["p_hex"],
+            "p_counter": job["p_counter"],
+            "y_hex": format(y, "x"),
+            "t1_iso": job["t1_iso"],
+            "eval_seconds": elapsed,
+        }
+        if job.get("calibration"):
+            proof["calibration"] = job["calibration"]
+        write_json(proof_path, proof)
+        job.update({"status": "completed", "finished_iso": now_iso()})
+        _save(job_path, job)
+    except Exception as exc:
+        job.update({"status": "failed", "error": str(exc)})
+        _save(job_path, job)
+
+
+def _spawn(round_id: str) -> None:
+    rdir = round_dir(round_id)
+    proc = _mp.Process(
+        target=_worker,
+        args=(_job_path(round_id), os.path.join(rdir, "vdf", "proof.json")),
+        daemon=True,
+    )
+    proc.start()
+    _processes[round_id] = proc
+    _save(_worker_path(round_id), {"pid": proc.pid, "started": _process_start(proc.pid)})
+
+
+def start_job(
+    round_id: str,
+    S_hex: str,
+    scheme: str,
+    T: int,
+    p: int,
+    p_counter: int,
+    x: int,
+    t1_iso: str,
+    calibration: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    with _jobs_lock:
+        existing = get_job(round_id)
+        if existing and existing["status"] in ACTIVE_STATUSES:
+            raise VDFJobError("VDF evaluation already in progress for this round")
+        vdf_dir = os.path.join(round_dir(round_id), "vdf")
+        ensure_dir(vdf_dir)
+        proof_path = os.path.join(vdf_dir, "proof.json")
+        if os.path.isfile(proof_path):
+            os.unlink(proof_path)
+        job = _new_job(round_id, S_hex, scheme, T, p, p_counter, x, t1_iso, calibration)
+        _save(_job_path(round_id), job)
+        _spawn(round_id)
+    return job
+
+
+def _new_job(
+    round_id: str,
+    S_hex: str,
+    scheme: str,
+    T: int,
+    p: int,
+    p_counter: int,
+    x: int,
+    t1_iso: str,
+    calibration: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+    job = {
+        "job_id": uuid.uuid4().hex,
+        "round_id": round_id,
+        "status": "queued",
+        "S_hex": S_hex,
+        "scheme": scheme,
+        "T": T,
+        "p_hex": format(p, "x"),
+        "p_counter": p_counter,
+        "x_hex": format(x % p, "x"),
+        "t1_iso": t1_iso,
+        "iteration": 0,
+        "y_hex": format(x % p, "x"),
+        "elapsed_s": 0.0,
+        "created_iso": now_iso(),
+    }
+    if calibration is not None:
+        job["calibration"] = calibration
+    return job
+
+
+def get_job(round_id: str) -> Optional[Dict[str, Any]]:
+    path = _job_path(round_id)
+    with _jobs_lock:
+        if not os.path.isfile(path):
+            return None
+        job = read_json(path)
+        proc = _processes.get(round_id)
+        if proc is not None and not proc.is_alive():
+            proc.join()
+            _processes.pop(round_id, None)
+            job = read_json(path)
+        # a queued job with no live worker (e.g. the server restarted before the
+        # worker recorded its pid) is interrupted too, so it can be resumed
+        alive = (proc is not None and proc.is_alive()) or _live_worker_pid(round_id, job) is not None
+        if job["status"] in ACTIVE_STATUSES and not alive:
+            job["status"] = "interrupted"
+            _save(path, job)
+        return job
+
+
+def cancel_job(round_id: str) -> Dict[str, Any]:
+    job = get_job(round_id)
+    if job is None:
+        raise VDFJobError("No VDF job for this round")
+    if job["status"] not in ACTIVE_STATUSES:
+        raise VDFJobError(f"VDF job is not running (status: {job['status']})")
+    proc = _processes.pop(round_id, None)
+    if proc is not None:
+        proc.terminate()
+        proc.join()
+    else:
+        pid = _live_worker_pid(round_id, job)
+        if pid is not None:
+            try:
+                os.kill(pid, 15)
+            except ProcessLookupError:
+                pass
+    # re-read: the worker may have completed just before termination
+    job = read_json(_job_path(round_id))
+    if job["status"] in ACTIVE_STATUSES:
+        job["status"] = "cancelled"
+        _save(_job_path(round_id), job)
+    return get_job(round_id) or job
+
+
+def resume_job(round_id: str) -> Dict[str, Any]:
+    with _jobs_lock:
+        job = get_job(round_id)
+        if job is None:
+            raise VDFJobError("No VDF job for this round")
+        if job["status"] not in ("interrupted", "cancelled", "failed"):
+            raise VDFJobError(f"VDF job cannot be resumed (status: {job['status']})")
+        job.pop("error", None)
+        job.update({"status": "queued", "pid": None})
+        _save(_job_path(round_id), job)
+        _spawn(round_id)
+    return job
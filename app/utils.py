@@ -21,19 +21,16 @@ def sha3_512(data: bytes) -> bytes:
 
 
 def hkdf_sha3(ikm: bytes, salt: bytes, length: int) -> bytes:
-    # RFC5869-style with HMAC-SHA3-256
-    prk = hmac.new(salt, ikm, hashlib.sha3_256).digest()
-    okm = b""
-    t = b""
-    c = 1
-    while len(okm) < length:
-        counter_bytes = c.to_bytes(4, "big")
-        t = hmac.new(prk, t + counter_bytes, hashlib.sha3_256).digest()
-        okm += t
-        c += 1
-        if c > 0xFFFFFFFF:
-            raise ValueError("hkdf_sha3 length exceeds counter capacity")
-    return okm[:length]
+    # RFC5869-style with HMAC-SHA3-256; see extractor.HKDFExtractor for streaming
+    from .extractor import HKDFExtractor
+    return HKDFExtractor.from_ikm(ikm, salt).read(0, length)
+
+
+_BYTE_BITS = [format(b, "08b") for b in range(256)]
+
+
+def bytes_to_bits(data: bytes) -> str:
+    return "".join([_BYTE_BITS[b] for b in data])
 
 
 def b64e(b: bytes) -> str:
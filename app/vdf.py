@@ -1,29 +1,118 @@
-
 from __future__ import annotations
-from .utils import sha3_256
+import hashlib
+import json
+import math
+import os
+import platform
+import time
+from typing import Dict, Optional, Tuple
+from .storage import DATA_ROOT
+from .utils import ensure_dir, now_iso, sha3_256
+
+# --- big-integer backend ---------------------------------------------------
+# Hot loops (Miller-Rabin, squaring and square-root chains) convert their
+# operands with BACKEND.mpz and exponentiate with BACKEND.powmod; results are
+# converted back to int, so outputs are identical across backends. The
+# backend is picked at import time: TSRNG_BIGINT=python|gmpy2|auto (default
+# auto uses gmpy2 when it is installed).
+
+class BigIntBackend:
+    name = "python"
+
+    def mpz(self, x: int):
+        return x
+
+    def powmod(self, a, e, m):
+        return pow(a, e, m)
+
+
+class GmpyBackend(BigIntBackend):
+    name = "gmpy2"
+
+    def __init__(self, gmpy2):
+        self._gmpy2 = gmpy2
+
+    def mpz(self, x: int):
+        return self._gmpy2.mpz(x)
+
+    def powmod(self, a, e, m):
+        return self._gmpy2.powmod(a, e, m)
+
+
+def load_backend(name: str = "auto") -> BigIntBackend:
+    if name in ("auto", "gmpy2"):
+        try:
+            import gmpy2
+        except ImportError:
+            if name == "gmpy2":
+                raise
+        else:
+            return GmpyBackend(gmpy2)
+    if name not in ("auto", "python"):
+        raise ValueError(f"Unknown big-int backend: {name}")
+    return BigIntBackend()
+
+
+BACKEND = load_backend(os.environ.get("TSRNG_BIGINT", "auto"))
+
+
+def set_backend(name: str) -> BigIntBackend:
+    global BACKEND
+    BACKEND = load_backend(name)
+    return BACKEND
+
+
+PRIME_CACHE_DIR = os.path.join(DATA_ROOT, "cache", "primes")
+CALIBRATION_PATH = os.path.join(DATA_ROOT, "cache", "vdf_calibration.json")
+CALIBRATION_SECONDS = 0.25
+SIEVE_LIMIT = 2000
+
+
+def _small_primes(limit: int) -> list[int]:
+    flags = bytearray([1]) * limit
+    flags[0:2] = b"\x00\x00"
+    for i in range(2, int(limit ** 0.5) + 1):
+        if flags[i]:
+            flags[i * i::i] = bytearray(len(range(i * i, limit, i)))
+    return [i for i in range(limit) if flags[i]]
+
+
+_SMALL_PRIMES = _small_primes(SIEVE_LIMIT)
+_SMALL_PRIMES_SET = frozenset(_SMALL_PRIMES)
+_SMALL_PRIMES_PRODUCT = math.prod(_SMALL_PRIMES)
+
+
+def _mr_witness(n: int, i: int) -> int:
+    # witnesses are derived from n itself, so the verdict is reproducible
+    nb = n.to_bytes((n.bit_length() + 7) // 8, "big")
+    h = hashlib.sha3_512(b"TSRNG/mr/" + nb + i.to_bytes(4, "big")).digest()
+    return int.from_bytes(h, "big") % (n - 3) + 2
+
 
 def _is_probable_prime(n: int, k: int = 16) -> bool:
     if n < 2:
         return False
-    small = [2,3,5,7,11,13,17,19,23,29,31,37]
-    for p in small:
-        if n % p == 0:
-            return n == p
+    if n < SIEVE_LIMIT:
+        return n in _SMALL_PRIMES_SET
+    if math.gcd(n, _SMALL_PRIMES_PRODUCT) != 1:
+        return False
     d = n - 1
     s = 0
     while d % 2 == 0:
         s += 1
         d //= 2
-    import secrets
-    for _ in range(k):
-        a = secrets.randbelow(n - 3) + 2
-        x = pow(a, d, n)
-        if x in (1, n - 1):
+    backend = BACKEND
+    nn = backend.mpz(n)
+    dd = backend.mpz(d)
+    for i in range(k):
+        a = backend.mpz(_mr_witness(n, i))
+        x = backend.powmod(a, dd, nn)
+        if x == 1 or x == nn - 1:
             continue
         skip = False
         for __ in range(s - 1):
-            x = pow(x, 2, n)
-            if x == n - 1:
+            x = x * x % nn
+            if x == nn - 1:
                 skip = True
                 break
         if skip:
@@ -31,32 +120,218 @@ def _is_probable_prime(n: int, k: int = 16) -> bool:
         return False
     return True
 
-def derive_prime(seed: bytes, bits: int = 512) -> int:
-    import hashlib
+def prime_candidate(seed: bytes, bits: int, ctr: int) -> int:
+    h = hashlib.sha3_512(seed + ctr.to_bytes(8, "big")).digest()
+    x = int.from_bytes(h, "big")
+    x |= 1
+    x |= (1 << (bits - 1))
+    r = x % 4
+    if r != 3:
+        x += (3 - r)
+    return x
+
+
+# (seed, bits) -> (p, counter); backed by one JSON file per key under
+# PRIME_CACHE_DIR so verifications across restarts skip the search.
+_prime_cache: Dict[Tuple[bytes, int], Tuple[int, int]] = {}
+
+
+def _prime_cache_path(seed: bytes, bits: int) -> str:
+    key = hashlib.sha3_256(seed + b"|" + str(bits).encode()).hexdigest()
+    return os.path.join(PRIME_CACHE_DIR, f"{key}.json")
+
+
+def _load_cached_prime(seed: bytes, bits: int) -> Optional[Tuple[int, int]]:
+    hit = _prime_cache.get((seed, bits))
+    if hit is not None:
+        return hit
+    path = _prime_cache_path(seed, bits)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        p = int(entry["p_hex"], 16)
+        ctr = int(entry["counter"])
+    except (OSError, ValueError, KeyError):
+        return None
+    # the cache is only a hint: the entry must reproduce from the seed
+    if prime_candidate(seed, bits, ctr) != p:
+        return None
+    _prime_cache[(seed, bits)] = (p, ctr)
+    return p, ctr
+
+
+def _store_cached_prime(seed: bytes, bits: int, p: int, ctr: int) -> None:
+    _prime_cache[(seed, bits)] = (p, ctr)
+    try:
+        ensure_dir(PRIME_CACHE_DIR)
+        path = _prime_cache_path(seed, bits)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"bits": bits, "counter": ctr, "p_hex": format(p, "x")}, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def derive_prime_with_counter(seed: bytes, bits: int = 512) -> Tuple[int, int]:
+    cached = _load_cached_prime(seed, bits)
+    if cached is not None:
+        return cached
     ctr = 0
     while True:
-        h = hashlib.sha3_512(seed + ctr.to_bytes(8, "big")).digest()
-        x = int.from_bytes(h, "big")
-        x |= 1
-        x |= (1 << (bits - 1))
-        r = x % 4
-        if r != 3:
-            x += (3 - r)
+        x = prime_candidate(seed, bits, ctr)
         if _is_probable_prime(x):
-            return x
+            _store_cached_prime(seed, bits, x, ctr)
+            return x, ctr
         ctr += 1
 
+def derive_prime(seed: bytes, bits: int = 512) -> int:
+    return derive_prime_with_counter(seed, bits)[0]
+
+
+def check_prime_counter(seed: bytes, bits: int, ctr: int, p: int) -> bool:
+    """Check a recorded counter: one candidate and one primality test, no search."""
+    if ctr < 0 or prime_candidate(seed, bits, ctr) != p:
+        return False
+    return _is_probable_prime(p)
+
 def vdf_encode_sloth(x: int, T: int, p: int) -> int:
-    y = x % p
-    for _ in range(T):
-        y = (y * y) % p
-    return y
+    return vdf_advance(VDF_SCHEME_SQUARING, x % p, T, p)
 
 def vdf_verify_sloth(x: int, y: int, T: int, p: int) -> bool:
-    yy = x % p
+    return vdf_encode_sloth(x, T, p) == y
+
+# Schemes recorded as "scheme" in vdf/proof.json. Proofs written before the
+# field existed use iterated squaring, whose verification repeats the whole
+# evaluation. sloth_sqrt evaluates with T modular square roots (each a full
+# exponentiation, p = 3 mod 4) and verifies with T plain squarings.
+VDF_SCHEME_SQUARING = "iterated_squaring"
+VDF_SCHEME_SLOTH = "sloth_sqrt"
+VDF_SCHEMES = (VDF_SCHEME_SQUARING, VDF_SCHEME_SLOTH)
+
+
+def _sloth_sqrt(x, p, exp, powmod):
+    # square root permutation: quadratic residues map to even roots,
+    # non-residues x map to odd roots of -x
+    r = powmod(x, exp, p)
+    if r * r % p == x:
+        return r if r % 2 == 0 else p - r
+    return r if r % 2 == 1 else p - r
+
+
+def _sloth_square(y, p):
+    sq = y * y % p
+    return sq if y % 2 == 0 else (p - sq) % p
+
+
+def vdf_eval_sloth_sqrt(x: int, T: int, p: int) -> int:
+    return vdf_advance(VDF_SCHEME_SLOTH, x % p, T, p)
+
+
+def vdf_verify_sloth_sqrt(x: int, y: int, T: int, p: int) -> bool:
+    if p % 4 != 3 or not 0 <= y < p:
+        return False
+    pp = BACKEND.mpz(p)
+    xx = BACKEND.mpz(y)
     for _ in range(T):
-        yy = (yy * yy) % p
-    return yy == y
+        xx = _sloth_square(xx, pp)
+    return int(xx) == x % p
+
+
+def vdf_advance(scheme: str, y: int, steps: int, p: int) -> int:
+    """Run `steps` more evaluation steps from an intermediate value `y`."""
+    backend = BACKEND
+    pp = backend.mpz(p)
+    yy = backend.mpz(y)
+    if scheme == VDF_SCHEME_SLOTH:
+        if p % 4 != 3:
+            raise ValueError("sloth requires a prime p = 3 mod 4")
+        exp = backend.mpz((p + 1) // 4)
+        powmod = backend.powmod
+        for _ in range(steps):
+            yy = _sloth_sqrt(yy, pp, exp, powmod)
+        return int(yy)
+    if scheme == VDF_SCHEME_SQUARING:
+        for _ in range(steps):
+            yy = (yy * yy) % pp
+        return int(yy)
+    raise ValueError(f"Unsupported VDF scheme: {scheme}")
+
+
+def vdf_eval(scheme: str, x: int, T: int, p: int) -> int:
+    return vdf_advance(scheme, x % p, T, p)
+
+
+def vdf_verify(scheme: str, x: int, y: int, T: int, p: int) -> bool:
+    if scheme == VDF_SCHEME_SLOTH:
+        return vdf_verify_sloth_sqrt(x, y, T, p)
+    if scheme == VDF_SCHEME_SQUARING:
+        return vdf_verify_sloth(x, y, T, p)
+    raise ValueError(f"Unsupported VDF scheme: {scheme}")
+
+# --- calibration -----------------------------------------------------------
+# Rates are measured per (host, backend, scheme, modulus size) on a fixed
+# prime and cached in CALIBRATION_PATH, so choosing T from a target delay
+# is a lookup.
+
+def _calibration_key(scheme: str, bits: int) -> str:
+    return f"{platform.node() or 'localhost'}:{BACKEND.name}:{scheme}:{bits}"
+
+
+def _read_calibration() -> Dict[str, dict]:
+    try:
+        with open(CALIBRATION_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def measure_vdf_rate(scheme: str, bits: int, seconds: float = CALIBRATION_SECONDS) -> float:
+    p = derive_prime(b"TSRNG/calibration", bits)
+    y = int.from_bytes(sha3_256(b"TSRNG/calibration/x"), "big") % p
+    steps = 1
+    done = 0
+    elapsed = 0.0
+    while elapsed < seconds:
+        t0 = time.perf_counter()
+        y = vdf_advance(scheme, y, steps, p)
+        elapsed += time.perf_counter() - t0
+        done += steps
+        steps *= 2
+    return done / elapsed
+
+
+def vdf_calibration(scheme: str, bits: int, refresh: bool = False) -> dict:
+    """Return the cached steps-per-second entry for a scheme and modulus size."""
+    key = _calibration_key(scheme, bits)
+    table = _read_calibration()
+    entry = table.get(key)
+    if entry is None or refresh:
+        entry = {
+            "scheme": scheme,
+            "modulus_bits": bits,
+            "host": key.split(":", 1)[0],
+            "backend": BACKEND.name,
+            "steps_per_second": measure_vdf_rate(scheme, bits),
+            "measured_iso": now_iso(),
+        }
+        table = _read_calibration()
+        table[key] = entry
+        try:
+            ensure_dir(os.path.dirname(CALIBRATION_PATH))
+            tmp = CALIBRATION_PATH + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(table, f, indent=2)
+            os.replace(tmp, CALIBRATION_PATH)
+        except OSError:
+            pass
+    return entry
+
+
+def T_for_delay(scheme: str, bits: int, target_delay_ms: int) -> Tuple[int, dict]:
+    entry = vdf_calibration(scheme, bits)
+    T = max(1, round(entry["steps_per_second"] * target_delay_ms / 1000.0))
+    return T, entry
 
 def int_from_seed(S: bytes, p: int) -> int:
     return int.from_bytes(sha3_256(S), "big") % p
@@ -4,9 +4,19 @@ import json
 import zipfile
 from typing import Dict, Tuple
 
-from .merkle import verify_proof
-from .utils import hkdf_sha3, parse_seed, sha3_512
-from .vdf import derive_prime, int_from_seed, vdf_verify_sloth
+from .merkle import MULTIPROOF_FILE, MULTIPROOF_VERSION, verify_multiproof, verify_proof
+from .extractor import EXTRACTOR_HKDF, EXTRACTOR_MODES, Extractor, make_extractor
+from .utils import parse_seed, sha3_512
+from .vdf import VDF_SCHEME_SQUARING, VDF_SCHEMES, check_prime_counter, derive_prime, int_from_seed, vdf_verify
+
+
+def _output_matches(z: zipfile.ZipFile, extractor: Extractor, length: int) -> bool:
+    # compare output.bin chunk by chunk instead of materialising both copies
+    with z.open("output.bin") as f:
+        for chunk in extractor.iter_bytes(length):
+            if f.read(len(chunk)) != chunk:
+                return False
+    return True
 
 
 def verify_package(zip_path: str) -> Tuple[bool, str]:
@@ -14,9 +24,9 @@ def verify_package(zip_path: str) -> Tuple[bool, str]:
         try:
             manifest = json.loads(z.read("manifest.json"))
             merkle_root = bytes.fromhex(manifest["merkle_root_hex"])
-            _ = json.loads(z.read("leaves_meta.json"))
+            leaves_meta = json.loads(z.read("leaves_meta.json"))
             selected = json.loads(z.read("selected.json"))
-            out_bytes = z.read("output.bin")
+            out_size = z.getinfo("output.bin").file_size
         except KeyError as e:
             return False, f"Missing entry in zip: {e}"
 
@@ -30,30 +40,50 @@ def verify_package(zip_path: str) -> Tuple[bool, str]:
         p = int(vdf_info["p_hex"], 16)
         y = int(vdf_info["y_hex"], 16)
         T = int(vdf_info["T"])
-        expected_prime = derive_prime(b"TSRNG/modulus/" + S, bits=manifest.get("modulus_bits") or p.bit_length())
-        if p != expected_prime:
+        modulus_seed = b"TSRNG/modulus/" + S
+        modulus_bits = manifest.get("modulus_bits") or p.bit_length()
+        if vdf_info.get("p_counter") is not None:
+            # the recorded counter lets us test a single candidate instead of searching
+            if not check_prime_counter(modulus_seed, modulus_bits, int(vdf_info["p_counter"]), p):
+                return False, "VDF prime mismatch"
+        elif p != derive_prime(modulus_seed, bits=modulus_bits):
             return False, "VDF prime mismatch"
+        # proofs without a "scheme" field predate sloth_sqrt
+        scheme = vdf_info.get("scheme", VDF_SCHEME_SQUARING)
+        if scheme not in VDF_SCHEMES:
+            return False, f"Unsupported VDF scheme: {scheme}"
         x = int_from_seed(S, p)
-        if not vdf_verify_sloth(x, y, T, p):
+        if not vdf_verify(scheme, x, y, T, p):
             return False, "VDF verification failed"
         if vdf_info.get("S_hex") and vdf_info["S_hex"].lower().lstrip("0x") != S.hex():
             return False, "Seed mismatch between manifest and VDF proof"
 
         leaf_cache: Dict[tuple[str, int], bytes] = {}
-        for stream, idxs in selected["indices"].items():
-            for i in idxs:
-                idx_int = int(i)
-                leaf_b = z.read(f"leaves/{stream}/{idx_int}.leaf")
-                proof = json.loads(z.read(f"proofs/{stream}/{idx_int}.proof"))
-                siblings = [(bytes.fromhex(h), d) for h, d in proof]
-                if not verify_proof(leaf_b, siblings, merkle_root):
-                    return False, f"Merkle proof failed for {stream}:{idx_int}"
-                leaf_cache[(stream, idx_int)] = leaf_b
+        proof_format = selected.get("proof_format", "per_leaf")
+        if proof_format == "multiproof":
+            ok, msg = _verify_multiproof_entries(z, selected["indices"], leaves_meta, merkle_root, leaf_cache)
+            if not ok:
+                return False, msg
+        elif proof_format == "per_leaf":
+            for stream, idxs in selected["indices"].items():
+                for i in idxs:
+                    idx_int = int(i)
+                    leaf_b = z.read(f"leaves/{stream}/{idx_int}.leaf")
+                    proof = json.loads(z.read(f"proofs/{stream}/{idx_int}.proof"))
+                    siblings = [(bytes.fromhex(h), d) for h, d in proof]
+                    if not verify_proof(leaf_b, siblings, merkle_root):
+                        return False, f"Merkle proof failed for {stream}:{idx_int}"
+                    leaf_cache[(stream, idx_int)] = leaf_b
+        else:
+            return False, f"Unsupported proof format: {proof_format}"
 
         flat_leaves = [leaf_cache[(stream, int(i))] for stream, idxs in selected["indices"].items() for i in idxs]
         r_raw = sha3_512(b"".join(flat_leaves))
-        expected = hkdf_sha3(r_raw, S, len(out_bytes))
-        if expected != out_bytes:
+        # manifests without the field predate the counter-mode extractor
+        mode = manifest.get("extractor_mode", EXTRACTOR_HKDF)
+        if mode not in EXTRACTOR_MODES:
+            return False, f"Unsupported extractor mode: {mode}"
+        if not _output_matches(z, make_extractor(mode, r_raw, S), out_size):
             return False, "Extractor mismatch"
 
         raw_verified = False
@@ -83,3 +113,44 @@ def verify_package(zip_path: str) -> Tuple[bool, str]:
 
         msg = "OK (raw verified)" if raw_verified else "OK"
         return True, msg
+
+
+def _verify_multiproof_entries(
+    z: zipfile.ZipFile,
+    indices: Dict[str, list],
+    leaves_meta: Dict[str, int],
+    merkle_root: bytes,
+    leaf_cache: Dict[tuple[str, int], bytes],
+) -> Tuple[bool, str]:
+    try:
+        multiproof = json.loads(z.read(f"proofs/{MULTIPROOF_FILE}"))
+    except KeyError:
+        return False, "Missing Merkle multiproof"
+    if multiproof.get("version") != MULTIPROOF_VERSION:
+        return False, f"Unsupported multiproof version: {multiproof.get('version')}"
+
+    # offsets come from leaves_meta, which lists streams in commit order
+    offsets: Dict[str, int] = {}
+    leaf_count = 0
+    for stream, count in leaves_meta.items():
+        offsets[stream] = leaf_count
+        leaf_count += int(count)
+    if int(multiproof.get("leaf_count", -1)) != leaf_count:
+        return False, "Multiproof leaf count does not match leaves_meta"
+
+    items: list[tuple[int, bytes]] = []
+    for stream, idxs in indices.items():
+        if stream not in offsets:
+            return False, f"Unknown stream in selection: {stream}"
+        for i in idxs:
+            idx_int = int(i)
+            if not 0 <= idx_int < int(leaves_meta[stream]):
+                return False, f"Selected index out of range for {stream}:{idx_int}"
+            leaf_b = z.read(f"leaves/{stream}/{idx_int}.leaf")
+            leaf_cache[(stream, idx_int)] = leaf_b
+            items.append((offsets[stream] + idx_int, leaf_b))
+
+    siblings = [bytes.fromhex(h) for h in multiproof.get("siblings", [])]
+    if not verify_multiproof(items, siblings, leaf_count, merkle_root):
+        return False, "Merkle multiproof failed"
+    return True, "OK"
@@ -0,0 +1,82 @@
+"""Compare the bit-statistics kernels behind run_basic_tests.
+
+Runs the reference bit loop, the byte-table kernel ("python") and the numpy
+kernel on the same random data at several sizes, checks that the results
+are identical and prints the time per call relative to the bit loop. Then
+times run_basic_tests inline against the sharded process-pool path at every
+size (the threshold is bypassed) and reports the smallest size at which the
+shards win: the measurement behind PARALLEL_THRESHOLD.
+
+Usage: python -m benchmarks.bench_analysis [bit counts...]
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+
+from app.analysis import randomness
+from app.pool import shared_pool
+
+
+def _available_kernels() -> dict:
+    kernels = {"bitwise": randomness._bit_stats_bitwise, "python": randomness._bit_stats_python}
+    if randomness.np is None:
+        print("numpy not installed; the numpy kernel is skipped")
+    else:
+        kernels["numpy"] = randomness._bit_stats_numpy
+    return kernels
+
+
+def bench_kernels(sizes: list[int], rounds: int = 3, block_size: int = 128) -> None:
+    kernels = _available_kernels()
+    print(f"{'bits':>10} {'kernel':>8} {'seconds':>9} {'speedup':>8}")
+    for bits in sizes:
+        data, bit_length = randomness.trim_to_bits(os.urandom((bits + 7) // 8), bits)
+        reference = None
+        base_time = None
+        for name, kernel in kernels.items():
+            t0 = time.perf_counter()
+            for _ in range(rounds):
+                result = kernel(data, bit_length, block_size)
+            dt = (time.perf_counter() - t0) / rounds
+            if reference is None:
+                reference, base_time = result, dt
+            elif result != reference:
+                raise SystemExit(f"kernel {name} diverged at {bits} bits")
+            print(f"{bits:>10} {name:>8} {dt:>9.4f} {base_time / dt:>7.1f}x")
+
+
+def bench_sharded(sizes: list[int], workers: int | None = None, rounds: int = 3,
+                  block_size: int = 128) -> None:
+    workers = min(workers or os.cpu_count() or 1, randomness.MAX_WORKERS)
+    # start the pool outside the timings, as a long-running server would
+    shared_pool().submit(int).result()
+    print(f"{'bits':>10} {'inline':>9} {'sharded':>9} {'workers':>8}")
+    break_even = None
+    for bits in sizes:
+        data, bit_length = randomness.trim_to_bits(os.urandom((bits + 7) // 8), bits)
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            inline = randomness.run_basic_tests(data, bit_length, block_size, workers=1)
+        t1 = time.perf_counter()
+        for _ in range(rounds):
+            sharded = randomness._sharded_shm(data, bit_length, block_size, None, workers).finalize()
+        t2 = time.perf_counter()
+        if sharded != inline:
+            raise SystemExit(f"sharded analysis diverged at {bits} bits")
+        if break_even is None and t2 - t1 < t1 - t0:
+            break_even = bits
+        print(f"{bits:>10} {(t1 - t0) / rounds:>9.4f} {(t2 - t1) / rounds:>9.4f} {workers:>8}")
+    print(f"break-even: {break_even or 'not reached'} bits "
+          f"(PARALLEL_THRESHOLD = {randomness.PARALLEL_THRESHOLD})")
+
+
+def main(argv: list[str]) -> None:
+    sizes = [int(x) for x in argv] or [100_000, 1_000_000, 8_000_000]
+    bench_kernels(sizes)
+    bench_sharded([int(x) for x in argv] or [1 << k for k in range(21, 28)])
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,116 @@
+"""Compare the batched/parallel Merkle builder with the per-node reference loop.
+
+Also times the commit path (MerkleAccumulator streaming into a tree file)
+against build_merkle + write_tree_file, and reports how much memory the
+retained levels take: lists of bytes objects (reference) versus one
+contiguous buffer per level.
+
+Usage: python -m benchmarks.bench_merkle [leaf counts...]
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from app.merkle import (
+    MerkleAccumulator,
+    TreeFileWriter,
+    _hash_leaf,
+    _hash_node,
+    build_merkle,
+    write_tree_file,
+)
+
+
+def reference_levels(leaves: list[bytes]) -> list[list[bytes]]:
+    level = [_hash_leaf(d) for d in leaves]
+    levels = [level]
+    while len(level) > 1:
+        nxt = []
+        for i in range(0, len(level), 2):
+            a = level[i]
+            b = level[i+1] if i+1 < len(level) else level[i]
+            nxt.append(_hash_node(a, b))
+        levels.append(nxt)
+        level = nxt
+    return levels
+
+
+def reference_root(leaves: list[bytes]) -> bytes:
+    return reference_levels(leaves)[-1][0]
+
+
+def _retained_mib(fn, *args) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    out = fn(*args)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del out
+    return (after - before) / (1 << 20)
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def commit_path(leaves: list[bytes], path: str) -> bytes:
+    # what rounds.commit_round does
+    writer = TreeFileWriter(path, len(leaves))
+    accumulator = MerkleAccumulator(sink=writer)
+    accumulator.add_many(leaves)
+    root = accumulator.finish()
+    writer.close()
+    return root
+
+
+def build_and_write(leaves: list[bytes], path: str) -> bytes:
+    root, levels = build_merkle(leaves)
+    write_tree_file(path, levels)
+    return root
+
+
+def bench_commit(sizes: list[int]) -> None:
+    print(f"{'leaves':>10} {'build+write_s':>14} {'commit_s':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tree.bin")
+        for n in sizes:
+            leaves = [os.urandom(64) for _ in range(n)]
+            built, t_built = _timed(build_and_write, leaves, path)
+            committed, t_commit = _timed(commit_path, leaves, path)
+            if built != committed:
+                raise SystemExit(f"commit root mismatch at n={n}")
+            print(f"{n:>10} {t_built:>14.3f} {t_commit:>9.3f}")
+
+
+def main(argv: list[str]) -> None:
+    sizes = [int(x) for x in argv] or [10_000, 100_000, 1_000_000]
+    print(f"cpus={os.cpu_count()}")
+    print(f"{'leaves':>10} {'reference_s':>12} {'batched_s':>10} {'parallel_s':>11} {'speedup':>8}")
+    for n in sizes:
+        leaves = [os.urandom(64) for _ in range(n)]
+        ref, t_ref = _timed(reference_root, leaves)
+        (batched, _), t_batched = _timed(build_merkle, leaves, 1)
+        (parallel, _), t_par = _timed(build_merkle, leaves, None)
+        if not ref == batched == parallel:
+            raise SystemExit(f"root mismatch at n={n}")
+        best = min(t_batched, t_par)
+        print(f"{n:>10} {t_ref:>12.3f} {t_batched:>10.3f} {t_par:>11.3f} {t_ref / best:>7.2f}x")
+    print()
+    bench_commit(sizes)
+    print()
+    print(f"{'leaves':>10} {'lists_MiB':>10} {'buffers_MiB':>12}")
+    for n in sizes:
+        leaves = [os.urandom(64) for _ in range(n)]
+        ref_mib = _retained_mib(reference_levels, leaves)
+        compact_mib = _retained_mib(build_merkle, leaves, 1)
+        print(f"{n:>10} {ref_mib:>10.2f} {compact_mib:>12.2f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,86 @@
+"""VDF benchmarks.
+
+Times a cold prime search (sieve + deterministic Miller-Rabin), a cache hit,
+and a verifier-style check of the recorded counter at several modulus sizes,
+then compares the available big-integer backends on squaring chains,
+sloth square-root steps and primality tests.
+
+Usage: python -m benchmarks.bench_vdf [bits...]
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+
+from app import vdf
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def bench_primes(sizes: list[int], rounds: int = 3) -> None:
+    print(f"{'bits':>6} {'search_s':>9} {'cached_s':>9} {'check_s':>8}")
+    for bits in sizes:
+        t_search = t_cached = t_check = 0.0
+        for _ in range(rounds):
+            seed = os.urandom(32)
+            (p, ctr), dt = _timed(vdf.derive_prime_with_counter, seed, bits)
+            t_search += dt
+            vdf._prime_cache.clear()
+            _, dt = _timed(vdf.derive_prime_with_counter, seed, bits)
+            t_cached += dt
+            ok, dt = _timed(vdf.check_prime_counter, seed, bits, ctr, p)
+            t_check += dt
+            assert ok
+        print(f"{bits:>6} {t_search / rounds:>9.4f} {t_cached / rounds:>9.5f} {t_check / rounds:>8.4f}")
+
+
+def _available_backends() -> list[str]:
+    names = ["python"]
+    try:
+        vdf.load_backend("gmpy2")
+    except ImportError:
+        print("gmpy2 not installed; only the python backend is measured")
+    else:
+        names.append("gmpy2")
+    return names
+
+
+def bench_backends(sizes: list[int], squarings: int = 20_000, roots: int = 50, mr_rounds: int = 20) -> None:
+    names = _available_backends()
+    print(f"{'bits':>6} {'backend':>8} {'square_s':>9} {'sloth_s':>8} {'mr_s':>7}")
+    for bits in sizes:
+        p = vdf.derive_prime(b"TSRNG/bench", bits)
+        x = int.from_bytes(os.urandom(bits // 8), "big") % p
+        reference = None
+        for name in names:
+            vdf.set_backend(name)
+            y_sq, t_sq = _timed(vdf.vdf_advance, vdf.VDF_SCHEME_SQUARING, x, squarings, p)
+            y_sl, t_sl = _timed(vdf.vdf_advance, vdf.VDF_SCHEME_SLOTH, x, roots, p)
+            t0 = time.perf_counter()
+            for _ in range(mr_rounds):
+                vdf._is_probable_prime(p)
+            t_mr = (time.perf_counter() - t0) / mr_rounds
+            if reference is None:
+                reference = (y_sq, y_sl)
+            elif reference != (y_sq, y_sl):
+                raise SystemExit(f"backend {name} diverged at {bits} bits")
+            print(f"{bits:>6} {name:>8} {t_sq:>9.4f} {t_sl:>8.4f} {t_mr:>7.4f}")
+    vdf.set_backend(os.environ.get("TSRNG_BIGINT", "auto"))
+
+
+def main(argv: list[str]) -> None:
+    sizes = [int(x) for x in argv] or [512, 1024, 2048]
+    vdf.PRIME_CACHE_DIR = tempfile.mkdtemp(prefix="tsrng-bench-primes-")
+    bench_primes(sizes)
+    print()
+    bench_backends(sizes)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
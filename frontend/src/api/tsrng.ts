@@ -22,6 +22,24 @@ export async function postBeacon(roundId: string, payload: { S_hex: string; vdf_
   return res.data;
 }
 
+export async function getVdfJob(roundId: string) {
+  const res = await api.get(`/rounds/${roundId}/vdf/job`);
+  return res.data as { status: string; iteration: number; T: number; progress: number; error?: string | null };
+}
+
+export async function waitForVdf(roundId: string, intervalMs = 500) {
+  for (;;) {
+    const job = await getVdfJob(roundId);
+    if (job.status === "completed") {
+      return job;
+    }
+    if (job.status !== "queued" && job.status !== "running") {
+      throw new Error(`VDF job ${job.status}${job.error ? `: ${job.error}` : ""}`);
+    }
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+}
+
 export async function finalizeRound(roundId: string, payload: { output_bits: number }) {
   const res = await api.post(`/rounds/${roundId}/finalize`, payload);
   return res.data as { analysis: any; output_hex: string };
@@ -7,6 +7,7 @@ import merkleImg from "../assets/merkle_placeholder.svg";
 import {
   collectAndCommit,
   postBeacon,
+  waitForVdf,
   finalizeRound,
   generateRange,
   fetchOutputText,
@@ -103,6 +104,7 @@ function GeneratePage() {
       setProgress("Установка маяка…");
       setStage(1);
       await postBeacon(newRoundId, { S_hex: seed, vdf_T: 50, modulus_bits: 512 });
+      await waitForVdf(newRoundId);
 
       const bitsToRequest = includeMillionBits ? 1_000_000 : outputBits;
       setProgress(`Финализация раунда (${bitsToRequest.toLocaleString()} бит)…`);
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import time
+
+import pytest
+
+# app modules resolve their data paths at import time
+os.environ.setdefault("TSRNG_DATA", tempfile.mkdtemp(prefix="tsrng-tests-"))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    from app.main import app
+
+    return TestClient(app)
+
+
+def _ok(resp):
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+@pytest.fixture(scope="session")
+def make_round(client):
+    """Factory for demo rounds with the beacon set and the VDF evaluated."""
+
+    def make():
+        rid = _ok(client.post("/rounds/demo/commit", json={"leaves_per_stream": 16}))["round_id"]
+        _ok(client.post(f"/rounds/{rid}/beacon", json={"S_hex": "ab" * 32, "vdf_T": 20}))
+        deadline = time.monotonic() + 60
+        while _ok(client.get(f"/rounds/{rid}/vdf/job"))["status"] != "completed":
+            assert time.monotonic() < deadline, "VDF job did not finish"
+            time.sleep(0.05)
+        return rid
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def beaconed_round(make_round):
+    return make_round()
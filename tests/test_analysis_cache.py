@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from app.services import analysis_cache
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(analysis_cache, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(analysis_cache, "_cache_bytes", None)
+    return tmp_path
+
+
+def _compute(calls, value):
+    def compute():
+        calls.append(value)
+        return {"value": value}
+
+    return compute
+
+
+def test_hit_after_miss(cache_dir):
+    calls = []
+    sha = "ab" * 32
+    assert analysis_cache.cached_analysis(sha, 800, _compute(calls, 1)) == ({"value": 1}, False)
+    assert analysis_cache.cached_analysis(sha, 800, _compute(calls, 2)) == ({"value": 1}, True)
+    # any part of the key changes the entry
+    assert analysis_cache.cached_analysis(sha, 801, _compute(calls, 3))[1] is False
+    assert analysis_cache.cached_analysis(sha, 800, _compute(calls, 4), block_size=64)[1] is False
+    assert analysis_cache.cached_analysis(sha, 800, _compute(calls, 5), screening=True)[1] is False
+    assert analysis_cache.cached_analysis(sha, 800, _compute(calls, 6), tests=["runs"])[1] is False
+    assert calls == [1, 3, 4, 5, 6]
+
+
+def test_unreadable_entry_is_a_miss(cache_dir):
+    key = analysis_cache.cache_key("cd" * 32, 8)
+    (cache_dir / f"{key}.json").write_text("{not json")
+    assert analysis_cache.lookup(key) is None
+    assert analysis_cache.cached_analysis("cd" * 32, 8, lambda: {"ok": True}) == ({"ok": True}, False)
+    assert analysis_cache.lookup(key) == {"ok": True}
+
+
+def test_unwritable_cache_does_not_fail(tmp_path, monkeypatch):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    monkeypatch.setattr(analysis_cache, "CACHE_DIR", str(blocker / "cache"))
+    assert analysis_cache.cached_analysis("ef" * 32, 8, lambda: {"ok": 1}) == ({"ok": 1}, False)
+    assert analysis_cache.evict() == 0
+
+
+def test_least_recently_used_entries_are_evicted(cache_dir, monkeypatch):
+    payload = {"blob": "x" * 100}
+    for i in range(3):
+        analysis_cache.store(f"k{i}", payload)
+        os.utime(cache_dir / f"k{i}.json", ns=(i * 10**9, i * 10**9))
+    entry_size = os.path.getsize(cache_dir / "k0.json")
+    analysis_cache.lookup("k0")  # touch: k1 is now the oldest
+    monkeypatch.setattr(analysis_cache, "CACHE_MAX_BYTES", 3 * entry_size)
+    analysis_cache.store("k3", payload)
+    assert sorted(os.listdir(cache_dir)) == ["k0.json", "k2.json", "k3.json"]
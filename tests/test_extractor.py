@@ -0,0 +1,76 @@
+import hashlib
+import hmac
+
+import pytest
+
+from app import extractor
+from app.extractor import (
+    BLOCK_SIZE,
+    CTR_DOMAIN,
+    EXTRACTOR_CTR,
+    CounterExtractor,
+    HKDFExtractor,
+    extractor_from_state,
+    make_extractor,
+    output_chunks,
+)
+from app.utils import hkdf_sha3
+
+IKM = b"input key material" * 3
+SALT = b"salt"
+
+
+def _hkdf_reference(ikm, salt, length):
+    # the original one-shot hkdf_sha3
+    prk = hmac.new(salt, ikm, hashlib.sha3_256).digest()
+    okm, t, c = b"", b"", 1
+    while len(okm) < length:
+        t = hmac.new(prk, t + c.to_bytes(4, "big"), hashlib.sha3_256).digest()
+        okm += t
+        c += 1
+    return okm[:length]
+
+
+def test_hkdf_matches_original():
+    for length in (0, 1, 31, 32, 33, 1000):
+        assert hkdf_sha3(IKM, SALT, length) == _hkdf_reference(IKM, SALT, length)
+
+
+def test_hkdf_reads_are_seekable():
+    full = _hkdf_reference(IKM, SALT, 40 * BLOCK_SIZE + 7)
+    ext = HKDFExtractor.from_ikm(IKM, SALT, checkpoint_interval=4)
+    for offset, length in ((0, 5), (3, 64), (100, 1), (31, 2), (500, 300), (len(full) - 7, 7)):
+        assert ext.read(offset, length) == full[offset:offset + length]
+    assert b"".join(ext.iter_bytes(len(full), chunk_size=100)) == full
+    assert b"".join(ext.iter_bytes(50, offset=17, chunk_size=8)) == full[17:67]
+
+
+@pytest.mark.parametrize("length", [0, 1, 32, 100, 1000])
+def test_hkdf_state_resumes_output(length):
+    full = _hkdf_reference(IKM, SALT, length + 500)
+    state = HKDFExtractor.from_ikm(IKM, SALT).state(length)
+    resumed = extractor_from_state(state)
+    assert resumed.read(length, 500) == full[length:]
+    assert resumed.read(0, length) == full[:length]
+
+
+def test_counter_blocks_follow_the_spec():
+    ext = make_extractor(EXTRACTOR_CTR, IKM, SALT)
+    prk = hmac.new(SALT, IKM, hashlib.sha3_256).digest()
+    expected = b"".join(hashlib.sha3_256(CTR_DOMAIN + prk + i.to_bytes(8, "big")).digest() for i in range(5))
+    assert ext.read(0, 150) == expected[:150]
+    assert ext.read(37, 60) == expected[37:97]
+    assert extractor_from_state(ext.state(150)).read(0, 160) == expected
+    with pytest.raises(ValueError):
+        make_extractor("aes_ctr", IKM, SALT)
+
+
+def test_pooled_counter_expand_matches_read(monkeypatch):
+    monkeypatch.setattr(extractor, "PARALLEL_THRESHOLD", 4)
+    monkeypatch.setattr(extractor, "PARALLEL_SPAN", 3)
+    ext = CounterExtractor.from_ikm(IKM, SALT)
+    for length in (1, 127, 128, 129, 1000):
+        expected = ext.read(0, length)
+        assert ext.expand(length, workers=1) == expected
+        assert ext.expand(length, workers=2) == expected
+        assert b"".join(output_chunks(ext, length)) == expected
@@ -0,0 +1,114 @@
+import hashlib
+from itertools import islice
+
+import pytest
+
+from app import indexing
+from app.indexing import (
+    DEFAULT_SAMPLER,
+    DENSE_MAX_RANGE,
+    SAMPLER_FISHER_YATES,
+    SAMPLER_PRP,
+    SAMPLER_REJECTION,
+    FeistelPermutation,
+    choose_sampler,
+    iter_unique_range,
+    prng_blocks,
+    sample_unique,
+    unique_range,
+)
+
+ARGS = (b"domain|", b"S" * 32, b"R" * 32)
+
+
+def _v1_reference(count, range_size, domain, S, root):
+    # the original sampler, one hash per four words, kept verbatim
+    out, seen, counter = [], set(), 0
+    threshold = ((1 << 64) // range_size) * range_size
+    while len(out) < count:
+        blk = hashlib.sha3_256(domain + S + root + counter.to_bytes(8, "big")).digest()
+        counter += 1
+        for i in range(0, 32, 8):
+            rnd = int.from_bytes(blk[i:i + 8], "big")
+            if rnd >= threshold or rnd % range_size in seen:
+                continue
+            seen.add(rnd % range_size)
+            out.append(rnd % range_size)
+            if len(out) >= count:
+                break
+    return out
+
+
+@pytest.mark.parametrize("count, range_size", [(1, 1), (10, 10), (50, 1000), (300, 2**40)])
+def test_v1_draws_are_reproducible(count, range_size):
+    assert sample_unique(count, range_size, *ARGS, version=SAMPLER_REJECTION) == _v1_reference(
+        count, range_size, *ARGS
+    )
+
+
+@pytest.mark.parametrize("count, range_size", [(1, 1), (10, 10), (50, 100), (50, 10**6), (20, 2**80)])
+def test_v2_draws_unique_values_in_range(count, range_size):
+    numbers = sample_unique(count, range_size, *ARGS, version=SAMPLER_FISHER_YATES)
+    assert len(numbers) == len(set(numbers)) == count
+    assert all(0 <= n < range_size for n in numbers)
+    assert numbers == sample_unique(count, range_size, *ARGS, version=SAMPLER_FISHER_YATES)
+
+
+def test_v2_dense_and_sparse_state_agree(monkeypatch):
+    dense = sample_unique(200, 400, *ARGS, version=SAMPLER_FISHER_YATES)
+    monkeypatch.setattr(indexing, "DENSE_MAX_RANGE", 0)
+    assert sample_unique(200, 400, *ARGS, version=SAMPLER_FISHER_YATES) == dense
+    assert sorted(sample_unique(400, 400, *ARGS, version=SAMPLER_FISHER_YATES)) == list(range(400))
+
+
+def test_bad_arguments_are_rejected():
+    for version in (SAMPLER_REJECTION, SAMPLER_FISHER_YATES):
+        with pytest.raises(ValueError):
+            sample_unique(11, 10, *ARGS, version=version)
+        with pytest.raises(ValueError):
+            unique_range(1, 5, 4, *ARGS, version=version)
+    with pytest.raises(ValueError):
+        sample_unique(1, 10, *ARGS, version=4)
+    with pytest.raises(ValueError):
+        iter_unique_range(1, 0, 9, -1, 1, *ARGS)
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 17, 256, 1000])
+def test_feistel_is_a_permutation(n):
+    perm = FeistelPermutation(b"key", n)
+    values = [perm(k) for k in range(n)]
+    assert sorted(values) == list(range(n))
+    assert [perm.inverse(v) for v in values] == list(range(n))
+    with pytest.raises(IndexError):
+        perm(n)
+
+
+@pytest.mark.parametrize("version", [SAMPLER_REJECTION, SAMPLER_FISHER_YATES, SAMPLER_PRP])
+def test_pages_match_slices_of_the_full_draw(version):
+    count, start, end = 120, 1000, 1999
+    full = unique_range(count, start, end, *ARGS, version=version)
+    assert len(set(full)) == count and all(start <= n <= end for n in full)
+    for offset, limit in ((0, 120), (0, 7), (5, 10), (110, 50), (120, 5)):
+        page = list(iter_unique_range(count, start, end, offset, limit, *ARGS, version=version))
+        assert page == full[offset:offset + limit]
+
+
+def test_choose_sampler_keeps_fisher_yates_by_default():
+    assert DEFAULT_SAMPLER == SAMPLER_FISHER_YATES
+    assert choose_sampler(100, 1000) == SAMPLER_FISHER_YATES
+    assert choose_sampler(100, 1000, 0, 100) == SAMPLER_FISHER_YATES
+    assert choose_sampler(100, 1000, 0, 500) == SAMPLER_FISHER_YATES
+    assert choose_sampler(100, 1000, 10, 5) == SAMPLER_PRP
+    assert choose_sampler(100, 1000, 0, 50) == SAMPLER_PRP
+    assert choose_sampler(DENSE_MAX_RANGE + 1, 2**40) == SAMPLER_PRP
+    assert choose_sampler(DENSE_MAX_RANGE, 2**40) == SAMPLER_FISHER_YATES
+
+
+def test_batched_prng_words_match_per_counter_hashing():
+    # long enough to cross several batch-size doublings
+    n_blocks = 2 * indexing.PRNG_MAX_BATCH + 3
+    expected = []
+    for counter in range(n_blocks):
+        blk = hashlib.sha3_256(b"".join(ARGS) + counter.to_bytes(8, "big")).digest()
+        expected.extend(int.from_bytes(blk[i:i + 8], "big") for i in range(0, 32, 8))
+    assert list(islice(prng_blocks(*ARGS), 4 * n_blocks)) == expected
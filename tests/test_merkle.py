@@ -0,0 +1,138 @@
+import os
+
+import pytest
+
+from app import merkle
+from app.merkle import (
+    MerkleAccumulator,
+    MerkleTreeFile,
+    TreeFileWriter,
+    TreeLevel,
+    build_merkle,
+    merkle_multiproof,
+    merkle_proof,
+    open_tree_file,
+    verify_multiproof,
+    verify_proof,
+    write_tree_file,
+)
+
+SIZES = [1, 2, 3, 5, 8, 13, 100]
+
+
+def _leaves(n):
+    return [os.urandom(48) for _ in range(n)]
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_tree_file_matches_build_merkle(tmp_path, n):
+    leaves = _leaves(n)
+    root, levels = build_merkle(leaves)
+    path = str(tmp_path / "tree.bin")
+    write_tree_file(path, levels)
+    with MerkleTreeFile(path) as tree:
+        assert tree.root == root
+        assert tree.leaf_count == n
+        assert len(tree) == len(levels)
+        for lvl in range(len(levels)):
+            assert [tree[lvl][i] for i in range(len(levels[lvl]))] == list(levels[lvl])
+        for i in range(n):
+            assert verify_proof(leaves[i], merkle_proof(tree, i), root)
+
+
+def test_open_tree_file_rejects_other_root(tmp_path):
+    root, levels = build_merkle(_leaves(4))
+    path = str(tmp_path / "tree.bin")
+    write_tree_file(path, levels)
+    with pytest.raises(ValueError):
+        open_tree_file(path, bytes(32))
+    with open_tree_file(path, root) as tree:
+        assert tree.root == root
+
+
+@pytest.mark.parametrize("n, picks", [(1, [0]), (7, [0, 6]), (13, [2, 3, 4, 12]), (100, list(range(0, 100, 7)))])
+def test_multiproof_accepts_selected_leaves(n, picks):
+    leaves = _leaves(n)
+    root, levels = build_merkle(leaves)
+    siblings = merkle_multiproof(levels, picks)
+    assert verify_multiproof([(i, leaves[i]) for i in picks], siblings, n, root)
+
+
+def test_multiproof_rejects_tampering():
+    leaves = _leaves(13)
+    root, levels = build_merkle(leaves)
+    picks = [1, 5, 6]
+    siblings = merkle_multiproof(levels, picks)
+    selected = [(i, leaves[i]) for i in picks]
+    assert not verify_multiproof([(1, b"x")] + selected[1:], siblings, 13, root)
+    assert not verify_multiproof([(2, leaves[1])] + selected[1:], siblings, 13, root)
+    assert not verify_multiproof(selected, siblings[:-1], 13, root)
+    assert not verify_multiproof(selected, siblings + [bytes(32)], 13, root)
+    assert not verify_multiproof(selected, siblings, 13, bytes(32))
+    assert not verify_multiproof([(13, leaves[0])], siblings, 13, root)
+    assert not verify_multiproof([], siblings, 13, root)
+    with pytest.raises(IndexError):
+        merkle_multiproof(levels, [13])
+
+
+def _reference_root(leaves):
+    level = [merkle._hash_leaf(d) for d in leaves]
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [merkle._hash_node(level[i], level[i + 1]) for i in range(0, len(level), 2)]
+    return level[0]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batched_hashing_matches_reference(monkeypatch, workers):
+    # small thresholds so that the chunked and pooled paths are taken
+    monkeypatch.setattr(merkle, "PARALLEL_THRESHOLD", 8)
+    monkeypatch.setattr(merkle, "HASH_CHUNK", 4)
+    for n in (1, 9, 37):
+        leaves = _leaves(n)
+        assert build_merkle(leaves, workers)[0] == _reference_root(leaves)
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_accumulator_writes_same_tree_as_build_merkle(tmp_path, n):
+    leaves = _leaves(n)
+    root, levels = build_merkle(leaves)
+    ref_path = str(tmp_path / "ref.bin")
+    write_tree_file(ref_path, levels)
+    # single adds and uneven batches must give the same file
+    for split in (0, 1, n // 2, n):
+        path = str(tmp_path / f"acc{split}.bin")
+        writer = TreeFileWriter(path, n)
+        acc = MerkleAccumulator(sink=writer)
+        for leaf in leaves[:split]:
+            acc.add(leaf)
+        acc.add_many(leaves[split:split + 3])
+        acc.add_many(leaves[split + 3:])
+        assert acc.finish() == root
+        writer.close()
+        assert acc.leaf_count == n
+        with open(path, "rb") as a, open(ref_path, "rb") as b:
+            assert a.read() == b.read()
+
+
+def test_tree_writer_rejects_short_tree(tmp_path):
+    path = str(tmp_path / "tree.bin")
+    writer = TreeFileWriter(path, 4)
+    acc = MerkleAccumulator(sink=writer)
+    acc.add_many(_leaves(3))
+    acc.finish()
+    with pytest.raises(ValueError):
+        writer.close()
+    assert not os.path.exists(path) and not os.path.exists(path + ".tmp")
+
+
+def test_build_merkle_levels_are_contiguous_views():
+    leaves = _leaves(5)
+    root, levels = build_merkle(leaves)
+    assert all(isinstance(level, TreeLevel) for level in levels)
+    assert [len(level) for level in levels] == [5, 3, 2, 1]
+    assert levels[-1][0] == levels[-1][-1] == root
+    assert levels[0].tobytes() == b"".join(merkle._hash_leaf(d) for d in leaves)
+    with pytest.raises(IndexError):
+        levels[1][3]
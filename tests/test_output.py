@@ -0,0 +1,58 @@
+import json
+import os
+
+import pytest
+
+from app.analysis.randomness import run_basic_tests
+from app.services import rounds
+from app.storage import round_dir
+
+
+def _ok(resp):
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def _p_values(result):
+    return [t["p_value"] for t in result["tests"]]
+
+
+@pytest.mark.parametrize("mode", ["hkdf_sha3", "sha3_ctr"])
+def test_extend_appends_the_same_stream(client, make_round, mode):
+    rid = make_round()
+    _ok(client.post(f"/rounds/{rid}/finalize", json={"output_bits": 1003, "extractor_mode": mode}))
+    rdir = round_dir(rid)
+    bits = 1003
+    for add in (5, 3, 9000, 1):
+        ext = _ok(client.post(f"/rounds/{rid}/output/extend", json={"additional_bits": add}))
+        assert ext["from_bits"] == bits
+        bits += add
+        assert ext["output_bits"] == bits
+        with open(os.path.join(rdir, "output.bin"), "rb") as f:
+            out = f.read()
+        assert len(out) == (bits + 7) // 8
+        # incremental analysis equals a fresh run over the whole output
+        assert ext["analysis"]["bit_length"] == bits
+        assert _p_values(ext["analysis"]) == _p_values(run_basic_tests(out, bits))
+    assert rounds.derive_round_output(rid, bits) == out
+    os.remove(os.path.join(rdir, "extractor_state.json"))
+    assert rounds.derive_round_output(rid, bits) == out
+    with open(os.path.join(rdir, "artifact", "manifest.json")) as f:
+        artifact = json.load(f)
+    assert artifact["output_bits"] == bits and len(artifact["output_extensions"]) == 4
+
+
+def test_extend_caps_appended_hex(client, make_round, monkeypatch):
+    from app import main
+
+    rid = make_round()
+    _ok(client.post(f"/rounds/{rid}/finalize", json={"output_bits": 64}))
+    monkeypatch.setattr(main, "EXTEND_HEX_MAX_BYTES", 16)
+    ext = _ok(client.post(f"/rounds/{rid}/output/extend", json={"additional_bits": 800}))
+    assert ext["appended_bytes"] == 100
+    assert len(ext["appended_hex"]) == 32 and ext["appended_hex_truncated"] is True
+
+
+def test_extend_requires_finalized_round(client, beaconed_round):
+    resp = client.post(f"/rounds/{beaconed_round}/output/extend", json={"additional_bits": 8})
+    assert resp.status_code == 400
@@ -0,0 +1,74 @@
+import struct
+
+import pytest
+
+from app.indexing import SAMPLER_FISHER_YATES, SAMPLER_PRP
+from app.services import random_ranges
+
+
+def _draw(client, rid, **req):
+    resp = client.post(f"/rounds/{rid}/random-range", json=req)
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "u64le"])
+def test_stream_matches_plain_draw(client, beaconed_round, fmt):
+    req = {"start": 10, "end": 5000, "count": 900, "context": "stream"}
+    expected = _draw(client, beaconed_round, **req)["numbers"]
+    resp = client.post(f"/rounds/{beaconed_round}/random-range/stream", params={"format": fmt}, json=req)
+    assert resp.status_code == 200
+    assert resp.headers["x-tsrng-emit-count"] == "900"
+    assert resp.headers["x-tsrng-sampler-version"] == str(SAMPLER_FISHER_YATES)
+    if fmt == "u64le":
+        numbers = list(struct.unpack(f"<{len(resp.content) // 8}Q", resp.content))
+    else:
+        numbers = [int(line) for line in resp.text.splitlines()]
+    assert numbers == expected
+
+
+def test_stream_page_uses_permutation(client, beaconed_round):
+    req = {"start": 0, "end": 10**12, "count": 10**9, "offset": 500, "limit": 20}
+    resp = client.post(f"/rounds/{beaconed_round}/random-range/stream", json=req)
+    assert resp.headers["x-tsrng-sampler-version"] == str(SAMPLER_PRP)
+    page = [int(line) for line in resp.text.splitlines()]
+    assert page == _draw(client, beaconed_round, **req)["numbers"]
+    assert len(set(page)) == 20
+
+
+def test_stream_is_recorded_in_history(client, beaconed_round):
+    req = {"start": 1, "end": 100, "count": 5, "context": "history-check"}
+    resp = client.post(f"/rounds/{beaconed_round}/random-range/stream", json=req)
+    assert resp.status_code == 200
+    entries = client.get(f"/rounds/{beaconed_round}/random-range/history").json()["entries"]
+    (entry,) = [e for e in entries if e.get("context") == "history-check"]
+    assert entry["completed"] is True and entry["emitted"] == 5
+
+
+def test_u64le_rejects_negative_range(client, beaconed_round):
+    req = {"start": -5, "end": 5, "count": 3}
+    resp = client.post(f"/rounds/{beaconed_round}/random-range/stream", params={"format": "u64le"}, json=req)
+    assert resp.status_code == 400
+
+
+def test_batch_matches_single_draws(client, beaconed_round):
+    reqs = [
+        {"start": 0, "end": 99, "count": 10},
+        {"start": 5, "end": 10**6, "count": 50, "context": "b", "salt_hex": "0a0b"},
+        {"start": 0, "end": 10**9, "count": 10**6, "offset": 77, "limit": 5},
+    ]
+    resp = client.post(f"/rounds/{beaconed_round}/random-range/batch", json={"requests": reqs})
+    assert resp.status_code == 200, resp.text
+    results = resp.json()["results"]
+    assert [r["numbers"] for r in results] == [_draw(client, beaconed_round, **r)["numbers"] for r in reqs]
+    bad = client.post(f"/rounds/{beaconed_round}/random-range/batch",
+                      json={"requests": [reqs[0], {"start": 5, "end": 1, "count": 1}]})
+    assert bad.status_code == 400 and "requests[1]" in bad.json()["detail"]
+
+
+def test_pooled_batch_matches_inline(monkeypatch):
+    specs = [(30, 0, 999, 0, 30, b"d", b"S" * 32, b"R" * 32, v) for v in (1, 2, 3)] * 2
+    inline = random_ranges.draw_batch(specs, workers=1)
+    monkeypatch.setattr(random_ranges, "PARALLEL_THRESHOLD", 0)
+    assert random_ranges.draw_batch(specs, workers=2) == inline
+    assert inline == [random_ranges.draw_page(s) for s in specs]
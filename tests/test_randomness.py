@@ -0,0 +1,149 @@
+import os
+import random
+
+import pytest
+
+from app.analysis import randomness
+from app.analysis.randomness import run_basic_tests, trim_to_bits
+
+_rng = random.Random(1234)
+SAMPLES = [
+    _rng.randbytes(1000),
+    b"\x00" * 300,
+    b"\xff" * 300,
+    b"\x55" * 300,
+    b"\x0f\xf0" * 150,
+    bytes([0b11100000]) + b"\xff" * 40 + b"\x00" * 40,
+]
+BIT_LENGTHS = [1, 7, 8, 9, 129, 1001, 2399, None]
+BLOCK_SIZES = [8, 20, 128]
+
+
+def _cases():
+    for i, data in enumerate(SAMPLES):
+        for limit in BIT_LENGTHS:
+            if limit is None or limit <= len(data) * 8:
+                yield i, limit
+
+
+@pytest.mark.parametrize("sample, limit", list(_cases()))
+def test_numpy_kernel_matches_reference(sample, limit):
+    pytest.importorskip("numpy")
+    trimmed, bit_length = trim_to_bits(SAMPLES[sample], limit)
+    for block_size in BLOCK_SIZES:
+        assert randomness._bit_stats_numpy(trimmed, bit_length, block_size) == randomness._bit_stats_bitwise(
+            trimmed, bit_length, block_size
+        )
+
+
+def test_backends_give_the_same_report():
+    pytest.importorskip("numpy")
+    data = os.urandom(5000)
+    for limit in (None, 39_999, 12_345):
+        assert run_basic_tests(data, limit, backend="numpy") == run_basic_tests(data, limit, backend="python")
+    with pytest.raises(ValueError):
+        run_basic_tests(data, backend="fortran")
+
+
+@pytest.mark.parametrize("sample, limit", list(_cases()))
+def test_table_kernel_matches_reference(sample, limit):
+    trimmed, bit_length = trim_to_bits(SAMPLES[sample], limit)
+    for block_size in BLOCK_SIZES:
+        assert randomness._bit_stats_python(trimmed, bit_length, block_size) == randomness._bit_stats_bitwise(
+            trimmed, bit_length, block_size
+        )
+
+
+def _accumulate(data, chunk_sizes, limit=None, block_size=128):
+    acc = randomness.BitStatsAccumulator(limit, block_size)
+    pos, i = 0, 0
+    while pos < len(data):
+        size = chunk_sizes[i % len(chunk_sizes)]
+        acc.update(data[pos:pos + size])
+        pos += size
+        i += 1
+    return acc
+
+
+@pytest.mark.parametrize("block_size", [7, 128])
+@pytest.mark.parametrize("limit", [None, 3, 12_345])
+def test_accumulator_matches_one_shot(block_size, limit):
+    data = SAMPLES[0] + os.urandom(3000)
+    expected = run_basic_tests(data, limit, block_size)
+    for chunk_sizes in ([1], [7, 300], [len(data)]):
+        assert _accumulate(data, chunk_sizes, limit, block_size).finalize() == expected
+
+
+def test_accumulator_merge_and_state_round_trip():
+    data = os.urandom(4096)
+    expected = run_basic_tests(data)
+    left = _accumulate(data[:1024], [100])
+    right = _accumulate(data[1024:], [333])
+    left.merge(right)
+    assert left.finalize() == expected
+    # snapshot mid-stream, restore and carry on
+    head = _accumulate(data[:1000], [64])
+    resumed = randomness.BitStatsAccumulator.from_state(head.state())
+    resumed.update(data[1000:])
+    assert resumed.finalize() == expected
+
+
+def test_upload_is_analysed_while_streaming(client, tmp_path, monkeypatch):
+    from app.services import analysis_cache
+
+    monkeypatch.setattr(analysis_cache, "CACHE_DIR", str(tmp_path))
+    data = os.urandom(70_000)
+    resp = client.post("/analysis/upload", params={"limit_bits": 500_001}, files={"file": ("d.bin", data)})
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    expected = run_basic_tests(data, 500_001)
+    assert body["bit_length"] == 500_001
+    assert [t["p_value"] for t in body["tests"]] == [t["p_value"] for t in expected["tests"]]
+
+
+@pytest.mark.parametrize("limit", [None, 80_001])
+def test_sharded_analysis_matches_inline(tmp_path, monkeypatch, limit):
+    data = os.urandom(12_000)
+    path = tmp_path / "data.bin"
+    path.write_bytes(data)
+    expected = run_basic_tests(data, limit, workers=1)
+    # shard even this small input across the shared pool
+    monkeypatch.setattr(randomness, "PARALLEL_THRESHOLD", 8)
+    for workers in (2, 3):
+        assert run_basic_tests(data, limit, workers=workers) == expected
+        assert randomness.analyze_file(str(path), limit, workers=workers) == expected
+    assert randomness.analyze_file(str(path), limit, workers=1) == expected
+
+
+def test_screening_fails_early_on_constant_input():
+    data = b"\x00" * (randomness.SCREEN_FIRST_BITS // 2)
+    report = run_basic_tests(data, screening=True, extra_tests=["runs"])
+    assert report["all_passed"] is False
+    assert report["screening"]["outcome"] == "early_fail"
+    assert report["screening"]["bits_examined"] == randomness.SCREEN_FIRST_BITS
+    assert report["screening"]["skipped_tests"] == ["runs"]
+    assert report["bit_length"] == randomness.SCREEN_FIRST_BITS
+
+
+def test_screening_passes_early_and_still_runs_extra_tests(monkeypatch):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(randomness, "SCREEN_PASS_P", 0.0)
+    data = os.urandom(randomness.SCREEN_FIRST_BITS // 4)
+    report = run_basic_tests(data, screening=True, extra_tests=["runs"])
+    assert report["screening"]["outcome"] == "early_pass"
+    assert report["tests"][-1]["name"] == "sp800_22.runs"
+    assert report["screening"]["extra_tests"] == ["runs"]
+
+
+def test_borderline_screening_falls_back_to_full_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(randomness, "SCREEN_FAIL_P", 0.0)
+    monkeypatch.setattr(randomness, "SCREEN_PASS_P", 2.0)
+    data = os.urandom(randomness.SCREEN_FIRST_BITS // 4)
+    path = tmp_path / "data.bin"
+    path.write_bytes(data)
+    expected = run_basic_tests(data)
+    for report in (run_basic_tests(data, screening=True), randomness.analyze_file(str(path), screening=True)):
+        screening = report.pop("screening")
+        assert screening["outcome"] == "full"
+        assert screening["stages"] == [randomness.SCREEN_FIRST_BITS, len(data) * 8]
+        assert report == expected
@@ -0,0 +1,26 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from fastapi.testclient import TestClient
+
+from app.analysis import sp800_22
+from app.main import app
+from app.services import analysis_cache
+
+
+@pytest.mark.parametrize("data", [b"\xff", b"\x00", b"\xff\xff"])
+def test_runs_constant_short_sequence(data):
+    (result,) = sp800_22.run_tests(data, ["runs"])
+    assert result.passed is False
+    assert result.p_value == 0.0
+    assert result.note == "frequency prerequisite failed"
+
+
+def test_sequence_endpoint_runs_all_ones(tmp_path, monkeypatch):
+    monkeypatch.setattr(analysis_cache, "CACHE_DIR", str(tmp_path))
+    client = TestClient(app)
+    resp = client.post("/analysis/sequence", json={"data_hex": "ff", "tests": ["runs"]})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["all_passed"] is False
@@ -0,0 +1,161 @@
+import json
+import os
+import time
+
+import pytest
+
+from app import storage, vdf
+from app.services import vdf_jobs
+
+# 2**127 - 1 is prime and = 3 mod 4, as sloth needs
+P127 = 2**127 - 1
+
+
+@pytest.mark.parametrize("T", [0, 1, 2, 25])
+def test_sloth_eval_verifies_by_squaring(T):
+    for x in (0, 1, 2, 12345, P127 - 1, P127 + 5):
+        y = vdf.vdf_eval(vdf.VDF_SCHEME_SLOTH, x, T, P127)
+        assert 0 <= y < P127
+        assert vdf.vdf_verify(vdf.VDF_SCHEME_SLOTH, x, y, T, P127)
+
+
+def test_sloth_rejects_wrong_output():
+    x, T = 987654321, 10
+    y = vdf.vdf_eval_sloth_sqrt(x, T, P127)
+    assert not vdf.vdf_verify_sloth_sqrt(x, (y + 1) % P127, T, P127)
+    assert not vdf.vdf_verify_sloth_sqrt(x, y, T + 1, P127)
+    assert not vdf.vdf_verify_sloth_sqrt(x, y + P127, T, P127)
+    # p = 1 mod 4 has no single-exponentiation square root
+    with pytest.raises(ValueError):
+        vdf.vdf_eval(vdf.VDF_SCHEME_SLOTH, x, T, 13)
+    assert not vdf.vdf_verify_sloth_sqrt(x, 1, T, 13)
+
+
+def test_squaring_scheme_round_trip():
+    x, T = 42, 50
+    y = vdf.vdf_eval(vdf.VDF_SCHEME_SQUARING, x, T, P127)
+    assert y == pow(x, 2**T, P127)
+    assert vdf.vdf_verify(vdf.VDF_SCHEME_SQUARING, x, y, T, P127)
+    with pytest.raises(ValueError):
+        vdf.vdf_verify("wesolowski", x, y, T, P127)
+
+
+def _wait_job(round_id, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = vdf_jobs.get_job(round_id)
+        if job["status"] not in vdf_jobs.ACTIVE_STATUSES:
+            return job
+        time.sleep(0.05)
+    raise AssertionError("VDF job did not finish")
+
+
+def _start(round_id, x, T):
+    return vdf_jobs.start_job(round_id, "00", vdf.VDF_SCHEME_SLOTH, T, P127, 0, x, "2024-01-01T00:00:00Z")
+
+
+def test_vdf_job_writes_proof(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DATA_ROOT", str(tmp_path))
+    x, T = 777, 300
+    _start("r1", x, T)
+    job = _wait_job("r1")
+    assert job["status"] == "completed" and job["iteration"] == T
+    with open(tmp_path / "rounds" / "r1" / "vdf" / "proof.json") as f:
+        proof = json.load(f)
+    assert int(proof["y_hex"], 16) == vdf.vdf_eval(vdf.VDF_SCHEME_SLOTH, x, T, P127)
+    with pytest.raises(vdf_jobs.VDFJobError):
+        vdf_jobs.resume_job("r1")
+
+
+def test_orphaned_queued_job_is_interrupted_and_resumable(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DATA_ROOT", str(tmp_path))
+    x, T = 5, 100
+    # what a server that died between saving the job and spawning leaves behind
+    job = vdf_jobs._new_job("r2", "00", vdf.VDF_SCHEME_SLOTH, T, P127, 0, x, "2024-01-01T00:00:00Z", None)
+    os.makedirs(tmp_path / "rounds" / "r2" / "vdf")
+    vdf_jobs._save(vdf_jobs._job_path("r2"), job)
+    assert vdf_jobs.get_job("r2")["status"] == "interrupted"
+    vdf_jobs.resume_job("r2")
+    assert _wait_job("r2")["status"] == "completed"
+
+
+def test_recycled_pid_is_not_alive():
+    me = os.getpid()
+    started = vdf_jobs._process_start(me)
+    assert vdf_jobs._pid_alive(me, started)
+    assert not vdf_jobs._pid_alive(me, started + 1)
+    assert not vdf_jobs._pid_alive(None)
+
+
+@pytest.mark.parametrize("n, prime", [
+    (2, True), (3, True), (1999, True), (2003, True), (2**61 - 1, True), (P127, True),
+    (0, False), (1, False), (561, False), (2**61 + 1, False),
+    # Carmichael numbers and a product of two large primes
+    (41041, False), (825265, False), ((2**61 - 1) * P127, False),
+])
+def test_miller_rabin(n, prime):
+    assert vdf._is_probable_prime(n) is prime
+
+
+def test_prime_derivation_is_deterministic(tmp_path, monkeypatch):
+    monkeypatch.setattr(vdf, "PRIME_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(vdf, "_prime_cache", {})
+    p, ctr = vdf.derive_prime_with_counter(b"seed", 512)
+    assert p.bit_length() == 512 and p % 4 == 3
+    assert p == vdf.prime_candidate(b"seed", 512, ctr)
+    assert all(not vdf._is_probable_prime(vdf.prime_candidate(b"seed", 512, c)) for c in range(ctr))
+    assert vdf.check_prime_counter(b"seed", 512, ctr, p)
+    assert not vdf.check_prime_counter(b"seed", 512, ctr + 1, p)
+    # a fresh process reads the same answer back from the file cache
+    monkeypatch.setattr(vdf, "_prime_cache", {})
+    assert len(os.listdir(tmp_path)) == 1
+    assert vdf.derive_prime_with_counter(b"seed", 512) == (p, ctr)
+
+
+def test_tampered_prime_cache_is_ignored(tmp_path, monkeypatch):
+    monkeypatch.setattr(vdf, "PRIME_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(vdf, "_prime_cache", {})
+    p, ctr = vdf.derive_prime_with_counter(b"other", 512)
+    (entry,) = os.listdir(tmp_path)
+    with open(tmp_path / entry, "w") as f:
+        json.dump({"bits": 512, "counter": ctr, "p_hex": format(p + 4, "x")}, f)
+    monkeypatch.setattr(vdf, "_prime_cache", {})
+    assert vdf.derive_prime_with_counter(b"other", 512) == (p, ctr)
+
+
+def test_T_for_delay_uses_cached_calibration(tmp_path, monkeypatch):
+    path = tmp_path / "vdf_calibration.json"
+    monkeypatch.setattr(vdf, "CALIBRATION_PATH", str(path))
+    key = vdf._calibration_key(vdf.VDF_SCHEME_SLOTH, 512)
+    path.write_text(json.dumps({key: {"steps_per_second": 2000.0}}))
+    T, entry = vdf.T_for_delay(vdf.VDF_SCHEME_SLOTH, 512, 1500)
+    assert T == 3000 and entry["steps_per_second"] == 2000.0
+    assert vdf.T_for_delay(vdf.VDF_SCHEME_SLOTH, 512, 0)[0] == 1
+
+
+def test_calibration_is_measured_once_and_stored(tmp_path, monkeypatch):
+    monkeypatch.setattr(vdf, "CALIBRATION_PATH", str(tmp_path / "vdf_calibration.json"))
+    monkeypatch.setattr(vdf, "PRIME_CACHE_DIR", str(tmp_path / "primes"))
+    entry = vdf.vdf_calibration(vdf.VDF_SCHEME_SQUARING, 512)
+    assert entry["steps_per_second"] > 0 and entry["backend"] == vdf.BACKEND.name
+    assert vdf.vdf_calibration(vdf.VDF_SCHEME_SQUARING, 512) == entry
+    stored = json.loads((tmp_path / "vdf_calibration.json").read_text())
+    assert list(stored.values()) == [entry]
+
+
+def test_backends_agree(monkeypatch):
+    pytest.importorskip("gmpy2")
+    x, T = 31337, 40
+    results = []
+    for name in ("python", "gmpy2"):
+        monkeypatch.setattr(vdf, "BACKEND", vdf.load_backend(name))
+        y = vdf.vdf_eval(vdf.VDF_SCHEME_SLOTH, x, T, P127)
+        assert type(y) is int
+        results.append((y, vdf._is_probable_prime(P127), vdf._is_probable_prime(P127 * 3)))
+    assert results[0] == results[1]
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        vdf.load_backend("mpmath")
+    assert vdf.load_backend("python").name == "python"